@@ -6,6 +6,7 @@ from fastapi import APIRouter
 from app.routes.items import router as items_router
 from app.routes.user import router as user_router
 from app.routes.useritems import router as useritems_router
+from app.routes.admin import router as admin_router
 
 api_router = APIRouter()
 
@@ -36,3 +37,10 @@ api_router.include_router(
     prefix="/useritems",
     tags=["Useritems"]
 )
+
+# (新增) 运维接口，例如慢查询统计
+api_router.include_router(
+    admin_router,
+    prefix="/admin",
+    tags=["Admin"]
+)
@@ -0,0 +1,101 @@
+from typing import Annotated, Any, Literal, Type, Union
+
+from pydantic import AfterValidator, BaseModel, BeforeValidator, Field, create_model
+from sqlalchemy import inspect
+
+from app.core.query_filters import QueryOptions
+from app.db.delta_sync import tracks_changes
+
+
+def _as_list(value: Any) -> Any:
+    """expand 允许直接传一个关联关系名称，例如 "user"。"""
+    return [value] if isinstance(value, str) else value
+
+
+def _dedupe(value: list) -> list:
+    return list(dict.fromkeys(value))
+
+
+# --- 各个标准 action 的 payload 基类 (handler 的类型注解使用它们，具体字段类型由 build_crud_payloads 按实体补全) ---
+class GetByIdPayload(BaseModel):
+    id: Any
+
+
+class GetAllPayload(QueryOptions):
+    """get_all 的 payload: 分页参数 + filters/sort (见 QueryOptions)。"""
+    offset: int = Field(0, ge=0, description="跳过的条目数。")
+    limit: int = Field(100, ge=0, description="每页的条目数。")
+    format: Literal["rows", "columnar"] = Field(
+        "rows", description='返回形状: rows 为逐行字典，columnar 为 {"columns": [...], "rows": [[...], ...]}。')
+
+
+class UpdatePayload(BaseModel):
+    id: Any
+    update_data: Any
+
+
+class DeletePayload(BaseModel):
+    id: Any
+
+
+class ChangesSincePayload(BaseModel):
+    """changes_since 的 payload: 上一次响应中的 next_cursor (首次同步时省略) 和每页条数。"""
+    cursor: str | None = Field(None, description="上一次响应中的 next_cursor；省略时从头开始同步。")
+    limit: int = Field(500, ge=1, le=5000, description="每次最多返回的修改行数 (删除的主键另计)。")
+
+
+def build_crud_payloads(
+        entity_name: str,
+        model: Type,
+        create_schema: Type[BaseModel],
+        update_schema: Type[BaseModel],
+        expandable_relations: list[str] | None = None,
+) -> dict[str, Type]:
+    """
+    (新增) 根据实体的模型和 Schema 构建五个标准 action 的 payload 模型，返回 action 名称 -> payload 类型。
+    - id 使用主键列的 Python 类型 (例如 int)，"5" 这样的字符串仍会按宽松模式转换；
+    - expand 只接受 expandable_relations 中的名称 (OpenAPI 中显示为枚举)，没有可展开的关联关系时不提供该字段；
+    - create 的 payload 就是 create_schema，update_data 是 update_schema；
+    - 带 updated_at 列的模型 (UpdatedAtMixin) 额外提供 changes_since。
+    """
+    pk_type = inspect(model).primary_key[0].type.python_type
+    expand_field = {}
+    if expandable_relations:
+        relation_name = Literal[tuple(expandable_relations)]
+        expand_field["expand"] = (
+            Annotated[list[relation_name], BeforeValidator(_as_list), AfterValidator(_dedupe)],
+            Field(default_factory=list, description="需要一次性加载的关联关系。"),
+        )
+    payloads = {
+        "get_by_id": create_model(f"{entity_name}GetByIdPayload", __base__=GetByIdPayload,
+                                  id=(pk_type, ...), **expand_field),
+        "get_all": create_model(f"{entity_name}GetAllPayload", __base__=GetAllPayload, **expand_field),
+        "create": create_schema,
+        "update": create_model(f"{entity_name}UpdatePayload", __base__=UpdatePayload,
+                               id=(pk_type, ...), update_data=(update_schema, ...)),
+        "delete": create_model(f"{entity_name}DeletePayload", __base__=DeletePayload, id=(pk_type, ...)),
+    }
+    if tracks_changes(model):
+        payloads["changes_since"] = ChangesSincePayload
+    return payloads
+
+
+def build_action_request(entity_name: str, payloads: dict[str, Type]) -> Any:
+    """
+    (新增) 构建以 action 为判别字段的请求体联合类型: 每个 action 一个变体，各自带有类型化的 payload。
+    请求体在 pydantic-core 中一次完成解析和校验，OpenAPI 中每个 action 的 payload 都有准确的结构。
+    payload 类型为 dict 的 action (例如自定义 action) 按原样接收字典；payload 的所有字段都有默认值时可以省略 payload。
+    """
+    variants = []
+    for action, payload_type in payloads.items():
+        if payload_type is dict or all(not field.is_required() for field in payload_type.model_fields.values()):
+            payload_field = (payload_type, Field(default_factory=payload_type))
+        else:
+            payload_field = (payload_type, ...)
+        class_name = "".join(part.capitalize() for part in action.split("_"))
+        variants.append(create_model(
+            f"{entity_name}{class_name}Request",
+            action=(Literal[action], ...),
+            payload=payload_field,
+        ))
+    return Annotated[Union[tuple(variants)], Field(discriminator="action")]
@@ -1,19 +1,26 @@
 import logging
 import math
-from enum import Enum
-from typing import Type, Dict, Any, Callable
-from pydantic import BaseModel, Field
-from fastapi import APIRouter, Depends
+from typing import Type, Dict, Any, Callable, Optional
+from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import Response
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession
-from redis.asyncio import Redis as AsyncRedis
 from dataclasses import dataclass
 
 from app.core.logging_crud import LoggingFastCRUD
-from app.core.responses import StandardResponse, Success, PaginationMeta
+from app.core.action_payloads import (
+    build_action_request, build_crud_payloads, ChangesSincePayload, DeletePayload, GetAllPayload, GetByIdPayload, UpdatePayload)
+from app.core.query_filters import build_query_kwargs
+from app.core.logging_config import action_var
+from app.core.responses import (
+    StandardResponse, Success, RawSuccess, Negotiated, ConditionalSuccess, PaginationMeta, ListPage, PageSerializer, payload_etag,
+    response_format_var)
 from app.exceptions.exceptions import ResourceNotFoundException, MissingFieldException, AppException
 from app.exceptions.error_codes import ErrorCode
 from app.db.session import get_db
-from app.db.cache import get_redis
+from app.db.cache import CacheBackend, get_cache
+from app.db.codec import cache_codec
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +31,27 @@ class CRUDSchemas:
     Update: Type[BaseModel]
     Read: Type[BaseModel]
     MultiResponse: Type[BaseModel]
+    # (新增) 可选: 展开关联关系后的读取模型，配合 expandable_relations 使用
+    Expanded: Optional[Type[BaseModel]] = None
+
+
+@dataclass
+class EntityMessages:
+    """
+    (新增) 路由器返回给客户端的提示文案，{id} 会被替换为实体的主键值。
+    未指定时使用 EntityMessages.default(实体名) 生成的默认文案。
+    """
+    not_found: str
+    delete_not_found: str
+    deleted: str
+
+    @classmethod
+    def default(cls, entity_name: str) -> "EntityMessages":
+        return cls(
+            not_found=f"ID为 {{id}} 的 {entity_name} 未找到。",
+            delete_not_found=f"ID为 {{id}} 的 {entity_name} 未找到，无法删除。",
+            deleted=f"成功删除 ID 为 {{id}} 的 {entity_name}。",
+        )
 
 
 def create_actions_router(
@@ -33,132 +61,222 @@ def create_actions_router(
         tags: list[str],
         primary_key_name: str = "id",
         custom_actions: Dict[str, Callable] = None,
-        cache_ttl_seconds: int = 300
+        custom_payloads: Dict[str, Type[BaseModel]] = None,
+        cache_ttl_seconds: int = 300,
+        expandable_relations: list[str] = None,
+        allow_unindexed_filters: bool = False,
+        coalesce_get_all: bool = True,
+        get_all_micro_ttl_ms: float | None = None,
+        page_json_bytes: bool = True,
+        messages: EntityMessages = None
 ) -> APIRouter:
     """
     一个路由器工厂，用于为任何数据模型创建统一的 POST /actions 接口。
     这个最终版本整合了缓存、健壮的删除逻辑和自定义 Action 注入。
+    custom_payloads 为自定义 action 指定类型化的 payload 模型 (请求体解析时校验)，未指定的按字典接收。
+    expandable_relations 是允许通过 payload 中 expand 选项预加载的关联关系白名单，
+    需要同时提供 schemas.Expanded。
+    allow_unindexed_filters 为 True 时，get_all 允许在无索引的列上过滤/排序 (仅记录警告)。
+    coalesce_get_all 为 True 时，完全相同的并发 get_all 请求共享一次查询和同一个结果；
+    get_all_micro_ttl_ms 是结果的复用时间 (默认取 settings.GET_ALL_COALESCE_MICRO_TTL_MS)。
+    page_json_bytes 为 True 时，get_all 的整页由预编译的 PageSerializer 一次校验并直接序列化成 JSON 字节。
+    messages 用于保留各模块原有的提示文案 (见 EntityMessages)。
     """
+    if expandable_relations and schemas.Expanded is None:
+        raise ValueError("使用 expandable_relations 时必须提供 schemas.Expanded。")
     router = APIRouter(prefix=prefix, tags=tags)
     entity_name = crud_instance.model.__name__
+    messages = messages or EntityMessages.default(entity_name)
+    # 缓存键带上 Read 模型的版本哈希，模型变化后不会读到旧形状的缓存
+    crud_instance.enable_versioned_cache(schemas.Read, ttl_seconds=cache_ttl_seconds, expanded_schema=schemas.Expanded)
+    if coalesce_get_all:
+        crud_instance.enable_get_all_coalescing(micro_ttl_ms=get_all_micro_ttl_ms)
+    # 列表页的校验/序列化器，每个路由器只构建一次
+    page_serializer = PageSerializer(schemas.MultiResponse)
+    # MultiResponse 的 data 字段按 Read 类型序列化，会丢弃展开的嵌套对象，因此展开时使用 ListPage[Expanded]
+    expanded_page_serializer = PageSerializer(ListPage[schemas.Expanded]) if schemas.Expanded else None
 
-    # --- 动态创建 Action 枚举 ---
-    standard_actions = {
-        "get_by_id": "get_by_id", "get_all": "get_all", "create": "create",
-        "update": "update", "delete": "delete",
-    }
+    # --- 动态创建以 action 为判别字段的请求体类型 ---
+    # 标准 action 的 payload 由路由器的 Schema 构建 (类型化)，自定义 action 的 payload 取自 custom_payloads，默认是字典
+    action_payloads = build_crud_payloads(entity_name, crud_instance.model, schemas.Create, schemas.Update,
+                                          expandable_relations)
     if custom_actions:
-        for name in custom_actions:
-            standard_actions[name] = name
-    ActionEnum = Enum("ActionEnum", standard_actions)
-
-    class ActionRequest(BaseModel):
-        action: ActionEnum
-        payload: dict = Field(default_factory=dict)
+        action_payloads.update({name: (custom_payloads or {}).get(name, dict) for name in custom_actions})
+    ActionRequest = build_action_request(entity_name, action_payloads)
 
     # --- 通用 Handler 函数 ---
-    async def _get_by_id_handler(payload: dict, db: AsyncSession, redis: AsyncRedis):
-        entity_id = payload.get("id")
-        if not entity_id: raise MissingFieldException(name="id")
+    async def _get_by_id_handler(payload: GetByIdPayload, db: AsyncSession, cache: CacheBackend):
+        entity_id = payload.id
+
+        # expand 请求从数据库预加载关联关系。结果带着标签缓存 (自身 + 外键指向的实体)，
+        # 关联的实体被更新或删除时，这个条目会随之失效
+        if expand := getattr(payload, "expand", None):
+            cache_key = crud_instance._get_expanded_cache_key(entity_id, expand)
+            try:
+                if cached_data := await cache.get(cache_key):
+                    return cache_codec.decode_model(schemas.Expanded, cached_data)
+            except Exception as e:
+                logger.error(f"CACHE_ERROR: Read failed for key {cache_key}: {e}", exc_info=True)
+
+            db_entity = await crud_instance.get_with_relations(
+                db=db, relations=expand, **{primary_key_name: entity_id})
+            if not db_entity:
+                raise ResourceNotFoundException(detail=messages.not_found.format(id=entity_id))
+            expanded_entity = schemas.Expanded.model_validate(db_entity)
+            if ttl := crud_instance.cache_ttl(cache_ttl_seconds):
+                try:
+                    await crud_instance.cache_set_tagged(
+                        cache, cache_key, cache_codec.encode_model(expanded_entity), ttl,
+                        tags=crud_instance.get_cache_tags(db_entity))
+                except Exception as e:
+                    logger.error(f"CACHE_ERROR: Write failed for key {cache_key}: {e}", exc_info=True)
+            return expanded_entity
 
         # (关键改进 1) 添加完整的缓存读取（Cache-Aside）逻辑
         cache_key = crud_instance._get_cache_key(entity_id)
+        crud_instance.record_cache_read(entity_id)
         try:
-            if cached_data := await redis.get(cache_key):
+            if cached_data := await cache.get(cache_key):
                 logger.debug(f"CACHE: Hit for key {cache_key}")
-                return schemas.Read.model_validate_json(cached_data)
+                return cache_codec.decode_model(schemas.Read, cached_data)
         except Exception as e:
             logger.error(f"CACHE_ERROR: Read failed for key {cache_key}: {e}", exc_info=True)
 
         logger.debug(f"CACHE: Miss for key {cache_key}. Fetching from DB.")
-        db_entity = await crud_instance.get(db=db, **{primary_key_name: entity_id})
+        db_entity = await crud_instance.get_by_pk(db, entity_id)
         if not db_entity:
-            raise ResourceNotFoundException(detail=f"ID为 {entity_id} 的 {entity_name} 未找到。")
+            raise ResourceNotFoundException(detail=messages.not_found.format(id=entity_id))
 
         entity_to_cache = schemas.Read.model_validate(db_entity)
-        try:
-            await redis.setex(cache_key, cache_ttl_seconds, entity_to_cache.model_dump_json())
-        except Exception as e:
-            logger.error(f"CACHE_ERROR: Write failed for key {cache_key}: {e}", exc_info=True)
+        # 自适应 TTL: 频繁变化的实体缓存时间更短，变化过于频繁时 (ttl=0) 不缓存
+        if ttl := crud_instance.cache_ttl(cache_ttl_seconds):
+            try:
+                await cache.set(cache_key, cache_codec.encode_model(entity_to_cache), ttl=ttl)
+            except Exception as e:
+                logger.error(f"CACHE_ERROR: Write failed for key {cache_key}: {e}", exc_info=True)
 
         return entity_to_cache
 
-    async def _get_all_handler(payload: dict, db: AsyncSession, redis: AsyncRedis):
-        offset, limit = int(payload.get("offset", 0)), int(payload.get("limit", 100))
+    async def _get_all_handler(payload: GetAllPayload, db: AsyncSession, cache: CacheBackend):
+        offset, limit = payload.offset, payload.limit
+        expand = getattr(payload, "expand", [])
+        query_kwargs = build_query_kwargs(payload, crud_instance.model, allow_unindexed_filters)
 
-        # (关键改进 2) 正确处理 get_multi 返回的字典
-        multi_response = await crud_instance.get_multi(db=db, offset=offset, limit=limit)
-        orm_list = multi_response['data']
-        total_count = multi_response['total_count']
+        async def _load_page():
+            # (关键改进 2) 正确处理 get_multi 返回的字典
+            if expand:
+                multi_response = await crud_instance.get_multi_with_relations(
+                    db=db, relations=expand, offset=offset, limit=limit, **query_kwargs)
+                serializer = expanded_page_serializer
+            else:
+                # Core 行模式: 行直接组装成字典，不创建 ORM 实例；校验交给下面的 PageSerializer 一次完成
+                multi_response = await crud_instance.get_multi_rows(
+                    db=db, read_schema=schemas.Read, offset=offset, limit=limit, as_dicts=True, **query_kwargs)
+                serializer = page_serializer
+            total_count = multi_response['total_count']
 
-        pydantic_list = [schemas.Read.model_validate(item) for item in orm_list]
-        total_pages = math.ceil(total_count / limit) if limit > 0 else 0
-        current_page = (offset // limit) + 1 if limit > 0 else 1
-        pagination_meta = {
-            "pagination": PaginationMeta(total_items=total_count, total_pages=total_pages, current_page=current_page,
-                                         page_size=limit).model_dump()}
-        return {"data": schemas.MultiResponse(data=pydantic_list, total_count=total_count), "meta": pagination_meta}
+            total_pages = math.ceil(total_count / limit) if limit > 0 else 0
+            current_page = (offset // limit) + 1 if limit > 0 else 1
+            pagination_meta = {
+                "pagination": PaginationMeta(total_items=total_count, total_pages=total_pages, current_page=current_page,
+                                             page_size=limit).model_dump()}
+            if page_json_bytes:
+                if payload.format == "columnar":
+                    return serializer.dump_columnar(multi_response['data'], total_count, pagination_meta, response_format)
+                return serializer.dump(multi_response['data'], total_count, pagination_meta, response_format)
+            if payload.format == "columnar":
+                return {"data": serializer.columnar(multi_response['data'], total_count), "meta": pagination_meta}
+            return {"data": serializer.validate(multi_response['data'], total_count), "meta": pagination_meta}
 
-    async def _create_handler(payload: dict, db: AsyncSession, redis: AsyncRedis):
-        try:
-            create_schema = schemas.Create.model_validate(payload)
-        except Exception as e:
-            raise AppException(ErrorCode.VALIDATION_ERROR, detail=str(e))
-        new_orm = await crud_instance.create(db=db, object=create_schema)
-        return schemas.Read.model_validate(new_orm)
+        # 键是规范化后的查询 (加上响应格式和返回形状)，参数顺序不同的相同请求也会被合并 (共享同一份 JSON/MessagePack 字节)
+        response_format = response_format_var.get() if page_json_bytes else "json"
+        query = {"offset": offset, "limit": limit, "expand": expand, "response_format": response_format,
+                 "shape": payload.format, **query_kwargs}
+        page = await crud_instance.coalesce_get_all(query, _load_page)
+        return RawSuccess(page, response_format) if page_json_bytes else page
 
-    async def _update_handler(payload: dict, db: AsyncSession, redis: AsyncRedis):
-        entity_id, update_data = payload.get("id"), payload.get("update_data")
-        if not entity_id: raise MissingFieldException(name="id")
-        if not update_data: raise MissingFieldException(name="update_data")
+    async def _create_handler(payload: BaseModel, db: AsyncSession, cache: CacheBackend):
+        # payload 已经是 schemas.Create 的实例 (请求体解析时校验)
+        new_orm = await crud_instance.create(db=db, object=payload)
+        return schemas.Read.model_validate(new_orm)
 
-        try:
-            update_schema = schemas.Update.model_validate(update_data)
-        except Exception as e:
-            raise AppException(ErrorCode.VALIDATION_ERROR, detail=str(e))
+    async def _update_handler(payload: UpdatePayload, db: AsyncSession, cache: CacheBackend):
+        entity_id, update_schema = payload.id, payload.update_data
+        if not update_schema.model_fields_set: raise MissingFieldException(name="update_data")
 
         updated_orm = await crud_instance.update(db=db, object=update_schema, **{primary_key_name: entity_id})
         return schemas.Read.model_validate(updated_orm)
 
-    async def _delete_handler(payload: dict, db: AsyncSession, redis: AsyncRedis):
-        entity_id = payload.get("id")
-        if not entity_id: raise MissingFieldException(name="id")
+    async def _delete_handler(payload: DeletePayload, db: AsyncSession, cache: CacheBackend):
+        entity_id = payload.id
 
-        # (关键改进 3) 添加“先检查再删除”的逻辑，确保对不存在的资源返回 404
-        to_delete = await crud_instance.get(db=db, **{primary_key_name: entity_id})
-        if not to_delete:
-            raise ResourceNotFoundException(detail=f"ID为 {entity_id} 的 {entity_name} 未找到，无法删除。")
+        # (关键改进 3) 不存在的资源由 LoggingFastCRUD.delete 根据受影响行数抛出 404，无需先查询一次；
+        # 这里换成路由器自己的提示文案
+        try:
+            await crud_instance.delete(db=db, **{primary_key_name: entity_id})
+        except ResourceNotFoundException:
+            raise ResourceNotFoundException(detail=messages.delete_not_found.format(id=entity_id))
+        return {"message": messages.deleted.format(id=entity_id)}
 
-        await crud_instance.delete(db=db, **{primary_key_name: entity_id})
-        return {"message": f"成功删除 ID 为 {entity_id} 的 {entity_name}。"}
+    async def _changes_since_handler(payload: ChangesSincePayload, db: AsyncSession, cache: CacheBackend):
+        # 增量同步: 游标之后修改过的行和被删除的主键 (见 LoggingFastCRUD.changes_since)
+        return await crud_instance.changes_since(db=db, read_schema=schemas.Read, cursor=payload.cursor,
+                                                 limit=payload.limit)
 
     ACTION_HANDLERS: Dict[str, Callable] = {
-        ActionEnum.get_by_id.value: _get_by_id_handler,
-        ActionEnum.get_all.value: _get_all_handler,
-        ActionEnum.create.value: _create_handler,
-        ActionEnum.update.value: _update_handler,
-        ActionEnum.delete.value: _delete_handler,
+        "get_by_id": _get_by_id_handler,
+        "get_all": _get_all_handler,
+        "create": _create_handler,
+        "update": _update_handler,
+        "delete": _delete_handler,
     }
+    if "changes_since" in action_payloads:
+        ACTION_HANDLERS["changes_since"] = _changes_since_handler
     if custom_actions:
         ACTION_HANDLERS.update(custom_actions)
 
     @router.post("/actions", response_model=StandardResponse, summary=f"统一处理 {entity_name} 操作")
     async def handle_actions(request: ActionRequest, db: AsyncSession = Depends(get_db),
-                             redis: AsyncRedis = Depends(get_redis)):
-        handler = ACTION_HANDLERS.get(request.action.value)
-        if not handler:
-            raise AppException(ErrorCode.BAD_REQUEST, detail=f"不支持的操作: '{request.action.value}'")
-
-        result = await handler(payload=request.payload, db=db, redis=redis)
+                             cache: CacheBackend = Depends(get_cache)):
+        # 不支持的 action 和不合法的 payload 在请求体校验阶段就被拒绝 (见 validation_exception_handler)
+        handler = ACTION_HANDLERS[request.action]
+        action_var.set(request.action)
+        try:
+            result = await handler(payload=request.payload, db=db, cache=cache)
+        except AppException:
+            # 业务异常交给全局异常处理器格式化
+            raise
+        except Exception as e:
+            logger.error(f"在操作 '{request.action}' 中发生未处理的服务器错误: {e}", exc_info=True)
+            raise AppException(ErrorCode.UNEXPECTED_ERROR) from e
+        if isinstance(result, Response):
+            return result  # 已经序列化好的响应 (例如 get_all 的 JSON 字节)
 
         paginated_actions = ["get_all"]
         if custom_actions:
             paginated_actions.extend(custom_actions.keys())
 
-        if request.action.value in paginated_actions:
+        if request.action in paginated_actions:
             if result and isinstance(result, dict) and "data" in result and "meta" in result:
-                return Success(data=result.get("data"), meta=result.get("meta"))
+                return Negotiated(Success(data=result.get("data"), meta=result.get("meta")))
+
+        return Negotiated(Success(data=result))
+
+    pk_type = inspect(crud_instance.model).primary_key[0].type.python_type
 
-        return Success(data=result)
+    @router.get("/{entity_id}", response_model=StandardResponse, summary=f"读取单个 {entity_name} (支持 ETag)",
+                responses={304: {"description": "实体未变化 (If-None-Match 命中)"}})
+    async def get_entity(entity_id: pk_type, request: Request, db: AsyncSession = Depends(get_db),
+                         cache: CacheBackend = Depends(get_cache)):
+        """
+        幂等的 GET 读取，与 get_by_id action 共用缓存条目。ETag 是缓存载荷的哈希，
+        If-None-Match 命中时返回 304，不解析也不序列化载荷；Cache-Control 的 max-age 取自路由器的缓存 TTL。
+        """
+        action_var.set("get")
+        payload = await crud_instance.load_cached_payload(db, cache, entity_id, schemas.Read, cache_ttl_seconds)
+        if payload is None:
+            raise ResourceNotFoundException(detail=messages.not_found.format(id=entity_id))
+        return ConditionalSuccess(request, payload_etag(payload), lambda: cache_codec.to_json(schemas.Read, payload),
+                                  max_age=crud_instance.cache_ttl(cache_ttl_seconds))
 
     return router
\ No newline at end of file
@@ -14,7 +14,70 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_PASSWORD: Optional[str] = None
     REDIS_DB: int = 0
+    # --- Redis 连接池 ---
+    REDIS_MAX_CONNECTIONS: int = 50  # 每个连接池的最大连接数
+    REDIS_BLOCKING_POOL: bool = True  # 连接用完时等待空闲连接，而不是报错
+    REDIS_POOL_TIMEOUT: float = 2.0  # 阻塞池等待空闲连接的最长时间 (秒)
+    REDIS_SOCKET_TIMEOUT: float = 1.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 1.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # 连接空闲超过该秒数后，使用前先 PING
+    # --- 缓存后端: redis / memory (进程内) / null (不缓存) ---
+    CACHE_BACKEND: str = "redis"
+    CACHE_MEMORY_MAX_ENTRIES: int = 10000
+    # --- 缓存载荷编码: json / msgpack，可选 zstd / lz4 压缩 (超过阈值字节才压缩) ---
+    CACHE_CODEC: str = "json"
+    CACHE_COMPRESSION: str = "none"
+    CACHE_COMPRESSION_THRESHOLD: int = 1024
+    # --- 自适应缓存 TTL: 根据每个模型的读写比例在 [MIN, MAX] 之间调整，写占比过高时不缓存 ---
+    # 默认关闭 (使用各路由的 cache_ttl_seconds)；开启后 TTL 可能超过路由的默认值，也可能为 0 (不缓存)
+    CACHE_ADAPTIVE_TTL: bool = False
+    CACHE_TTL_MIN_SECONDS: int = 30
+    CACHE_TTL_MAX_SECONDS: int = 3600
+    CACHE_TTL_NO_CACHE_WRITE_RATIO: float = 0.5
+    CACHE_TTL_HALF_LIFE_SECONDS: float = 300  # 读写计数的半衰期
+    CACHE_TTL_BOUNDS: dict[str, list[int]] = {}  # 每个模型单独的 [min, max]，例如 {"Items": [60, 3600]}
+    # --- 缓存预热: 启动时把热点 ID (以及旧版本键空间中的 ID) 写入缓存，再开始接收流量 ---
+    CACHE_WARM_ON_STARTUP: bool = True
+    CACHE_WARM_MAX_KEYS: int = 1000  # 每个实体
+    CACHE_WARM_CONCURRENCY: int = 4  # 同时执行的批次数
+    # --- 热点键统计 (get_by_id)，定期持久化供下次启动预热 ---
+    HOT_KEYS_CAPACITY: int = 1000  # 每个模型跟踪的键数
+    HOT_KEYS_FILE: str = "./hot_keys.json"
+    HOT_KEYS_PERSIST_INTERVAL_SECONDS: float = 60
+    # --- get_by_id 未命中的批量加载 (按模型名开启)，窗口内的请求合并为一条 IN 查询 ---
+    BATCH_LOADER_MODELS: list[str] = []
+    BATCH_LOADER_WINDOW_MS: float = 2
+    BATCH_LOADER_MAX_BATCH: int = 100
+    # --- get_all 的请求合并: 完全相同的并发列表查询共享一次执行；micro-TTL 内继续复用结果 (0 表示只合并在途请求) ---
+    GET_ALL_COALESCE_MICRO_TTL_MS: float = 0
+    # --- get_all 的分页查询和 COUNT 在两个连接上并发执行 (连接池紧张时自动退回顺序执行) ---
+    GET_ALL_CONCURRENT_COUNT: bool = True
+    # --- 列表读取使用 Core 行模式 (不创建 ORM 实例)，见 LoggingFastCRUD.get_multi_rows ---
+    CORE_ROW_READS: bool = True
+    # --- 增量同步 (changes_since): 只返回早于当前时间 SAFETY_LAG 的变化，给并发事务留出提交时间 ---
+    SYNC_SAFETY_LAG_SECONDS: float = 2
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30  # 超过保留期的游标需要重新全量同步
+    SYNC_TOMBSTONE_PRUNE_INTERVAL_SECONDS: float = 3600
+    # --- 响应压缩: 按 Accept-Encoding 协商 (服务端偏好顺序，br/zstd 需要安装 brotli/zstandard) ---
+    RESPONSE_COMPRESSION: bool = True
+    RESPONSE_COMPRESSION_ENCODINGS: list[str] = ["zstd", "br", "gzip"]
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024  # 小于该字节数的响应不压缩
+    RESPONSE_COMPRESSION_LEVELS: dict[str, int] = {"gzip": 6, "br": 4, "zstd": 3}
+    RESPONSE_COMPRESSION_OFFLOAD_SIZE: int = 256 * 1024  # 超过该字节数的响应体在线程池中压缩
+    # --- 缓存熔断器 ---
+    CACHE_BREAKER_FAILURE_THRESHOLD: int = 5  # 连续失败多少次后打开熔断器
+    CACHE_BREAKER_PROBE_INTERVAL_SECONDS: float = 5  # 熔断期间的恢复探测间隔
     LOG_CLEANUP_INTERVAL_MINUTES: int = 2
+    # --- 全文搜索 ---
+    # 没有原生全文索引时，进程内倒排索引的全量重建间隔 (秒)，用于吸收其他进程的写入
+    SEARCH_FALLBACK_REBUILD_SECONDS: int = 300
+    # --- 运维接口 (/admin) ---
+    # 请求需在 X-Admin-Token 头中携带该令牌；未配置时运维接口整体关闭
+    ADMIN_API_TOKEN: Optional[str] = None
+    # --- 慢查询日志 ---
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    SLOW_QUERY_EXPLAIN: bool = False  # 是否在后台为慢 SELECT 采集 EXPLAIN
+    SLOW_QUERY_TOP_N: int = 50
 
     class Config:
         env_file = ".env"
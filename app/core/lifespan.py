@@ -7,8 +7,15 @@ from typing import Union
 from pathlib import Path
 
 from app.core.logging_config import LOG_DIR
-from app.db.cache import init_redis_pool, close_redis_pool
-from app.db.session import engine
+from app.db import cache
+from app.db.cache import init_cache_backend, close_cache_backend, run_cache_recovery_probe
+from app.db.cache_versioning import register_cache_versions, warm_cache
+from app.db.hot_keys import hot_key_tracker, run_hot_key_persister
+from app.db.fulltext import ensure_fulltext_indexes
+from app.db.delta_sync import ensure_sync_columns, run_tombstone_pruner
+from app.db.session import engine, SessionLocal
+from app.db.instrumentation import install_query_instrumentation, run_explain_worker
+from app.core.config import settings
 from app.models import Base
 
 logger = logging.getLogger(__name__)
@@ -18,6 +25,10 @@ async def create_db_and_tables():
     """在应用启动时异步创建所有数据库表。"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # 为已存在的表补建全文索引 (新建的表会在 create_all 中通过 DDL 事件自动建立)
+        await conn.run_sync(ensure_fulltext_indexes)
+        # 为已存在的表补建增量同步使用的 updated_at 列
+        await conn.run_sync(ensure_sync_columns, Base.metadata)
     logger.info("数据库表已检查/创建。")
 
 
@@ -25,7 +36,7 @@ async def create_db_and_tables():
 async def cleanup_logs(log_dir: Union[Path, str]):
     """明确地清理所有目标日志文件。"""
     LOG_DIR = Path(log_dir)
-    log_filenames = ["info.log", "error.log", "api_traffic.log"]
+    log_filenames = ["info.log", "error.log", "api_traffic.log", "slow_query.log"]
     log_files = [LOG_DIR / filename for filename in log_filenames]
     # ... (函数其余部分不变)
     target_files_str = ", ".join(log_filenames)
@@ -68,22 +79,36 @@ async def lifespan(app: FastAPI):
         return
 
     logger.info("应用启动中...")
+    install_query_instrumentation(engine)
     await create_db_and_tables()
-    try:
-        await init_redis_pool()
-    except Exception as e:
-        logger.critical(f"致命错误: 初始化 Redis 失败。错误: {e}")
-        raise RuntimeError("连接到必要的服务失败: Redis") from e
+    # 缓存后端不可用时以降级模式启动 (熔断器打开)，由恢复探测任务重连
+    await init_cache_backend()
+    await register_cache_versions(cache.cache_backend)
+    hot_key_tracker.load()
+    if settings.CACHE_WARM_ON_STARTUP and not cache.cache_backend.is_open:
+        # 在报告就绪之前完成预热，避免重启后冷缓存造成的延迟尖峰
+        await warm_cache(cache.cache_backend, SessionLocal, max_keys=settings.CACHE_WARM_MAX_KEYS,
+                         concurrency=settings.CACHE_WARM_CONCURRENCY)
 
     logger.info("正在启动后台任务...")
     cleanup_task = asyncio.create_task(scheduled_log_cleanup(LOG_DIR,1))
+    explain_task = asyncio.create_task(run_explain_worker(engine)) if settings.SLOW_QUERY_EXPLAIN else None
+    cache_probe_task = asyncio.create_task(run_cache_recovery_probe())
+    hot_keys_task = asyncio.create_task(run_hot_key_persister(settings.HOT_KEYS_PERSIST_INTERVAL_SECONDS))
+    tombstone_task = asyncio.create_task(run_tombstone_pruner(
+        SessionLocal, settings.SYNC_TOMBSTONE_RETENTION_DAYS, settings.SYNC_TOMBSTONE_PRUNE_INTERVAL_SECONDS))
 
     yield
 
     logger.info("应用关闭中...")
     logger.info("正在停止后台任务。")
     cleanup_task.cancel()
-    await close_redis_pool()
+    if explain_task:
+        explain_task.cancel()
+    cache_probe_task.cancel()
+    hot_keys_task.cancel()
+    tombstone_task.cancel()
+    await close_cache_backend()
     try:
         await cleanup_task
     except asyncio.CancelledError:
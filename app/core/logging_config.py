@@ -7,6 +7,8 @@ from typing import Union
 # Context Variables 保持不变
 request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
 user_id_var: ContextVar[str | None] = ContextVar("user_id", default="anonymous")
+# (新增) 当前请求正在执行的 action，例如 "get_by_id"，用于给 SQL 统计打标签
+action_var: ContextVar[str | None] = ContextVar("action", default=None)
 
 # --- (关键) 将 LOG_DIR 的定义和计算放在这里，作为单一事实来源 ---
 # __file__ 是当前文件 (logging_config.py) 的路径
@@ -32,6 +34,7 @@ class LevelFilter(logging.Filter):
 
 LOGGERS_TO_SETUP = [
     {"name": "api_traffic", "level": logging.INFO, "filename": "api_traffic.log"},
+    {"name": "slow_query", "level": logging.WARNING, "filename": "slow_query.log"},
 ]
 
 
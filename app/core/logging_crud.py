@@ -1,15 +1,28 @@
+import asyncio
 import logging
-import redis.asyncio as aioredis
+from datetime import datetime, timedelta, timezone
+from app.core.config import settings
 from app.db import cache
+from app.db.adaptive_ttl import adaptive_ttl
+from app.db.batch_loader import BatchLoader
+from app.db.codec import cache_codec
+from app.db.delta_sync import SyncCursor, decode_sync_cursor, encode_sync_cursor, tracks_changes
+from app.db.cache_versioning import KnownVersions, register_cached_entity, schema_version
+from app.db.hot_keys import hot_key_tracker
+from app.db.query_coalescer import QueryCoalescer, make_query_key
+from app.db.session import has_spare_connections
 from fastcrud import FastCRUD
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Any, TypeVar
-from pydantic import BaseModel
+from typing import Any, Awaitable, Callable, TypeVar
+from pydantic import BaseModel, TypeAdapter
 
 # --- (关键修复 1) 导入 SQLAlchemy 的 inspect 功能 ---
-from sqlalchemy import inspect
+from sqlalchemy import and_, inspect, or_, select, update as sql_update, delete as sql_delete
+from sqlalchemy.orm import selectinload, noload
 from sqlalchemy.exc import IntegrityError, NoResultFound
-from app.exceptions.exceptions import ResourceNotFoundException,DuplicateResourceException
+from app.exceptions.exceptions import AppException, ResourceNotFoundException,DuplicateResourceException
+from app.exceptions.error_codes import ErrorCode
+from app.models import Tombstone
 
 # --- 泛型类型定义 ---
 ModelType = TypeVar("ModelType")
@@ -31,6 +44,12 @@ class LoggingFastCRUD(
     Create, Update, 和 Delete 操作添加详细的日志记录和缓存失效。
     """
 
+    # (新增) prefix 过滤: 自动转义 % 和 _，保证前缀查询只能命中 LIKE 'xxx%' 的索引范围扫描
+    _SUPPORTED_FILTERS = {
+        **FastCRUD._SUPPORTED_FILTERS,
+        "prefix": lambda column: lambda value: column.startswith(value, autoescape=True),
+    }
+
     def __init__(self, model: ModelType):
         # 首先，调用父类的构造方法，以运行它可能有的任何基础设置
         super().__init__(model)
@@ -39,15 +58,212 @@ class LoggingFastCRUD(
         # 无论父类做了什么，我们都用 SQLAlchemy 的官方方法来确保 _primary_keys 属性被正确设置。
         # 这使得我们的代码不再受 fastcrud 库内部实现变化的影响。
         self._primary_keys = inspect(model).primary_key
+        # (新增) 写操作成功后按主键通知的回调，见 add_write_listener
+        self._write_listeners: list[Callable[[Any], None]] = []
+        # (新增) 缓存键中的 Read 模型版本，由 enable_versioned_cache 设置
+        self.cache_version: str | None = None
+        self.expanded_cache_version: str | None = None
+        self.known_cache_versions: KnownVersions | None = None
+        self._foreign_key_targets: dict[str, str] | None = None
+        # (新增) Core 行读取模式: 每个读取模型对应的列和批量校验器，见 get_multi_rows
+        self._read_columns_cache: dict[type[BaseModel], list | None] = {}
+        self._list_adapters: dict[type[BaseModel], TypeAdapter] = {}
+        # (新增) 可选的主键批量加载器，见 enable_batch_loading
+        self.batch_loader: BatchLoader | None = None
+        if model.__name__ in settings.BATCH_LOADER_MODELS:
+            self.enable_batch_loading()
+        # (新增) 可选的 get_all 请求合并器，见 enable_get_all_coalescing
+        self.get_all_coalescer: QueryCoalescer | None = None
+        # (新增) 带 updated_at 列的模型支持增量同步: 删除时写入墓碑，见 changes_since
+        self.tracks_changes = tracks_changes(model)
+
+    def enable_batch_loading(self, window_ms: float | None = None, max_batch: int | None = None):
+        """
+        (新增) 开启 get_by_pk 的批量加载: 同一窗口内并发的主键查询合并为一条 IN 查询。
+        也可以通过 settings.BATCH_LOADER_MODELS 按模型名开启。
+        """
+        self.batch_loader = BatchLoader(
+            self.model,
+            window_ms=settings.BATCH_LOADER_WINDOW_MS if window_ms is None else window_ms,
+            max_batch=max_batch or settings.BATCH_LOADER_MAX_BATCH,
+        )
+
+    async def get_by_pk(self, db: AsyncSession, pk_value: Any) -> dict | None:
+        """
+        (新增) 按主键读取一行 (字典)。开启批量加载时经由 BatchLoader，否则等同于 get。
+        """
+        if self.batch_loader is not None:
+            try:
+                return await self.batch_loader.load(db, pk_value)
+            except (TypeError, ValueError):
+                pass  # 主键无法转换类型，交给 get 按原值查询
+        return await self.get(db=db, **{self._primary_keys[0].key: pk_value})
+
+    def add_write_listener(self, listener: Callable[[Any], None]):
+        """
+        (新增) 登记一个回调，create/update/delete 成功后以实体的主键调用 (例如让进程内的搜索索引刷新该条目)。
+        """
+        self._write_listeners.append(listener)
+
+    def _notify_write(self, pk_value: Any):
+        for listener in self._write_listeners:
+            listener(pk_value)
+
+    def enable_get_all_coalescing(self, micro_ttl_ms: float | None = None):
+        """
+        (新增) 开启 get_all 的请求合并: 完全相同的并发列表查询共享一次 get_multi + COUNT 和同一个结果。
+        micro_ttl_ms 默认取 settings.GET_ALL_COALESCE_MICRO_TTL_MS。create/update/delete 会让合并器失效。
+        """
+        self.get_all_coalescer = QueryCoalescer(
+            micro_ttl_ms=settings.GET_ALL_COALESCE_MICRO_TTL_MS if micro_ttl_ms is None else micro_ttl_ms)
+
+    async def coalesce_get_all(self, query: dict, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        (新增) 以规范化后的查询参数 (offset/limit/过滤/排序/展开) 为键执行 loader；未开启合并时直接执行。
+        """
+        if self.get_all_coalescer is None:
+            return await loader()
+        return await self.get_all_coalescer.run(make_query_key(query), loader)
+
+    async def load_cached_payload(self, db: AsyncSession, backend: "cache.CacheBackend", pk_value: Any,
+                                  read_schema: type[BaseModel], default_ttl: int) -> bytes | None:
+        """
+        (新增) 返回实体在缓存中的载荷 (编码后的字节)，不解码。未命中时从数据库读取、编码并写入缓存；
+        实体不存在时返回 None。GET 路由用载荷的哈希作为 ETag。
+        """
+        cache_key = self._get_cache_key(pk_value)
+        self.record_cache_read(pk_value)
+        try:
+            if cached_data := await backend.get(cache_key):
+                return cached_data if isinstance(cached_data, bytes) else cached_data.encode("utf-8")
+        except Exception as e:
+            user_activity_logger.error(f"缓存错误: 读取键 {cache_key} 失败. 错误: {e}", exc_info=True)
+
+        db_entity = await self.get_by_pk(db, pk_value)
+        if not db_entity:
+            return None
+        payload = cache_codec.encode_model(read_schema.model_validate(db_entity))
+        if ttl := self.cache_ttl(default_ttl):
+            try:
+                await backend.set(cache_key, payload, ttl=ttl)
+            except Exception as e:
+                user_activity_logger.error(f"缓存错误: 写入键 {cache_key} 失败. 错误: {e}", exc_info=True)
+        return payload
+
+    def enable_versioned_cache(self, read_schema: type[BaseModel], ttl_seconds: int = 300,
+                               expanded_schema: type[BaseModel] | None = None):
+        """
+        (新增) 在缓存键中加入 Read 模型的版本哈希。在创建路由时调用一次。
+        Read 模型变化后新旧版本的键共存，部署时不必清空缓存，也不会读到旧形状的数据。
+        提供 expanded_schema 时，展开关联关系后的读取结果也会以它的版本哈希缓存。
+        """
+        self.cache_version = schema_version(read_schema)
+        if expanded_schema is not None:
+            self.expanded_cache_version = schema_version(expanded_schema)
+        self.known_cache_versions = KnownVersions(self._get_model_name(), self.cache_version)
+        register_cached_entity(self, read_schema, ttl_seconds)
 
     def _get_model_name(self) -> str:
         """获取模型类的名称 (例如："Items", "Product")"""
         return self.model.__name__
 
-    def _get_cache_key(self, id: Any) -> str:
-        """为单个条目生成标准化的 Redis 缓存键。"""
+    def record_cache_read(self, id: Any):
+        """(新增) 记录一次 get_by_id 缓存查找，用于热点键统计和自适应 TTL。"""
+        model_name = self._get_model_name()
+        hot_key_tracker.record(model_name, id)
+        adaptive_ttl.record_read(model_name)
+
+    def cache_ttl(self, default_ttl: int) -> int:
+        """(新增) 当前应使用的缓存 TTL (秒)，由自适应策略根据读写比例决定；0 表示不缓存。"""
+        return adaptive_ttl.ttl_for(self._get_model_name(), default_ttl)
+
+    def _get_cache_key(self, id: Any, version: str | None = None) -> str:
+        """为单个条目生成标准化的缓存键。启用版本化缓存时格式为 "{Model}:v{version}:{id}"。"""
+        version = version or self.cache_version
+        if version:
+            return f"{self._get_model_name()}:v{version}:{id}"
         return f"{self._get_model_name()}:{id}"
 
+    def _get_expanded_cache_key(self, id: Any, relations: list[str]) -> str:
+        """展开了关联关系的读取结果的缓存键，例如 "Useritems:v1a2b3c4d:7:item+user"。"""
+        return f"{self._get_model_name()}:v{self.expanded_cache_version}:{id}:{'+'.join(sorted(relations))}"
+
+    @staticmethod
+    def cache_tag(model_name: str, id: Any) -> str:
+        """(新增) 缓存标签: 一个集合，保存所有依赖于该实体的缓存键。"""
+        return f"{cache.CACHE_TAG_PREFIX}{model_name}:{id}"
+
+    def _get_foreign_key_targets(self) -> dict[str, str]:
+        """从模型的外键推导出 {本模型的列属性名: 被引用的模型名}，例如 {"user_id": "Users"}。"""
+        if self._foreign_key_targets is None:
+            table_models = {mapper.local_table.name: mapper.class_.__name__ for mapper in self.model.registry.mappers}
+            column_attrs = {column.name: attr.key for attr in inspect(self.model).column_attrs for column in attr.columns}
+            self._foreign_key_targets = {
+                column_attrs[fk.parent.name]: table_models[fk.column.table.name]
+                for fk in self.model.__table__.foreign_keys
+                if fk.column.table.name in table_models and fk.parent.name in column_attrs
+            }
+        return self._foreign_key_targets
+
+    def get_cache_tags(self, entity: Any) -> list[str]:
+        """
+        (新增) 一个缓存条目依赖的标签: 实体自身，以及它的外键指向的每个实体。
+        其中任何一个实体被更新或删除时，该条目都会失效。
+        """
+        def _value(name: str):
+            return entity.get(name) if isinstance(entity, dict) else getattr(entity, name, None)
+
+        tags = [self.cache_tag(self._get_model_name(), _value(self._primary_keys[0].key))]
+        for attr_name, target_model in self._get_foreign_key_targets().items():
+            if (value := _value(attr_name)) is not None:
+                tags.append(self.cache_tag(target_model, value))
+        return tags
+
+    async def cache_set_tagged(self, backend: "cache.CacheBackend", key: str, value: Any, ttl: int,
+                               tags: list[str]):
+        """
+        (新增) 写入一个缓存条目，并在同一个 pipeline 中把它的键登记到每个标签集合里。
+        标签集合的过期时间不短于任何条目的 TTL，条目过期后残留在集合中的键在失效时会被一并删除，不影响正确性。
+        """
+        tag_ttl = max(ttl, settings.CACHE_TTL_MAX_SECONDS)
+        pipe = backend.pipeline().set(key, value, ttl=ttl)
+        for tag in tags:
+            pipe.sadd(tag, key).expire(tag, tag_ttl)
+        await pipe.execute()
+
+    def _invalidate_list_results(self):
+        """写操作之后，合并器中复用的 get_all 结果不再有效。"""
+        if self.get_all_coalescer is not None:
+            self.get_all_coalescer.invalidate()
+
+    async def _invalidate_cache(self, pk_value: Any):
+        """
+        通过全局缓存后端删除单个条目的缓存，失败只记录日志，不影响写操作。
+        启用版本化缓存时，同时删除所有已登记版本以及不带版本的旧格式键 (滚动发布期间新旧进程共存)，
+        以及该实体标签集合中的所有键。
+        """
+        adaptive_ttl.record_write(self._get_model_name())
+        self._invalidate_list_results()
+        backend = cache.cache_backend
+        if backend is None:
+            user_activity_logger.warning("缓存: 缓存后端未初始化，跳过失效操作。")
+            return
+        cache_keys = [self._get_cache_key(pk_value)]
+        try:
+            if self.known_cache_versions:
+                versions = await self.known_cache_versions.get(backend)
+                cache_keys = [self._get_cache_key(pk_value, version) for version in sorted(versions)]
+                # 不带版本的旧格式键，供尚未升级的进程读取
+                cache_keys.append(f"{self._get_model_name()}:{pk_value}")
+            # 依赖该实体的缓存条目 (例如展开了它的 Useritems) 登记在它的标签集合中，与标签本身一起删除
+            tag = self.cache_tag(self._get_model_name(), pk_value)
+            cache_keys += sorted(await backend.smembers(tag)) + [tag]
+            await backend.delete(*cache_keys)
+            user_activity_logger.info(f"缓存: 已使键失效 (删除): {', '.join(cache_keys)}")
+        except Exception as e:
+            user_activity_logger.error(f"缓存错误: 使键 {cache_keys} 失效失败. 错误: {e}",
+                                       exc_info=True)
+
     def _get_primary_key_info(self, kwargs: dict) -> tuple[str, Any]:
         """一个辅助函数，用于从 kwargs 中提取主键名和值。"""
         # 现在这行代码可以安全地执行了
@@ -57,6 +273,314 @@ class LoggingFastCRUD(
             raise ValueError(f"主键 '{pk_name}' 未在参数中找到。")
         return pk_name, pk_value
 
+    def _get_relation_loaders(self, relations: list[str]) -> list:
+        """
+        为每个需要展开的关联关系生成一个 selectinload 选项 (每个关系一条额外的 IN 查询)。
+        未请求的关联关系使用 noload，避免在异步会话中触发隐式的懒加载。
+        """
+        model_relations = inspect(self.model).relationships
+        for name in relations:
+            if name not in model_relations:
+                raise ValueError(f"模型 '{self._get_model_name()}' 上不存在关联关系 '{name}'。")
+        return [
+            selectinload(getattr(self.model, name)) if name in relations else noload(getattr(self.model, name))
+            for name in model_relations.keys()
+        ]
+
+    async def get_with_relations(
+            self,
+            db: AsyncSession,
+            relations: list[str],
+            **kwargs: Any
+    ) -> ModelType | None:
+        """
+        读取单个 ORM 实体，并预加载指定的关联关系。
+        与 FastCRUD.get 返回 dict 不同，这里返回 ORM 对象，以便访问已加载的关联属性。
+        """
+        stmt = (
+            select(self.model)
+            .filter(*self._parse_filters(**kwargs))
+            .options(*self._get_relation_loaders(relations))
+        )
+        result = await db.execute(stmt)
+        return result.scalars().first()
+
+    async def get_multi_with_relations(
+            self,
+            db: AsyncSession,
+            relations: list[str],
+            offset: int = 0,
+            limit: int = 100,
+            sort_columns: list[str] | None = None,
+            sort_orders: list[str] | None = None,
+            **kwargs: Any
+    ) -> dict:
+        """get_multi 的关联展开版本，返回结构与 get_multi 相同: {"data": [...], "total_count": int}。"""
+        stmt = (
+            select(self.model)
+            .filter(*self._parse_filters(**kwargs))
+            .options(*self._get_relation_loaders(relations))
+        )
+        if sort_columns:
+            stmt = self._apply_sorting(stmt, sort_columns, sort_orders)
+        stmt = stmt.offset(offset).limit(limit)
+        result, total_count = await self._execute_page_and_count(db, stmt, **kwargs)
+        return {"data": list(result.scalars().all()), "total_count": total_count}
+
+    def _read_columns(self, read_schema: type[BaseModel]) -> list | None:
+        """
+        读取模型的每个字段对应的表列 (按属性名加标签)。
+        有字段不是本表的列 (例如关联关系或计算字段) 时返回 None，调用方应使用 ORM 读取。
+        """
+        if read_schema not in self._read_columns_cache:
+            column_attrs = {attr.key: attr.columns[0] for attr in inspect(self.model).column_attrs}
+            columns = []
+            for field_name in read_schema.model_fields:
+                column = column_attrs.get(field_name)
+                if column is None:
+                    columns = None
+                    break
+                columns.append(column if column.name == field_name else column.label(field_name))
+            self._read_columns_cache[read_schema] = columns
+        return self._read_columns_cache[read_schema]
+
+    def _list_adapter(self, read_schema: type[BaseModel]) -> TypeAdapter:
+        adapter = self._list_adapters.get(read_schema)
+        if adapter is None:
+            adapter = self._list_adapters[read_schema] = TypeAdapter(list[read_schema])
+        return adapter
+
+    async def get_multi_rows(
+            self,
+            db: AsyncSession,
+            read_schema: type[BaseModel],
+            offset: int = 0,
+            limit: int = 100,
+            sort_columns: str | list[str] | None = None,
+            sort_orders: str | list[str] | None = None,
+            as_dicts: bool = False,
+            **kwargs: Any
+    ) -> dict:
+        """
+        (新增) 列表读取的 Core 行模式，返回 {"data": [read_schema 实例或字典], "total_count": int}。
+        只 SELECT 读取模型需要的表列 (纯 Core 语句，不经过 ORM 的编译、实体加载和身份映射)，
+        行元组直接组装成字典，再由 TypeAdapter(list[read_schema]) 一次性校验成模型；as_dicts=True 时跳过校验。
+        读取模型包含非列字段或 settings.CORE_ROW_READS 关闭时，退回到 get_multi + model_validate。
+        """
+        columns = self._read_columns(read_schema) if settings.CORE_ROW_READS else None
+        if columns is None:
+            response = await self.get_multi(db=db, offset=offset, limit=limit, sort_columns=sort_columns,
+                                            sort_orders=sort_orders, **kwargs)
+            rows = response[self.multi_response_key]
+            data = rows if as_dicts else [read_schema.model_validate(row) for row in rows]
+            return {"data": data, "total_count": response["total_count"]}
+        if (limit is not None and limit < 0) or offset < 0:
+            raise ValueError("Limit and offset must be non-negative.")
+
+        stmt = select(*columns).where(*self._parse_filters(**kwargs))
+        if sort_columns:
+            stmt = self._apply_sorting(stmt, sort_columns, sort_orders)
+        if offset:
+            stmt = stmt.offset(offset)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result, total_count = await self._execute_page_and_count(db, stmt, **kwargs)
+        names = list(result.keys())
+        rows = [dict(zip(names, row)) for row in result.all()]
+        data = rows if as_dicts else self._list_adapter(read_schema).validate_python(rows)
+        return {"data": data, "total_count": total_count}
+
+    async def get_multi(
+            self,
+            db: AsyncSession,
+            offset: int = 0,
+            limit: int | None = 100,
+            schema_to_select: type[BaseModel] | None = None,
+            sort_columns: str | list[str] | None = None,
+            sort_orders: str | list[str] | None = None,
+            return_as_model: bool = False,
+            return_total_count: bool = True,
+            **kwargs: Any
+    ) -> dict:
+        """
+        (重写) 与 FastCRUD.get_multi 相同，但分页查询和 COUNT 通过 _execute_page_and_count 并发执行。
+        不需要总数或需要返回模型实例时直接交给 FastCRUD。
+        """
+        if not return_total_count or return_as_model:
+            return await super().get_multi(
+                db, offset, limit, schema_to_select, sort_columns, sort_orders,
+                return_as_model, return_total_count, **kwargs)
+        if (limit is not None and limit < 0) or offset < 0:
+            raise ValueError("Limit and offset must be non-negative.")
+
+        stmt = await self.select(schema_to_select=schema_to_select, sort_columns=sort_columns,
+                                 sort_orders=sort_orders, **kwargs)
+        if offset:
+            stmt = stmt.offset(offset)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result, total_count = await self._execute_page_and_count(db, stmt, **kwargs)
+        return {self.multi_response_key: [dict(row) for row in result.mappings()], "total_count": total_count}
+
+    async def _execute_page_and_count(self, db: AsyncSession, page_stmt: Any, **kwargs: Any) -> tuple[Any, int]:
+        """
+        (新增) 执行分页查询和 COUNT。连接池还有空闲连接时，COUNT 在一个独立的会话 (另一个连接) 上与分页查询
+        用 asyncio.gather 同时执行，列表延迟接近两者中较慢的一个而不是两者之和；
+        连接池紧张、不是 QueuePool 或通过 settings.GET_ALL_CONCURRENT_COUNT 关闭时，在同一个会话上顺序执行。
+        两条查询分属不同的事务，并发写入时总数与当前页可能有细微出入 (与分页本身的语义一致)。
+        """
+        if not settings.GET_ALL_CONCURRENT_COUNT or not has_spare_connections(db.bind):
+            result = await db.execute(page_stmt)
+            return result, await self.count(db=db, **kwargs)
+
+        async def _count() -> int:
+            count_session = AsyncSession(bind=db.bind)
+            try:
+                return await self.count(db=count_session, **kwargs)
+            finally:
+                # shield: 请求在关闭过程中再次被取消时，也要把连接还给连接池
+                await asyncio.shield(count_session.close())
+
+        page_task = asyncio.ensure_future(db.execute(page_stmt))
+        count_task = asyncio.ensure_future(_count())
+        try:
+            # return_exceptions: 一条查询失败时等另一条结束再抛出，避免会话被关闭时仍有查询在执行
+            result, total_count = await asyncio.gather(page_task, count_task, return_exceptions=True)
+        except asyncio.CancelledError:
+            # 请求被取消: 等两条查询都停下 (COUNT 的会话已关闭) 再向上抛出，之后调用方才会关闭 db
+            for task in (page_task, count_task):
+                task.cancel()
+            await asyncio.gather(page_task, count_task, return_exceptions=True)
+            raise
+        for outcome in (result, total_count):
+            if isinstance(outcome, BaseException):
+                raise outcome
+        return result, total_count
+
+    async def _update_by_pk(self, db: AsyncSession, object: UpdateSchemaType, pk_name: str, pk_value: Any) -> dict:
+        """
+        用一条 UPDATE 按主键更新，并通过 rowcount 判断记录是否存在 (FastCRUD.update 会先额外执行一次 COUNT)。
+        FastCRUD.update 默认返回 None，这里随后读取一次更新后的行并返回。
+        """
+        update_data = object.model_dump(exclude_unset=True)
+        if update_data:
+            if self.updated_at_column in self.model_col_names:
+                update_data[self.updated_at_column] = datetime.now(timezone.utc)
+            stmt = sql_update(self.model).where(self._primary_keys[0] == pk_value).values(update_data)
+            result = await db.execute(stmt)
+            if result.rowcount == 0:
+                await db.rollback()
+                raise NoResultFound("No record found to update.")
+            await db.commit()
+
+        updated_item = await self.get(db=db, **{pk_name: pk_value})
+        if updated_item is None:
+            raise NoResultFound("No record found to update.")
+        return updated_item
+
+    async def _delete_by_pk(self, db: AsyncSession, **kwargs: Any) -> None:
+        """
+        用一条 DELETE 删除记录，并通过 rowcount 判断记录是否存在 (FastCRUD.delete 会先额外执行一次 COUNT)。
+        带软删除列的模型仍交给 FastCRUD 处理。
+        """
+        if self.is_deleted_column in self.model_col_names or self.deleted_at_column in self.model_col_names:
+            await super().delete(db=db, **kwargs)
+            if self.tracks_changes:
+                self._add_tombstone(db, kwargs)
+                await db.commit()
+            return
+
+        result = await db.execute(sql_delete(self.model).where(*self._parse_filters(**kwargs)))
+        if result.rowcount == 0:
+            await db.rollback()
+            raise NoResultFound("No record found to delete.")
+        if self.tracks_changes:
+            # 墓碑与删除在同一个事务中提交
+            self._add_tombstone(db, kwargs)
+        await db.commit()
+
+    def _add_tombstone(self, db: AsyncSession, kwargs: dict):
+        _, pk_value = self._get_primary_key_info(kwargs)
+        db.add(Tombstone(entity=self._get_model_name(), entity_id=str(pk_value)))
+
+    async def changes_since(
+            self,
+            db: AsyncSession,
+            read_schema: type[BaseModel],
+            cursor: str | None = None,
+            limit: int = 500,
+    ) -> dict:
+        """
+        (新增) 增量同步: 返回游标之后修改过的行 (read_schema 实例) 和被删除的主键，以及下一次请求使用的游标。
+        - 修改的行按 (updated_at, 主键) 在 updated_at 索引上做 keyset 分页，墓碑按 (entity, deleted_at, id) 索引分页，
+          每次各自最多 limit 条；has_more 为 True 时客户端应立即用 next_cursor 继续请求。
+        - 只返回早于当前时间 SYNC_SAFETY_LAG_SECONDS 的变化，避免跳过时间戳较早但稍后才提交的事务。
+        - cursor 为空表示首次同步: 返回全部行，墓碑从此刻开始记录。
+        - 游标早于墓碑保留期时抛出 SYNC_CURSOR_EXPIRED (客户端需要重新全量同步)。
+        """
+        now = datetime.now(timezone.utc)
+        horizon = now - timedelta(seconds=settings.SYNC_SAFETY_LAG_SECONDS)
+        if cursor:
+            try:
+                position = decode_sync_cursor(cursor)
+            except ValueError as e:
+                raise AppException(ErrorCode.BAD_REQUEST, detail="无效的同步游标。") from e
+            oldest_allowed = now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+            deleted_at = position.deleted[0]
+            if (deleted_at if deleted_at.tzinfo else deleted_at.replace(tzinfo=timezone.utc)) < oldest_allowed:
+                raise AppException(ErrorCode.SYNC_CURSOR_EXPIRED)
+        else:
+            position = SyncCursor(changed=None, deleted=(horizon, 0))
+
+        updated_at = getattr(self.model, self.updated_at_column)
+        pk_column = self._primary_keys[0]
+        columns = self._read_columns(read_schema)
+        # 游标位置 (updated_at, 主键) 单独选出，不依赖读取模型是否包含这两个字段
+        position_columns = (updated_at.label("__updated_at"), pk_column.label("__pk"))
+        stmt = select(*columns, *position_columns) if columns is not None else select(self.model, *position_columns)
+        stmt = stmt.where(updated_at <= horizon)
+        if position.changed is not None:
+            last_updated_at, last_pk = position.changed
+            stmt = stmt.where(or_(updated_at > last_updated_at,
+                                  and_(updated_at == last_updated_at, pk_column > last_pk)))
+        result = await db.execute(stmt.order_by(updated_at, pk_column).limit(limit + 1))
+        rows = result.all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if columns is not None:
+            names = list(result.keys())[:-2]
+            changed = self._list_adapter(read_schema).validate_python([dict(zip(names, row[:-2])) for row in rows])
+        else:
+            changed = self._list_adapter(read_schema).validate_python([row[0] for row in rows], from_attributes=True)
+
+        last_deleted_at, last_tombstone_id = position.deleted
+        tombstones = (await db.execute(
+            select(Tombstone.id, Tombstone.entity_id, Tombstone.deleted_at)
+            .where(Tombstone.entity == self._get_model_name(), Tombstone.deleted_at <= horizon,
+                   or_(Tombstone.deleted_at > last_deleted_at,
+                       and_(Tombstone.deleted_at == last_deleted_at, Tombstone.id > last_tombstone_id)))
+            .order_by(Tombstone.deleted_at, Tombstone.id)
+            .limit(limit + 1)
+        )).all()
+        pk_type = pk_column.type.python_type
+
+        tombstones_exhausted = len(tombstones) <= limit
+        has_more = has_more or not tombstones_exhausted
+        tombstones = tombstones[:limit]
+        if rows:
+            position.changed = (rows[-1][-2], rows[-1][-1])
+        if not tombstones_exhausted:
+            position.deleted = (tombstones[-1].deleted_at, tombstones[-1].id)
+        else:
+            # 墓碑已读完: 位置推进到 horizon，没有删除的客户端的游标也不会因为超过保留期而过期
+            position.deleted = (horizon, tombstones[-1].id if tombstones else 0)
+        return {
+            "changed": changed,
+            "deleted": [pk_type(tombstone.entity_id) for tombstone in tombstones],
+            "next_cursor": encode_sync_cursor(position),
+            "has_more": has_more,
+        }
+
     async def create(
             self,
             db: AsyncSession,
@@ -72,6 +596,8 @@ class LoggingFastCRUD(
             pk_name = self._primary_keys[0].name
             new_id = getattr(new_item, pk_name, "UNKNOWN_ID")
             user_activity_logger.info(f"成功: 创建了 {model_name}，ID为: {new_id}。")
+            self._invalidate_list_results()
+            self._notify_write(new_id)
             return new_item
 
 
@@ -93,27 +619,18 @@ class LoggingFastCRUD(
             db: AsyncSession,
             object: UpdateSchemaType,
             **kwargs: Any
-    ) -> ModelType:
+    ) -> dict:
         model_name = self._get_model_name()
         log_data = "Data: " + object.model_dump_json(exclude_unset=True)
 
         try:
             pk_name, pk_value = self._get_primary_key_info(kwargs)
             user_activity_logger.info(f"尝试更新 {model_name} (条件: {pk_name}={pk_value}). {log_data}")
-            updated_item = await super().update(db=db, object=object, **kwargs)
+            updated_item = await self._update_by_pk(db, object, pk_name, pk_value)
             user_activity_logger.info(f"成功: 更新了 {model_name}，ID为: {pk_value}。")
+            self._notify_write(pk_value)
 
-            cache_key = self._get_cache_key(pk_value)
-            try:
-                if cache.redis_pool:
-                    async with aioredis.Redis(connection_pool=cache.redis_pool) as redis:
-                        await redis.delete(cache_key)
-                        user_activity_logger.info(f"缓存: 已使键失效 (删除): {cache_key}")
-                else:
-                    user_activity_logger.warning("缓存: Redis 连接池不可用，跳过失效操作。")
-            except Exception as e:
-                user_activity_logger.error(f"缓存错误: 使键 {cache_key} 失效失败. 错误: {e}",
-                                           exc_info=True)
+            await self._invalidate_cache(pk_value)
             return updated_item
         except NoResultFound:
             pk_name, pk_value = self._get_primary_key_info(kwargs)
@@ -139,20 +656,11 @@ class LoggingFastCRUD(
             pk_name, pk_value = self._get_primary_key_info(kwargs)
             user_activity_logger.info(f"尝试删除 {model_name} (条件: {pk_name}={pk_value}).")
 
-            await super().delete(db=db, **kwargs)
+            await self._delete_by_pk(db=db, **kwargs)
             user_activity_logger.info(f"成功: 删除了 {model_name}，ID为: {pk_value}。")
+            self._notify_write(pk_value)
 
-            cache_key = self._get_cache_key(pk_value)
-            try:
-                if cache.redis_pool:
-                    async with aioredis.Redis(connection_pool=cache.redis_pool) as redis:
-                        await redis.delete(cache_key)
-                        user_activity_logger.info(f"缓存: 已使键失效 (删除): {cache_key}")
-                else:
-                    user_activity_logger.warning("缓存: Redis 连接池不可用，跳过失效操作。")
-            except Exception as e:
-                user_activity_logger.error(f"缓存错误: 使键 {cache_key} 失效失败. 错误: {e}",
-                                           exc_info=True)
+            await self._invalidate_cache(pk_value)
         except NoResultFound:
             pk_name, pk_value = self._get_primary_key_info(kwargs)
             user_activity_logger.warning(
@@ -0,0 +1,126 @@
+import logging
+from enum import Enum
+from typing import Any, Literal, Type
+
+from pydantic import BaseModel, Field, model_validator
+from sqlalchemy import inspect, UniqueConstraint
+
+from app.exceptions.exceptions import AppException
+from app.exceptions.error_codes import ErrorCode
+
+logger = logging.getLogger(__name__)
+
+
+class FilterOp(str, Enum):
+    EQ = "eq"
+    IN = "in"
+    RANGE = "range"
+    PREFIX = "prefix"
+
+
+class RangeBounds(BaseModel):
+    """range 过滤的上下界，至少需要提供一个。"""
+    gt: Any = None
+    gte: Any = None
+    lt: Any = None
+    lte: Any = None
+
+
+class FilterCondition(BaseModel):
+    """
+    单个过滤条件，例如:
+    {"field": "level", "op": "range", "value": {"gte": 1, "lt": 10}}
+    """
+    field: str
+    op: FilterOp = FilterOp.EQ
+    value: Any = None
+
+    @model_validator(mode="after")
+    def _check_value(self):
+        if self.op == FilterOp.IN:
+            if not isinstance(self.value, list) or not self.value:
+                raise ValueError(f"字段 '{self.field}' 的 in 过滤需要一个非空列表。")
+        elif self.op == FilterOp.RANGE:
+            self.value = RangeBounds.model_validate(self.value or {})
+            if not self.value.model_dump(exclude_none=True):
+                raise ValueError(f"字段 '{self.field}' 的 range 过滤至少需要 gt/gte/lt/lte 之一。")
+        elif self.op == FilterOp.PREFIX:
+            if not isinstance(self.value, str) or not self.value:
+                raise ValueError(f"字段 '{self.field}' 的 prefix 过滤需要一个非空字符串。")
+        return self
+
+
+class SortField(BaseModel):
+    field: str
+    order: Literal["asc", "desc"] = "asc"
+
+
+class QueryOptions(BaseModel):
+    """get_all payload 中的 filters 和 sort 部分。"""
+    filters: list[FilterCondition] = Field(default_factory=list)
+    sort: list[SortField] = Field(default_factory=list)
+
+
+def get_indexed_columns(model: Type) -> set[str]:
+    """
+    返回可以利用索引的列名: 主键、唯一约束和普通索引的首列。
+    复合索引只有首列能单独用于过滤/排序，因此只取首列。
+    """
+    table = model.__table__
+    indexed = {col.name for col in table.primary_key.columns[:1]}
+    for index in table.indexes:
+        if index.columns:
+            indexed.add(list(index.columns)[0].name)
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint) and constraint.columns:
+            indexed.add(list(constraint.columns)[0].name)
+    indexed.update(col.name for col in table.columns if col.index or col.unique)
+    return indexed
+
+
+def build_query_kwargs(options: QueryOptions, model: Type, allow_unindexed: bool = False) -> dict:
+    """
+    校验已经解析好的 QueryOptions (例如类型化的 get_all payload)，并转换为可直接传给 get_multi 的关键字参数。
+    在没有索引的列上过滤或排序会导致全表扫描，默认拒绝；allow_unindexed=True 时仅记录警告。
+    """
+    columns = {col.key for col in inspect(model).columns}
+    indexed_columns = get_indexed_columns(model)
+    model_name = model.__name__
+
+    def _check_field(field: str, usage: str):
+        if field not in columns:
+            raise AppException(ErrorCode.VALIDATION_ERROR, detail=f"{model_name} 上不存在可{usage}的字段 '{field}'。")
+        if field not in indexed_columns:
+            if not allow_unindexed:
+                raise AppException(
+                    ErrorCode.VALIDATION_ERROR,
+                    detail=f"字段 '{field}' 没有索引，不允许用于{usage}。可用字段: {sorted(indexed_columns)}"
+                )
+            logger.warning(f"QUERY: 在 {model_name} 的无索引字段 '{field}' 上{usage}，可能导致全表扫描。")
+
+    query_kwargs: dict[str, Any] = {}
+
+    def _add(key: str, value: Any):
+        if key in query_kwargs:
+            raise AppException(ErrorCode.VALIDATION_ERROR, detail=f"重复的过滤条件: '{key}'。")
+        query_kwargs[key] = value
+
+    for condition in options.filters:
+        _check_field(condition.field, "过滤")
+        if condition.op == FilterOp.EQ:
+            _add(condition.field, condition.value)
+        elif condition.op == FilterOp.IN:
+            _add(f"{condition.field}__in", condition.value)
+        elif condition.op == FilterOp.PREFIX:
+            _add(f"{condition.field}__prefix", condition.value)
+        else:
+            for bound, value in condition.value.model_dump(exclude_none=True).items():
+                _add(f"{condition.field}__{bound}", value)
+
+    if options.sort:
+        for sort_field in options.sort:
+            _check_field(sort_field.field, "排序")
+        query_kwargs["sort_columns"] = [s.field for s in options.sort]
+        query_kwargs["sort_orders"] = [s.order for s in options.sort]
+
+    return query_kwargs
@@ -1,10 +1,61 @@
-from pydantic import BaseModel, Field
-from typing import TypeVar, Generic, Optional, Any
-from fastapi.responses import JSONResponse
+import hashlib
+import json
+from contextvars import ContextVar
+
+from pydantic import BaseModel, Field, TypeAdapter
+from pydantic_core import to_json
+from typing import TypeVar, Generic, Optional, Any, Type, Callable, get_args
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import msgpack
+except ImportError:  # 可选依赖: 未安装时只提供 JSON
+    msgpack = None
 
 # 使用 TypeVar 来定义一个泛型数据类型
 T = TypeVar('T')
 
+# (新增) MessagePack 响应: 请求的 Accept 中明确要求时使用，默认仍是 JSON
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack"}
+# 当前请求协商出的响应格式 ("json" / "msgpack")，由请求中间件设置
+response_format_var: ContextVar[str] = ContextVar("response_format", default="json")
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """
+    根据 Accept 头选择响应格式。application/msgpack (或 application/x-msgpack) 的 q 值大于 0，
+    且不低于明确列出的 application/json 时使用 MessagePack；其他情况 (包括未安装 msgpack) 使用 JSON。
+    """
+    if not accept or msgpack is None:
+        return "json"
+    msgpack_q, json_q = 0.0, None
+    for part in accept.split(","):
+        media_type, _, params = part.partition(";")
+        media_type = media_type.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type in _MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type == JSON_MEDIA_TYPE:
+            json_q = q
+    if msgpack_q > 0 and (json_q is None or msgpack_q >= json_q):
+        return "msgpack"
+    return "json"
+
+
+def pack_msgpack(content: Any) -> bytes:
+    """把 JSON 兼容的结构编码成 MessagePack 字节。"""
+    return msgpack.packb(content, use_bin_type=True)
+
 
 class PaginationMeta(BaseModel):
     """
@@ -26,6 +77,78 @@ class StandardResponse(BaseModel, Generic[T]):
     meta: Optional[dict] = Field(None, description="额外的元数据，例如用于分页。")
 
 
+class ListPage(BaseModel, Generic[T]):
+    """
+    (新增) 列表页的数据部分，与各模块的 *Response 模型 (data + total_count) 形状相同。
+    """
+    data: list[T]
+    total_count: int
+
+
+class ColumnarPage(BaseModel):
+    """
+    (新增) 列式的列表页: 列名只出现一次，每一行是按 columns 顺序排列的值。
+    get_all 的 payload 中 format="columnar" 时使用，宽表的响应体积约为逐行字典的一半。
+    """
+    columns: list[str]
+    rows: list[list[Any]]
+    total_count: int
+
+
+class PageSerializer:
+    """
+    (新增) 为一个列表页模型 (例如 ItemsResponse 或 ListPage[ItemRead]) 预编译的校验/序列化器，创建路由时构建一次。
+    整页连同外层的 StandardResponse 在 pydantic-core 中一次完成校验、一次完成序列化，
+    不再逐行 model_validate，返回的 JSON 字节也不再经过 FastAPI 的 response_model 重复遍历。
+    rows 可以是字典 (Core 行) 或 ORM 对象。
+    """
+
+    def __init__(self, page_schema: Type[BaseModel]):
+        self.page_schema = page_schema
+        self._page_adapter = TypeAdapter(page_schema)
+        self._response_adapter = TypeAdapter(StandardResponse[page_schema])
+        # 列式输出的列名只根据 Read 模型计算一次 (page_schema.data 的元素类型)
+        item_schema = get_args(page_schema.model_fields["data"].annotation)[0]
+        self.columns = list(item_schema.model_fields) + list(item_schema.model_computed_fields)
+
+    def validate(self, rows: list, total_count: int) -> BaseModel:
+        """整页校验成 page_schema 实例。"""
+        return self._page_adapter.validate_python({"data": rows, "total_count": total_count}, from_attributes=True)
+
+    def dump_json(self, rows: list, total_count: int, meta: Optional[dict] = None) -> bytes:
+        """整页校验并直接序列化成标准成功响应的 JSON 字节 (配合 RawSuccess 返回)。"""
+        response = self._response_adapter.validate_python(
+            {"data": {"data": rows, "total_count": total_count}, "meta": meta}, from_attributes=True)
+        return self._response_adapter.dump_json(response)
+
+    def dump(self, rows: list, total_count: int, meta: Optional[dict] = None, response_format: str = "json") -> bytes:
+        """(新增) 同 dump_json，response_format 为 "msgpack" 时输出相同结构的 MessagePack 字节。"""
+        if response_format != "msgpack":
+            return self.dump_json(rows, total_count, meta)
+        response = self._response_adapter.validate_python(
+            {"data": {"data": rows, "total_count": total_count}, "meta": meta}, from_attributes=True)
+        return pack_msgpack(self._response_adapter.dump_python(response, mode="json"))
+
+    def _columnar_data(self, rows: list, total_count: int) -> dict:
+        page = self._page_adapter.dump_python(self.validate(rows, total_count), mode="json")
+        columns = self.columns
+        return {"columns": columns, "rows": [[row[column] for column in columns] for row in page["data"]],
+                "total_count": total_count}
+
+    def columnar(self, rows: list, total_count: int) -> ColumnarPage:
+        """(新增) 整页校验后转成列式结构。嵌套的关联对象 (expand) 作为单元格的值保留原有结构。"""
+        return ColumnarPage.model_construct(**self._columnar_data(rows, total_count))
+
+    def dump_columnar(self, rows: list, total_count: int, meta: Optional[dict] = None,
+                      response_format: str = "json") -> bytes:
+        """(新增) 列式的标准成功响应字节 (JSON 或 MessagePack)。"""
+        content = {"code": "OK", "message": "操作成功。",
+                   "data": self._columnar_data(rows, total_count), "meta": meta}
+        if response_format == "msgpack":
+            return pack_msgpack(content)
+        return to_json(content)
+
+
 def Success(
         data: Any = None,
         message: str = "操作成功。",
@@ -43,6 +166,77 @@ def Success(
     )
 
 
+def RawSuccess(content: bytes, response_format: str = "json") -> Response:
+    """
+    (新增) 返回已经序列化好的标准成功响应 (例如 PageSerializer.dump 的结果)。
+    FastAPI 对直接返回的 Response 不再按 response_model 校验和序列化。
+    """
+    return Response(content=content, media_type=MSGPACK_MEDIA_TYPE if response_format == "msgpack" else JSON_MEDIA_TYPE)
+
+
+def Negotiated(response: StandardResponse) -> StandardResponse | Response:
+    """
+    (新增) 按当前请求协商出的格式返回标准响应: JSON 时原样返回 (由 FastAPI 序列化)，
+    MessagePack 时编码成相同结构的 MessagePack 字节。
+    """
+    if response_format_var.get() != "msgpack":
+        return response
+    return Response(content=pack_msgpack(response.model_dump(mode="json")), media_type=MSGPACK_MEDIA_TYPE)
+
+
+# 标准成功响应中 data 字段之前和之后的部分，用于把已经是 JSON 的数据直接拼成响应体
+_SUCCESS_JSON_PREFIX = b'{"code":"OK","message":' + json.dumps("操作成功。", ensure_ascii=False).encode("utf-8") + b',"data":'
+_SUCCESS_JSON_SUFFIX = b',"meta":null}'
+
+
+def payload_etag(payload: str | bytes) -> str:
+    """(新增) 由缓存载荷的哈希得到强 ETag。载荷不变时 ETag 不变，无需解析载荷。"""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    return '"' + hashlib.blake2b(payload, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match 是否命中 (支持 *、逗号分隔的多个值，以及弱校验的 W/ 前缀)。"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def ConditionalSuccess(request: Request, etag: str, data_json: Callable[[], bytes], max_age: int) -> Response:
+    """
+    (新增) 支持条件请求的标准成功响应。
+    If-None-Match 命中时直接返回 304 (不调用 data_json，也就不解析或序列化载荷)；
+    否则把 data_json() 返回的 JSON 放进标准响应的 data 字段。两种情况都带 ETag 和 Cache-Control。
+    max_age 为 0 时要求客户端每次都重新验证。
+    MessagePack 响应使用另一个 ETag (两种表示的字节不同)，并带 Vary: Accept。
+    """
+    response_format = response_format_var.get()
+    if response_format == "msgpack":
+        etag = etag[:-1] + '-msgpack"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}" if max_age > 0 else "private, no-cache",
+        "Vary": "Accept",
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    if response_format == "msgpack":
+        content = pack_msgpack({"code": "OK", "message": "操作成功。", "data": json.loads(data_json()), "meta": None})
+        return Response(content=content, media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return Response(content=_SUCCESS_JSON_PREFIX + data_json() + _SUCCESS_JSON_SUFFIX,
+                    media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+def ErrorResponse(request: Request, status_code: int, content: dict) -> Response:
+    """(新增) 错误响应同样按请求的 Accept 协商格式，默认 JSON。"""
+    if negotiate_format(request.headers.get("accept")) == "msgpack":
+        return Response(content=pack_msgpack(content), status_code=status_code, media_type=MSGPACK_MEDIA_TYPE)
+    return JSONResponse(status_code=status_code, content=content)
+
+
 # --- (新增) Fail 辅助函数 ---
 def Fail(
         message: str = "操作失败。",
@@ -0,0 +1,110 @@
+# app/db/adaptive_ttl.py
+
+import logging
+import math
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _DecayingCounter:
+    """按半衰期指数衰减的计数器，反映最近一段时间的速率而不是历史总量。"""
+
+    def __init__(self, half_life_seconds: float):
+        self.half_life_seconds = half_life_seconds
+        self.value = 0.0
+        self._updated_at = time.monotonic()
+
+    def _decay(self, now: float):
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self.value *= math.pow(0.5, elapsed / self.half_life_seconds)
+            self._updated_at = now
+
+    def add(self, amount: float = 1.0):
+        self._decay(time.monotonic())
+        self.value += amount
+
+    def current(self) -> float:
+        self._decay(time.monotonic())
+        return self.value
+
+
+class AdaptiveTTLPolicy:
+    """
+    (新增) 根据观察到的读写比例为每个模型计算缓存 TTL。
+    - 读: get_by_id 的缓存查找；写: LoggingFastCRUD.update/delete 触发的失效。
+    - 写占比 w = 写 / (读 + 写)。TTL = max_ttl * (1 - w)^2，并限制在 [min_ttl, max_ttl] 之内；
+      很少变化的实体得到长 TTL，频繁变化的实体得到短 TTL。
+    - w 超过 no_cache_write_ratio 时返回 0，表示不值得缓存 (缓存条目多半在被读到之前就失效了)。
+    - 样本不足 min_samples 时使用调用方给出的默认 TTL。
+    每个模型的上下限可以通过 settings.CACHE_TTL_BOUNDS 单独配置，例如 {"Items": [60, 3600]}。
+    """
+
+    def __init__(self, min_ttl: int, max_ttl: int, no_cache_write_ratio: float,
+                 half_life_seconds: float = 300, min_samples: int = 20,
+                 bounds: dict[str, list[int]] | None = None, enabled: bool = True):
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.no_cache_write_ratio = no_cache_write_ratio
+        self.half_life_seconds = half_life_seconds
+        self.min_samples = min_samples
+        self.bounds = bounds or {}
+        self.enabled = enabled
+        self._reads: dict[str, _DecayingCounter] = {}
+        self._writes: dict[str, _DecayingCounter] = {}
+
+    def _counter(self, counters: dict[str, _DecayingCounter], model_name: str) -> _DecayingCounter:
+        counter = counters.get(model_name)
+        if counter is None:
+            counter = counters[model_name] = _DecayingCounter(self.half_life_seconds)
+        return counter
+
+    def record_read(self, model_name: str):
+        self._counter(self._reads, model_name).add()
+
+    def record_write(self, model_name: str):
+        self._counter(self._writes, model_name).add()
+
+    def _rates(self, model_name: str) -> tuple[float, float]:
+        reads = self._reads.get(model_name)
+        writes = self._writes.get(model_name)
+        return (reads.current() if reads else 0.0), (writes.current() if writes else 0.0)
+
+    def ttl_for(self, model_name: str, default_ttl: int) -> int:
+        """返回模型当前应使用的 TTL (秒)，0 表示不缓存。"""
+        if not self.enabled:
+            return default_ttl
+        min_ttl, max_ttl = self.bounds.get(model_name, (self.min_ttl, self.max_ttl))
+        reads, writes = self._rates(model_name)
+        if reads + writes < self.min_samples:
+            return max(min_ttl, min(default_ttl, max_ttl))
+        write_ratio = writes / (reads + writes)
+        if write_ratio >= self.no_cache_write_ratio:
+            return 0
+        return max(min_ttl, min(int(max_ttl * (1 - write_ratio) ** 2), max_ttl))
+
+    def stats(self) -> dict:
+        result = {}
+        for model_name in sorted(set(self._reads) | set(self._writes)):
+            reads, writes = self._rates(model_name)
+            result[model_name] = {
+                "reads": round(reads, 2),
+                "writes": round(writes, 2),
+                "write_ratio": round(writes / (reads + writes), 3) if reads + writes else None,
+                # 样本不足时使用各路由的默认 TTL
+                "ttl": self.ttl_for(model_name, default_ttl=0) if reads + writes >= self.min_samples else None,
+            }
+        return result
+
+
+adaptive_ttl = AdaptiveTTLPolicy(
+    min_ttl=settings.CACHE_TTL_MIN_SECONDS,
+    max_ttl=settings.CACHE_TTL_MAX_SECONDS,
+    no_cache_write_ratio=settings.CACHE_TTL_NO_CACHE_WRITE_RATIO,
+    half_life_seconds=settings.CACHE_TTL_HALF_LIFE_SECONDS,
+    bounds=settings.CACHE_TTL_BOUNDS,
+    enabled=settings.CACHE_ADAPTIVE_TTL,
+)
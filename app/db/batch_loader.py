@@ -0,0 +1,96 @@
+# app/db/batch_loader.py
+
+import asyncio
+import logging
+from typing import Any, Type
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+class _Batch:
+    def __init__(self):
+        self.futures: dict[Any, asyncio.Future] = {}
+        self.full = asyncio.Event()
+
+
+class BatchLoader:
+    """
+    (新增) DataLoader 风格的主键批量加载器。
+    在 window_ms 毫秒的窗口内 (或攒够 max_batch 个主键时) 到达的请求合并成一条 IN 查询，
+    结果再分发给各个等待中的协程。
+
+    第一个到达的请求是本批次的 "leader"，查询在它的会话上执行；其他请求不使用自己的会话
+    (配合惰性会话，它们根本不会从连接池借连接)。代价是未命中时最多增加 window_ms 的延迟。
+    """
+
+    def __init__(self, model: Type, window_ms: float = 2, max_batch: int = 100):
+        self.model = model
+        self.window_seconds = window_ms / 1000
+        self.max_batch = max_batch
+        self.pk_column = inspect(model).primary_key[0]
+        self._pk_type = self.pk_column.type.python_type
+        self._current: _Batch | None = None
+        # 统计: 合并后的查询数与被合并的请求数
+        self.batches = 0
+        self.loads = 0
+
+    def _normalize(self, pk_value: Any) -> Any:
+        """把 payload 中的主键 (可能是字符串) 转成列的 Python 类型，使结果能按主键分发。"""
+        return pk_value if isinstance(pk_value, self._pk_type) else self._pk_type(pk_value)
+
+    async def load(self, db: AsyncSession, pk_value: Any) -> dict | None:
+        """返回主键对应的行 (列名 -> 值的字典)，不存在时返回 None。主键无法转换类型时抛出 ValueError/TypeError。"""
+        key = self._normalize(pk_value)
+        self.loads += 1
+        batch = self._current
+        is_leader = batch is None
+        if is_leader:
+            batch = self._current = _Batch()
+        future = batch.futures.get(key)
+        if future is None:
+            future = batch.futures[key] = asyncio.get_running_loop().create_future()
+            if len(batch.futures) >= self.max_batch:
+                batch.full.set()
+                if self._current is batch:
+                    self._current = None  # 后续请求开始新的批次
+        if is_leader:
+            await self._run_batch(db, batch)
+        # shield: 某个等待者被取消时，不能连带取消共享同一个 future 的其他请求
+        return await asyncio.shield(future)
+
+    async def _run_batch(self, db: AsyncSession, batch: _Batch):
+        try:
+            try:
+                await asyncio.wait_for(batch.full.wait(), timeout=self.window_seconds)
+            except asyncio.TimeoutError:
+                pass
+            if self._current is batch:
+                self._current = None
+            keys = list(batch.futures)
+            self.batches += 1
+            result = await db.execute(select(*self.model.__table__.columns).where(self.pk_column.in_(keys)))
+            rows = {row[self.pk_column.name]: dict(row) for row in result.mappings()}
+            for key, future in batch.futures.items():
+                if not future.done():
+                    future.set_result(rows.get(key))
+            if len(keys) > 1:
+                logger.debug(f"BATCH_LOADER: 用一条 IN 查询加载了 {len(keys)} 个 {self.model.__name__}")
+        except BaseException as e:
+            # leader 失败或被取消时，不能让同批次的其他请求永远等待
+            if self._current is batch:
+                self._current = None
+            error = e if isinstance(e, Exception) else RuntimeError(f"批量加载被中断: {e!r}")
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(error)
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "loads": self.loads,
+            "queries": self.batches,
+            "avg_batch_size": round(self.loads / self.batches, 2) if self.batches else None,
+        }
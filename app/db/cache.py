@@ -1,14 +1,508 @@
-# app/db/cache.py (新文件)
+# app/db/cache.py
+
+import asyncio
+import fnmatch
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, Set
 
 import redis.asyncio as aioredis
 from redis.asyncio.connection import ConnectionPool
+
 from app.core.config import settings
-import logging
 
 user_activity_logger = logging.getLogger("user_activity")
 
-# 我们将创建一个全局连接池，由 lifespan 管理
-redis_pool: ConnectionPool | None = None
+# 缓存值: 写入时通常是 JSON 字符串；Redis 后端读出的是未解码的 bytes
+CacheValue = str | bytes
+
+# 缓存标签 (集合，成员是依赖于某个实体的缓存键) 的键前缀，见 LoggingFastCRUD.cache_tag
+CACHE_TAG_PREFIX = "tag:"
+
+
+class CachePipeline:
+    """
+    批量缓存操作。操作先被缓冲，调用 execute() 时一次性执行，返回每个操作的结果。
+    默认实现逐个调用后端方法；RedisCacheBackend 会换成真正的 Redis pipeline (一次网络往返)。
+    """
+
+    def __init__(self, backend: "CacheBackend"):
+        self._backend = backend
+        self._ops: list[tuple[str, tuple, dict]] = []
+
+    def get(self, key: str) -> "CachePipeline":
+        self._ops.append(("get", (key,), {}))
+        return self
+
+    def set(self, key: str, value: CacheValue, ttl: int | None = None) -> "CachePipeline":
+        self._ops.append(("set", (key, value), {"ttl": ttl}))
+        return self
+
+    def delete(self, *keys: str) -> "CachePipeline":
+        if keys:
+            self._ops.append(("delete", keys, {}))
+        return self
+
+    def sadd(self, key: str, *members: str) -> "CachePipeline":
+        if members:
+            self._ops.append(("sadd", (key, *members), {}))
+        return self
+
+    def expire(self, key: str, ttl: int) -> "CachePipeline":
+        self._ops.append(("expire", (key, ttl), {}))
+        return self
+
+    async def execute(self) -> list[Any]:
+        ops, self._ops = self._ops, []
+        return [await getattr(self._backend, name)(*args, **kwargs) for name, args, kwargs in ops]
+
+
+class CacheBackend(ABC):
+    """
+    (新增) 缓存后端接口。所有缓存调用 (路由处理函数、LoggingFastCRUD 的失效逻辑) 都通过它进行，
+    因此可以在 Redis、进程内内存和空实现之间切换，而不用改动调用方。
+    值为 str 或 bytes (序列化后的载荷，读取方应同时接受两者)，ttl 单位为秒，None 表示不过期。
+    """
+
+    name: str = "abstract"
+
+    @abstractmethod
+    async def get(self, key: str) -> CacheValue | None: ...
+
+    @abstractmethod
+    async def mget(self, keys: Iterable[str]) -> list[CacheValue | None]: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: CacheValue, ttl: int | None = None) -> None: ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> int: ...
+
+    @abstractmethod
+    async def sadd(self, key: str, *members: str) -> int: ...
+
+    @abstractmethod
+    async def smembers(self, key: str) -> Set[str]: ...
+
+    @abstractmethod
+    async def expire(self, key: str, ttl: int) -> bool: ...
+
+    @abstractmethod
+    async def scan_keys(self, pattern: str, limit: int) -> list[str]:
+        """返回最多 limit 个匹配 glob 模式的键 (非阻塞遍历，不保证顺序)。"""
+
+    def pipeline(self) -> CachePipeline:
+        return CachePipeline(self)
+
+    async def ping(self) -> bool:
+        return True
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    基于 redis.asyncio 连接池的缓存后端。
+    使用两个连接池: 缓存载荷走 bytes 模式的 payload_pool (原样透传，不做 UTF-8 解码)，
+    其余命令 (PING、DEL 等) 走 decode_responses=True 的 pool。
+    """
+
+    name = "redis"
+
+    def __init__(self, pool: ConnectionPool, payload_pool: ConnectionPool | None = None):
+        self.pool = pool
+        self.payload_pool = payload_pool or pool
+        self.client = aioredis.Redis(connection_pool=pool)
+        self.payload_client = aioredis.Redis(connection_pool=self.payload_pool)
+
+    async def get(self, key: str) -> CacheValue | None:
+        return await self.payload_client.get(key)
+
+    async def mget(self, keys: Iterable[str]) -> list[CacheValue | None]:
+        keys = list(keys)
+        return await self.payload_client.mget(keys) if keys else []
+
+    async def set(self, key: str, value: CacheValue, ttl: int | None = None) -> None:
+        await self.payload_client.set(key, value, ex=ttl)
+
+    async def delete(self, *keys: str) -> int:
+        return await self.client.delete(*keys) if keys else 0
+
+    async def sadd(self, key: str, *members: str) -> int:
+        return await self.client.sadd(key, *members) if members else 0
+
+    async def smembers(self, key: str) -> Set[str]:
+        return await self.client.smembers(key)
+
+    async def expire(self, key: str, ttl: int) -> bool:
+        return await self.client.expire(key, ttl)
+
+    async def scan_keys(self, pattern: str, limit: int) -> list[str]:
+        keys = []
+        async for key in self.client.scan_iter(match=pattern, count=min(limit, 1000)):
+            keys.append(key)
+            if len(keys) >= limit:
+                break
+        return keys
+
+    def pipeline(self) -> CachePipeline:
+        return _RedisPipeline(self)
+
+    async def ping(self) -> bool:
+        return await self.client.ping()
+
+    @staticmethod
+    def _pool_stats(pool: ConnectionPool) -> dict:
+        in_use = len(getattr(pool, "_in_use_connections", ()))
+        available = len(getattr(pool, "_available_connections", ()))
+        return {
+            "max_connections": pool.max_connections,
+            "in_use": in_use,
+            "idle": available,
+            "utilization": round(in_use / pool.max_connections, 3) if pool.max_connections else None,
+        }
+
+    def pool_stats(self) -> dict:
+        stats = {"text": self._pool_stats(self.pool)}
+        if self.payload_pool is not self.pool:
+            stats["payload"] = self._pool_stats(self.payload_pool)
+        return stats
+
+    async def close(self) -> None:
+        await self.client.aclose()
+        await self.payload_client.aclose()
+        await self.pool.disconnect()
+        if self.payload_pool is not self.pool:
+            await self.payload_pool.disconnect()
+
+
+class _RedisPipeline(CachePipeline):
+    async def execute(self) -> list[Any]:
+        ops, self._ops = self._ops, []
+        if not ops:
+            return []
+        async with self._backend.payload_client.pipeline(transaction=False) as pipe:
+            for name, args, kwargs in ops:
+                if name == "set":
+                    pipe.set(*args, ex=kwargs["ttl"])
+                else:
+                    getattr(pipe, name)(*args)
+            return await pipe.execute()
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    进程内的字典缓存，过期的键在读取时惰性清理。
+    仅在单个进程内共享，适用于测试、本地基准测试和单 worker 部署。
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._store: dict[str, tuple[CacheValue, float | None]] = {}
+        self._sets: dict[str, set[str]] = {}
+        self._set_expiry: dict[str, float] = {}
+
+    def _get_live(self, key: str) -> CacheValue | None:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._store[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> CacheValue | None:
+        return self._get_live(key)
+
+    async def mget(self, keys: Iterable[str]) -> list[CacheValue | None]:
+        return [self._get_live(key) for key in keys]
+
+    async def set(self, key: str, value: CacheValue, ttl: int | None = None) -> None:
+        if key not in self._store and len(self._store) >= self.max_entries:
+            # 满了以后淘汰最早写入的键 (dict 保持插入顺序)
+            del self._store[next(iter(self._store))]
+        self._store[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            self._set_expiry.pop(key, None)
+            deleted += (self._store.pop(key, None) or self._sets.pop(key, None)) is not None
+        return deleted
+
+    def _get_live_set(self, key: str) -> Set[str] | None:
+        expires_at = self._set_expiry.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._sets.pop(key, None)
+            self._set_expiry.pop(key, None)
+        return self._sets.get(key)
+
+    def _prune_tag(self, key: str, members: Set[str]):
+        """标签集合的成员是缓存键，键过期或被淘汰后成员也随之移除，集合不会无限增长。"""
+        if key.startswith(CACHE_TAG_PREFIX):
+            members.difference_update([member for member in members if self._get_live(member) is None])
+
+    def _make_room_for_set(self):
+        """
+        集合数量达到上限时，先清理过期的集合和已经没有有效成员的标签；仍然满时淘汰最早创建的标签，
+        并一起删除它登记的缓存键 (否则这些键之后不会再随实体一起失效)。
+        """
+        for key in list(self._sets):
+            members = self._get_live_set(key)
+            if members is not None:
+                self._prune_tag(key, members)
+                if not members:
+                    self._sets.pop(key, None)
+                    self._set_expiry.pop(key, None)
+        if len(self._sets) >= self.max_entries:
+            oldest_tag = next((key for key in self._sets if key.startswith(CACHE_TAG_PREFIX)), None)
+            if oldest_tag is not None:
+                for member in self._sets.pop(oldest_tag):
+                    self._store.pop(member, None)
+                self._set_expiry.pop(oldest_tag, None)
+
+    async def sadd(self, key: str, *members: str) -> int:
+        existing = self._get_live_set(key)
+        if existing is None:
+            if len(self._sets) >= self.max_entries:
+                self._make_room_for_set()
+            existing = self._sets[key] = set()
+        else:
+            self._prune_tag(key, existing)
+        added = set(members) - existing
+        existing.update(added)
+        return len(added)
+
+    async def smembers(self, key: str) -> Set[str]:
+        return set(self._get_live_set(key) or ())
+
+    async def expire(self, key: str, ttl: int) -> bool:
+        expires_at = time.monotonic() + ttl
+        if key in self._sets:
+            self._set_expiry[key] = expires_at
+            return True
+        if (value := self._get_live(key)) is not None:
+            self._store[key] = (value, expires_at)
+            return True
+        return False
+
+    async def scan_keys(self, pattern: str, limit: int) -> list[str]:
+        return [key for key in list(self._store) if fnmatch.fnmatchcase(key, pattern) and self._get_live(key)][:limit]
+
+    async def close(self) -> None:
+        self._store.clear()
+        self._sets.clear()
+        self._set_expiry.clear()
+
+
+class NullCacheBackend(CacheBackend):
+    """不缓存任何东西。用于测量缓存对性能的真实贡献，或完全禁用缓存。"""
+
+    name = "null"
+
+    async def get(self, key: str) -> CacheValue | None:
+        return None
+
+    async def mget(self, keys: Iterable[str]) -> list[CacheValue | None]:
+        return [None for _ in keys]
+
+    async def set(self, key: str, value: CacheValue, ttl: int | None = None) -> None:
+        pass
+
+    async def delete(self, *keys: str) -> int:
+        return 0
+
+    async def sadd(self, key: str, *members: str) -> int:
+        return 0
+
+    async def smembers(self, key: str) -> Set[str]:
+        return set()
+
+    async def expire(self, key: str, ttl: int) -> bool:
+        return False
+
+    async def scan_keys(self, pattern: str, limit: int) -> list[str]:
+        return []
+
+
+class CircuitBreakerCacheBackend(CacheBackend):
+    """
+    (新增) 包裹真正缓存后端的熔断器。
+    - closed: 正常转发。连续失败达到阈值后进入 open。
+    - open: 直接绕过缓存 (读返回未命中，写忽略)，请求全部走数据库，不再等待超时或打印堆栈。
+      open 期间跳过的失效操作会被记录下来，恢复时重放，避免读到过期数据。
+    恢复由后台探测任务 (run_cache_recovery_probe) 负责。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+
+    def __init__(self, backend: CacheBackend | None, failure_threshold: int, max_pending_invalidations: int = 10000):
+        self.backend = backend
+        self.name = backend.name if backend else settings.CACHE_BACKEND
+        self.failure_threshold = failure_threshold
+        self.max_pending_invalidations = max_pending_invalidations
+        self.state = self.CLOSED if backend else self.OPEN
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None if backend else time.time()
+        self.total_failures = 0
+        self.bypassed_calls = 0
+        self.times_opened = 0 if backend else 1
+        self._pending_invalidations: set[str] = set()
+        self._invalidations_overflowed = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def _record_success(self):
+        self.consecutive_failures = 0
+
+    def _record_failure(self, operation: str, error: Exception):
+        self.consecutive_failures += 1
+        self.total_failures += 1
+        if self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.time()
+            self.times_opened += 1
+            user_activity_logger.error(
+                f"CACHE_BREAKER: 连续 {self.consecutive_failures} 次失败，熔断器打开，请求将绕过缓存。最后错误: {error}"
+            )
+        else:
+            # 不带堆栈: 故障期间每个请求都会走到这里
+            user_activity_logger.warning(f"CACHE_ERROR: {operation} 失败: {error}")
+
+    def _remember_invalidation(self, keys: Iterable[str]):
+        if len(self._pending_invalidations) >= self.max_pending_invalidations:
+            self._invalidations_overflowed = True
+            return
+        self._pending_invalidations.update(keys)
+
+    async def _call(self, operation: str, default: Any, *args, **kwargs):
+        if self.is_open:
+            self.bypassed_calls += 1
+            return default
+        try:
+            result = await getattr(self.backend, operation)(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(operation, e)
+            return default
+        self._record_success()
+        return result
+
+    async def get(self, key: str) -> CacheValue | None:
+        return await self._call("get", None, key)
+
+    async def mget(self, keys: Iterable[str]) -> list[CacheValue | None]:
+        keys = list(keys)
+        return await self._call("mget", [None] * len(keys), keys)
+
+    async def set(self, key: str, value: CacheValue, ttl: int | None = None) -> None:
+        await self._call("set", None, key, value, ttl=ttl)
+
+    async def delete(self, *keys: str) -> int:
+        if self.is_open:
+            self._remember_invalidation(keys)
+        return await self._call("delete", 0, *keys)
+
+    async def sadd(self, key: str, *members: str) -> int:
+        return await self._call("sadd", 0, key, *members)
+
+    async def smembers(self, key: str) -> Set[str]:
+        return await self._call("smembers", set(), key)
+
+    async def expire(self, key: str, ttl: int) -> bool:
+        return await self._call("expire", False, key, ttl)
+
+    async def scan_keys(self, pattern: str, limit: int) -> list[str]:
+        return await self._call("scan_keys", [], pattern, limit)
+
+    def pipeline(self) -> CachePipeline:
+        return _BreakerPipeline(self)
+
+    async def ping(self) -> bool:
+        return await self._call("ping", False)
+
+    async def try_recover(self) -> bool:
+        """探测底层后端，成功则重放积压的失效操作并关闭熔断器。"""
+        if not self.is_open:
+            return True
+        try:
+            if self.backend is None:
+                self.backend = await _create_backend()
+            await self.backend.ping()
+            if self._invalidations_overflowed:
+                user_activity_logger.warning(
+                    "CACHE_BREAKER: 熔断期间积压的失效操作超过上限，部分缓存可能在 TTL 到期前是过期的。")
+            if self._pending_invalidations:
+                # open 期间 smembers 返回空集合，标签里登记的依赖键 (例如展开的 Useritems) 没有被一起删除，
+                # 这里从恢复后的后端读出标签成员，与标签本身一起重放
+                keys = set(self._pending_invalidations)
+                for tag in [key for key in keys if key.startswith(CACHE_TAG_PREFIX)]:
+                    keys |= await self.backend.smembers(tag)
+                await self.backend.delete(*keys)
+        except Exception as e:
+            user_activity_logger.info(f"CACHE_BREAKER: 恢复探测失败: {e}")
+            return False
+        self._pending_invalidations.clear()
+        self._invalidations_overflowed = False
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        user_activity_logger.info(f"CACHE_BREAKER: {self.name} 已恢复，熔断器关闭。")
+        return True
+
+    def stats(self) -> dict:
+        pool_stats = getattr(self.backend, "pool_stats", None)
+        return {
+            "backend": self.name,
+            "pools": pool_stats() if pool_stats else None,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "bypassed_calls": self.bypassed_calls,
+            "times_opened": self.times_opened,
+            "opened_at": self.opened_at,
+            "pending_invalidations": len(self._pending_invalidations),
+        }
+
+    async def close(self) -> None:
+        if self.backend:
+            await self.backend.close()
+
+
+class _BreakerPipeline(CachePipeline):
+    """熔断器打开时，pipeline 中的读返回未命中，删除被记录以便恢复后重放。"""
+
+    async def execute(self) -> list[Any]:
+        breaker: CircuitBreakerCacheBackend = self._backend
+        ops, self._ops = self._ops, []
+        if breaker.is_open:
+            breaker.bypassed_calls += 1
+            for name, args, _ in ops:
+                if name == "delete":
+                    breaker._remember_invalidation(args)
+            return [0 if name == "delete" else None for name, _, _ in ops]
+        pipe = breaker.backend.pipeline()
+        pipe._ops = ops
+        try:
+            results = await pipe.execute()
+        except Exception as e:
+            breaker._record_failure("pipeline", e)
+            return [0 if name == "delete" else None for name, _, _ in ops]
+        breaker._record_success()
+        return results
+
+
+# 全局缓存后端 (熔断器包裹)，由 lifespan 管理
+cache_backend: CircuitBreakerCacheBackend | None = None
+# 保证同一时间只有一个初始化在进行
+_init_lock = asyncio.Lock()
 
 
 def get_redis_url() -> str:
@@ -18,49 +512,100 @@ def get_redis_url() -> str:
     return f"redis://{password}{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}"
 
 
-async def init_redis_pool():
-    """在应用启动时初始化 Redis 连接池"""
-    global redis_pool
-    if redis_pool is None:
-        redis_url = get_redis_url()
-        user_activity_logger.info(
-            f"Initializing Redis connection pool for: redis://...:{settings.REDIS_PORT}/{settings.REDIS_DB}")
+def _create_redis_pool(decode_responses: bool) -> ConnectionPool:
+    """按 settings 创建一个有上限、带超时和健康检查的连接池。"""
+    pool_class = aioredis.BlockingConnectionPool if settings.REDIS_BLOCKING_POOL else aioredis.ConnectionPool
+    pool_kwargs = {"timeout": settings.REDIS_POOL_TIMEOUT} if settings.REDIS_BLOCKING_POOL else {}
+    return pool_class.from_url(
+        get_redis_url(),
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        decode_responses=decode_responses,
+        **pool_kwargs,
+    )
+
+
+async def _create_redis_backend() -> RedisCacheBackend:
+    user_activity_logger.info(
+        f"Initializing Redis connection pools for: redis://...:{settings.REDIS_PORT}/{settings.REDIS_DB} "
+        f"(max_connections={settings.REDIS_MAX_CONNECTIONS}, blocking={settings.REDIS_BLOCKING_POOL})")
+    backend = RedisCacheBackend(
+        pool=_create_redis_pool(decode_responses=True),  # 命令结果: 自动将 bytes 解码为 str
+        payload_pool=_create_redis_pool(decode_responses=False),  # 缓存载荷: 原样透传 bytes
+    )
+    try:
+        # 测试连接
+        await backend.ping()
+    except Exception as e:
+        await backend.close()
+        raise RuntimeError(f"Failed to connect to Redis at redis://...:{settings.REDIS_PORT}/{settings.REDIS_DB}: {e}") from e
+    user_activity_logger.info("Redis pools initialized successfully.")
+    return backend
+
+
+async def _create_backend() -> CacheBackend:
+    backend_name = settings.CACHE_BACKEND.lower()
+    if backend_name == "redis":
+        return await _create_redis_backend()
+    if backend_name == "memory":
+        return MemoryCacheBackend(max_entries=settings.CACHE_MEMORY_MAX_ENTRIES)
+    if backend_name == "null":
+        return NullCacheBackend()
+    raise ValueError(f"未知的缓存后端: '{settings.CACHE_BACKEND}'，可选值: redis, memory, null")
+
+
+async def init_cache_backend():
+    """
+    在应用启动时根据 settings.CACHE_BACKEND 初始化缓存后端。
+    后端不可用时不会让启动失败: 熔断器以 open 状态启动，由恢复探测任务稍后重连。
+    """
+    global cache_backend
+    async with _init_lock:
+        if cache_backend is not None:
+            return
         try:
-            redis_pool = aioredis.ConnectionPool.from_url(
-                redis_url,
-                decode_responses=True  # 关键：自动将 redis 的 bytes 解码为 str
-            )
-            # 测试连接
-            async with aioredis.Redis(connection_pool=redis_pool) as redis:
-                await redis.ping()
-            user_activity_logger.info("Redis pool initialized successfully.")
+            backend = await _create_backend()
+        except ValueError:
+            raise
         except Exception as e:
-            user_activity_logger.error(f"Failed to initialize Redis pool: {e}", exc_info=True)
-            redis_pool = None  # 保持 None 以便重试或失败
-            raise RuntimeError(f"Failed to connect to Redis at {redis_url}") from e
+            user_activity_logger.error(f"CACHE: 初始化 {settings.CACHE_BACKEND} 缓存后端失败，以降级模式运行 (绕过缓存): {e}")
+            backend = None
+        cache_backend = CircuitBreakerCacheBackend(
+            backend, failure_threshold=settings.CACHE_BREAKER_FAILURE_THRESHOLD)
+        if backend:
+            user_activity_logger.info(f"CACHE: 使用 {backend.name} 缓存后端。")
+
+
+async def close_cache_backend():
+    """在应用关闭时释放缓存后端"""
+    global cache_backend
+    if cache_backend:
+        user_activity_logger.info(f"Closing {cache_backend.name} cache backend...")
+        await cache_backend.close()
+        cache_backend = None
 
 
-async def close_redis_pool():
-    """在应用关闭时关闭 Redis 连接池"""
-    global redis_pool
-    if redis_pool:
-        user_activity_logger.info("Closing Redis connection pool...")
-        await redis_pool.disconnect()
-        redis_pool = None
+async def run_cache_recovery_probe():
+    """一个后台任务，熔断器打开时定期探测缓存后端，恢复后关闭熔断器。"""
+    interval = settings.CACHE_BREAKER_PROBE_INTERVAL_SECONDS
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            if cache_backend is not None and cache_backend.is_open:
+                async with _init_lock:
+                    await cache_backend.try_recover()
+    except asyncio.CancelledError:
+        user_activity_logger.info("缓存恢复探测任务正在正常停止。")
 
 
-async def get_redis():
+async def get_cache() -> CacheBackend:
     """
-    FastAPI 依赖项：从池中获取一个单独的 Redis 连接。
+    FastAPI 依赖项：返回全局缓存后端。
+    后端故障时熔断器会让请求绕过缓存，而不是在每个请求里重新连接。
     """
-    if redis_pool is None:
+    if cache_backend is None:
         # 这是一个后备，以防 lifespan 由于某种原因未运行（例如在测试中）
-        # 但在生产中，lifespan 应该已经设置了它
-        await init_redis_pool()
-
-    if redis_pool:  # 再次检查，因为 init 可能会失败
-        async with aioredis.Redis(connection_pool=redis_pool) as redis:
-            yield redis
-    else:
-        # 如果 Redis 真的不可用，我们可以选择让请求失败，或者（不推荐）继续而不进行缓存
-        raise RuntimeError("Redis connection pool is not available.")
\ No newline at end of file
+        await init_cache_backend()
+    return cache_backend
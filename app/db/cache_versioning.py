@@ -0,0 +1,152 @@
+# app/db/cache_versioning.py
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Type
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.cache import CacheBackend
+from app.db.codec import CODEC_FORMAT_VERSION, cache_codec
+from app.db.hot_keys import hot_key_tracker
+
+logger = logging.getLogger(__name__)
+
+# 每个模型的已知缓存版本集合保存在这个键下，滚动发布时新旧版本的进程都会登记自己的版本
+VERSIONS_KEY_TEMPLATE = "cache_versions:{model}"
+# 进程内缓存已知版本集合的时间 (秒)，避免每次失效都多一次往返
+KNOWN_VERSIONS_TTL_SECONDS = 60
+
+
+def schema_version(schema: Type[BaseModel]) -> str:
+    """
+    根据 Read 模型的 JSON Schema (字段名、类型、嵌套结构) 计算一个短哈希。
+    字段变化时版本随之变化，新旧形状的缓存互不干扰。缓存载荷的头字节布局 (CODEC_FORMAT_VERSION) 也计入哈希。
+    """
+    schema_json = json.dumps(schema.model_json_schema(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(f"{CODEC_FORMAT_VERSION}:{schema_json}".encode("utf-8")).hexdigest()[:8]
+
+
+@dataclass
+class CachedEntity:
+    """一个使用版本化缓存键的实体 (由 LoggingFastCRUD.enable_versioned_cache 登记)。"""
+    crud: Any
+    read_schema: Type[BaseModel]
+    ttl_seconds: int
+
+
+# 所有使用版本化缓存的实体，lifespan 会登记它们的版本并 (可选) 预热缓存
+CACHED_ENTITIES: list[CachedEntity] = []
+
+
+def register_cached_entity(crud: Any, read_schema: Type[BaseModel], ttl_seconds: int):
+    if not any(entity.crud is crud for entity in CACHED_ENTITIES):
+        CACHED_ENTITIES.append(CachedEntity(crud=crud, read_schema=read_schema, ttl_seconds=ttl_seconds))
+
+
+class KnownVersions:
+    """在进程内缓存某个模型在缓存后端中登记过的所有版本。"""
+
+    def __init__(self, model_name: str, own_version: str):
+        self.key = VERSIONS_KEY_TEMPLATE.format(model=model_name)
+        self.own_version = own_version
+        self._versions: set[str] = {own_version}
+        self._loaded_at: float | None = None
+
+    async def get(self, cache: CacheBackend) -> set[str]:
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at > KNOWN_VERSIONS_TTL_SECONDS:
+            self._versions = await cache.smembers(self.key) | {self.own_version}
+            self._loaded_at = now
+        return self._versions
+
+    async def register(self, cache: CacheBackend):
+        await cache.sadd(self.key, self.own_version)
+        self._loaded_at = None
+
+
+async def register_cache_versions(cache: CacheBackend):
+    """在启动时登记本进程使用的缓存版本，使其他版本的进程在写入时也能让这些键失效。"""
+    for entity in CACHED_ENTITIES:
+        await entity.crud.known_cache_versions.register(cache)
+        logger.info(f"CACHE: {entity.crud.model.__name__} 使用缓存版本 v{entity.crud.cache_version}")
+
+
+async def _old_keyspace_ids(entity: CachedEntity, cache: CacheBackend, max_keys: int) -> list:
+    """旧版本 (以及不带版本的旧格式) 键空间里的 ID 就是最近被访问过的 ID。"""
+    crud = entity.crud
+    model_name = crud.model.__name__
+    old_versions = await crud.known_cache_versions.get(cache) - {crud.cache_version}
+    patterns = [f"{model_name}:v{version}:*" for version in old_versions] + [f"{model_name}:[!v]*"]
+    ids: list = []
+    for pattern in patterns:
+        if len(ids) >= max_keys:
+            break
+        ids.extend(key.rsplit(":", 1)[1] for key in await cache.scan_keys(pattern, max_keys - len(ids)))
+    return ids
+
+
+async def warm_entity_ids(entity: CachedEntity, ids: list, cache: CacheBackend,
+                          session_factory: Callable[[], AsyncSession], batch_size: int = 100,
+                          concurrency: int = 4) -> int:
+    """
+    把给定 ID 的实体写入缓存: 每批一条 IN 查询 + 一次 pipeline 写入，
+    最多 concurrency 个批次并发执行 (每个批次使用独立的会话)。
+    """
+    crud = entity.crud
+    pk_column = crud._primary_keys[0]
+    pk_type = pk_column.type.python_type
+    typed_ids = []
+    for entity_id in ids:
+        try:
+            typed_ids.append(pk_type(entity_id))
+        except (TypeError, ValueError):
+            continue
+    typed_ids = list(dict.fromkeys(typed_ids))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _warm_batch(batch: list) -> int:
+        async with semaphore, session_factory() as session:
+            # Core 行: 只需要列值，不创建 ORM 实例
+            result = await session.execute(select(*crud.model.__table__.columns).where(pk_column.in_(batch)))
+            pipe = cache.pipeline()
+            count = 0
+            for row in result.mappings():
+                entity_read = entity.read_schema.model_validate(dict(row))
+                pipe.set(crud._get_cache_key(row[pk_column.name]),
+                         cache_codec.encode_model(entity_read), ttl=ttl)
+                count += 1
+            await pipe.execute()
+            return count
+
+    # 自适应 TTL 判定为不值得缓存的实体不预热
+    ttl = crud.cache_ttl(entity.ttl_seconds)
+    if not ttl:
+        return 0
+    batches = [typed_ids[i:i + batch_size] for i in range(0, len(typed_ids), batch_size)]
+    return sum(await asyncio.gather(*(_warm_batch(batch) for batch in batches)))
+
+
+async def warm_cache(cache: CacheBackend, session_factory: Callable[[], AsyncSession],
+                     max_keys: int = 1000, batch_size: int = 100, concurrency: int = 4):
+    """
+    在接收流量之前预热缓存。每个实体最多 max_keys 个 ID，来源依次为:
+    1. hot_key_tracker 记录的热点 ID (按访问次数排序)；
+    2. 旧版本键空间中的 ID (Read 模型变化后的首次部署)。
+    """
+    for entity in CACHED_ENTITIES:
+        model_name = entity.crud.model.__name__
+        try:
+            ids = [key for key, _ in hot_key_tracker.top(model_name, max_keys)]
+            if len(ids) < max_keys:
+                ids += await _old_keyspace_ids(entity, cache, max_keys - len(ids))
+            warmed = await warm_entity_ids(entity, ids, cache, session_factory, batch_size, concurrency)
+            logger.info(f"CACHE_WARM: 为 {model_name} v{entity.crud.cache_version} 预热了 {warmed} 个条目。")
+        except Exception as e:
+            logger.warning(f"CACHE_WARM: 预热 {model_name} 失败: {e}")
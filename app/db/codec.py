@@ -0,0 +1,165 @@
+# app/db/codec.py
+
+import importlib
+import json
+import logging
+from typing import Any, Type, TypeVar
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SchemaType = TypeVar("SchemaType", bound=BaseModel)
+
+# 头字节: 最高位固定为 1，第 4-6 位是序列化格式，低 4 位是压缩算法 (取值 0x90-0xA2)。
+# 旧格式是纯 JSON 文本，第一个字节总是 ASCII (< 0x80)，因此不会被误认为头字节。
+_HEADER_MARKER = 0x80
+# 头字节布局的版本，计入缓存键的版本哈希 (见 schema_version)，布局变化后不会读到按旧布局编码的条目
+CODEC_FORMAT_VERSION = 2
+SERIALIZERS = {"json": 0x1, "msgpack": 0x2}
+COMPRESSIONS = {"none": 0x0, "zstd": 0x1, "lz4": 0x2}
+_SERIALIZER_NAMES = {code: name for name, code in SERIALIZERS.items()}
+_COMPRESSION_NAMES = {code: name for name, code in COMPRESSIONS.items()}
+
+
+def _parse_header(raw: bytes) -> tuple[str | None, str | None]:
+    """返回 (序列化格式, 压缩算法)；没有头字节 (旧格式) 时返回 (None, None)。"""
+    if not raw or not raw[0] & _HEADER_MARKER:
+        return None, None
+    serializer = _SERIALIZER_NAMES.get((raw[0] >> 4) & 0x7)
+    compression = _COMPRESSION_NAMES.get(raw[0] & 0x0F)
+    if serializer is None or compression is None:
+        return None, None
+    return serializer, compression
+
+
+# 可选依赖: 名称 -> (导入路径, pip 包名)。只有在配置使用 (或读到用它编码的缓存) 时才需要安装。
+_OPTIONAL_MODULES = {
+    "msgpack": ("msgpack", "msgpack"),
+    "zstd": ("zstandard", "zstandard"),
+    "lz4": ("lz4.frame", "lz4"),
+}
+
+
+class CacheCodec:
+    """
+    (新增) 缓存载荷的编解码器。
+    编码: 头字节 + [压缩后的] 序列化数据；超过 compression_threshold 字节才压缩。
+    解码: 按头字节选择格式，因此切换配置后旧条目仍可读取，无需清空缓存；没有头字节的值按旧的纯 JSON 处理。
+    """
+
+    def __init__(self, serializer: str = "json", compression: str = "none", compression_threshold: int = 1024):
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"未知的缓存序列化格式: '{serializer}'，可选值: {list(SERIALIZERS)}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"未知的缓存压缩算法: '{compression}'，可选值: {list(COMPRESSIONS)}")
+        self.serializer = serializer
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self._modules: dict[str, Any] = {}
+        self._zstd_compressor = None
+        self._zstd_decompressor = None
+        # 统计: 序列化后的原始字节数与实际写入缓存的字节数
+        self.encoded_count = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        # 启动时就检查依赖，而不是在第一次写缓存时才失败
+        if serializer != "json":
+            self._module(serializer)
+        if compression != "none":
+            self._module(compression)
+
+    def _module(self, name: str):
+        if name not in self._modules:
+            import_path, package = _OPTIONAL_MODULES[name]
+            try:
+                self._modules[name] = importlib.import_module(import_path)
+            except ImportError as e:
+                raise RuntimeError(f"缓存编解码 ({name}) 需要安装 '{package}' (pip install {package})。") from e
+        return self._modules[name]
+
+    # --- 序列化 ---
+    def _serialize(self, model: BaseModel) -> bytes:
+        if self.serializer == "msgpack":
+            return self._module("msgpack").packb(model.model_dump(mode="json"), use_bin_type=True)
+        return model.model_dump_json().encode("utf-8")
+
+    def _deserialize(self, serializer: str, data: bytes) -> Any:
+        if serializer == "msgpack":
+            return self._module("msgpack").unpackb(data, raw=False)
+        return json.loads(data)
+
+    # --- 压缩 ---
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            if self._zstd_compressor is None:
+                self._zstd_compressor = self._module("zstd").ZstdCompressor(level=3)
+            return self._zstd_compressor.compress(data)
+        return self._module("lz4").compress(data)
+
+    def _decompress(self, compression: str, data: bytes) -> bytes:
+        if compression == "zstd":
+            if self._zstd_decompressor is None:
+                self._zstd_decompressor = self._module("zstd").ZstdDecompressor()
+            return self._zstd_decompressor.decompress(data)
+        return self._module("lz4").decompress(data)
+
+    # --- 公共接口 ---
+    def encode_model(self, model: BaseModel) -> bytes:
+        data = self._serialize(model)
+        compression = self.compression
+        if compression == "none" or len(data) < self.compression_threshold:
+            compression = "none"
+            payload = data
+        else:
+            payload = self._compress(data)
+        header = _HEADER_MARKER | (SERIALIZERS[self.serializer] << 4) | COMPRESSIONS[compression]
+        self.encoded_count += 1
+        self.raw_bytes += len(data)
+        self.stored_bytes += len(payload) + 1
+        return bytes([header]) + payload
+
+    def decode_model(self, schema: Type[SchemaType], raw: str | bytes) -> SchemaType:
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        serializer, compression = _parse_header(raw)
+        if serializer is None:
+            # 旧格式: 没有头字节的 JSON 文本
+            return schema.model_validate_json(raw)
+        data = raw[1:] if compression == "none" else self._decompress(compression, raw[1:])
+        if serializer == "json":
+            return schema.model_validate_json(data)
+        return schema.model_validate(self._deserialize(serializer, data))
+
+    def to_json(self, schema: Type[SchemaType], raw: str | bytes) -> bytes:
+        """
+        (新增) 把缓存载荷转换成 JSON 字节。未压缩的 JSON 载荷 (以及旧格式) 本身就是 JSON，直接返回，不解析；
+        其他格式先解码再序列化。
+        """
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        serializer, compression = _parse_header(raw)
+        if serializer is None:
+            return raw
+        if serializer == "json" and compression == "none":
+            return raw[1:]
+        return self.decode_model(schema, raw).model_dump_json().encode("utf-8")
+
+    def stats(self) -> dict:
+        return {
+            "serializer": self.serializer,
+            "compression": self.compression,
+            "compression_threshold": self.compression_threshold,
+            "encoded_count": self.encoded_count,
+            "avg_raw_bytes": round(self.raw_bytes / self.encoded_count, 1) if self.encoded_count else None,
+            "avg_stored_bytes": round(self.stored_bytes / self.encoded_count, 1) if self.encoded_count else None,
+        }
+
+
+cache_codec = CacheCodec(
+    serializer=settings.CACHE_CODEC,
+    compression=settings.CACHE_COMPRESSION,
+    compression_threshold=settings.CACHE_COMPRESSION_THRESHOLD,
+)
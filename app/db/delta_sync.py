@@ -0,0 +1,114 @@
+# app/db/delta_sync.py
+
+import asyncio
+import base64
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Type
+
+from sqlalchemy import MetaData, delete, inspect, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Tombstone, utcnow
+
+logger = logging.getLogger(__name__)
+
+# 与 FastCRUD 的 updated_at_column 默认值一致
+UPDATED_AT_COLUMN = "updated_at"
+
+
+def tracks_changes(model: Type) -> bool:
+    """模型是否带有 updated_at 列 (UpdatedAtMixin)，即是否支持 changes_since。"""
+    return UPDATED_AT_COLUMN in inspect(model).columns
+
+
+@dataclass
+class SyncCursor:
+    """
+    增量同步的游标: 变化的行和墓碑各自的读取位置 (时间戳, 主键)，两条流各自按索引分页。
+    changed 为 None 表示从头开始 (首次全量同步)。
+    """
+    changed: tuple[datetime, Any] | None
+    deleted: tuple[datetime, int]
+
+
+def _encode_position(position: tuple[datetime, Any] | None) -> list | None:
+    return None if position is None else [position[0].isoformat(), position[1]]
+
+
+def _decode_position(value: list | None) -> tuple[datetime, Any] | None:
+    if value is None:
+        return None
+    timestamp, key = value
+    return datetime.fromisoformat(timestamp), key
+
+
+def encode_sync_cursor(cursor: SyncCursor) -> str:
+    """把游标编码成不透明的字符串 (URL 安全的 base64)，客户端原样传回。"""
+    raw = json.dumps({"c": _encode_position(cursor.changed), "d": _encode_position(cursor.deleted)},
+                     separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_sync_cursor(value: str) -> SyncCursor:
+    """解析客户端传回的游标，格式不正确时抛出 ValueError。"""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+        deleted = _decode_position(raw["d"])
+        if deleted is None:
+            raise ValueError("missing tombstone position")
+        return SyncCursor(changed=_decode_position(raw["c"]), deleted=deleted)
+    except (TypeError, KeyError, ValueError) as e:  # 包括 base64 / JSON / 时间格式错误
+        raise ValueError(f"无效的同步游标: {e}") from e
+
+
+def ensure_sync_columns(connection: Connection, metadata: MetaData):
+    """
+    为已存在的表补建 updated_at 列和索引 (用于 lifespan 中的 run_sync，create_all 不会修改已有的表)。
+    已有的行以当前时间作为修改时间，客户端的下一次增量同步会收到它们一次。
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    for table in metadata.sorted_tables:
+        column = table.columns.get(UPDATED_AT_COLUMN)
+        if column is None or table.name not in existing_tables:
+            continue
+        if UPDATED_AT_COLUMN in {col["name"] for col in inspector.get_columns(table.name)}:
+            continue
+        column_type = column.type.compile(dialect=connection.dialect)
+        preparer = connection.dialect.identifier_preparer
+        connection.execute(text(f"ALTER TABLE {preparer.format_table(table)} "
+                                f"ADD COLUMN {preparer.format_column(column)} {column_type}"))
+        connection.execute(update(table).values({UPDATED_AT_COLUMN: utcnow()}))
+        for index in table.indexes:
+            if column in index.columns.values():
+                index.create(connection)
+        logger.info(f"DELTA_SYNC: 为已存在的表 {table.name} 补建了 {UPDATED_AT_COLUMN} 列。")
+
+
+async def prune_tombstones(session: AsyncSession, retention_days: int) -> int:
+    """删除超过保留期的墓碑，返回删除的条数。"""
+    cutoff = utcnow() - timedelta(days=retention_days)
+    result = await session.execute(delete(Tombstone).where(Tombstone.deleted_at < cutoff))
+    await session.commit()
+    return result.rowcount
+
+
+async def run_tombstone_pruner(session_factory: Callable[[], AsyncSession], retention_days: int,
+                               interval_seconds: float):
+    """一个后台任务，定期清理过期的墓碑。"""
+    try:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                async with session_factory() as session:
+                    pruned = await prune_tombstones(session, retention_days)
+                if pruned:
+                    logger.info(f"DELTA_SYNC: 清理了 {pruned} 条过期的墓碑。")
+            except Exception as e:
+                logger.warning(f"DELTA_SYNC: 清理墓碑失败: {e}")
+    except asyncio.CancelledError:
+        logger.info("墓碑清理任务正在正常停止。")
@@ -0,0 +1,275 @@
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Type
+
+from sqlalchemy import event, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.exceptions.exceptions import AppException
+from app.exceptions.error_codes import ErrorCode
+
+logger = logging.getLogger(__name__)
+
+# 所有已注册的全文索引，lifespan 会在启动时为已有的表补建索引
+FULLTEXT_INDEXES: list["FullTextSearch"] = []
+
+# SQLite trigram 分词器只能匹配至少 3 个字符的子串，更短的查询直接拒绝 (否则只能扫描整张表)
+SQLITE_TRIGRAM_MIN_LENGTH = 3
+
+
+def ensure_fulltext_indexes(connection: Connection):
+    """为所有已注册的全文索引补建原生索引 (用于 lifespan 中的 run_sync)。"""
+    for index in FULLTEXT_INDEXES:
+        index.ensure_index(connection)
+
+
+class InvertedIndex:
+    """
+    进程内的倒排索引 (字符二元组 -> 主键集合)，用于没有原生全文索引的部署。
+    写操作只标记变更的主键，下一次搜索时用一条 IN 查询批量刷新。
+    """
+
+    def __init__(self):
+        self._postings: dict[str, set] = defaultdict(set)
+        self._documents: dict[Any, str] = {}
+        self._pending: set = set()
+        self._built_at: float | None = None
+
+    @staticmethod
+    def _grams(value: str) -> set[str]:
+        """查询使用的 gram: 单字符查询用单字，否则用二元组。"""
+        value = value.lower()
+        if len(value) < 2:
+            return {value} if value else set()
+        return {value[i:i + 2] for i in range(len(value) - 1)}
+
+    @classmethod
+    def _document_grams(cls, document: str) -> set[str]:
+        """文档同时索引单字和二元组，以支持单字符查询。"""
+        return cls._grams(document) | set(document.lower())
+
+    def _add(self, doc_id: Any, document: str):
+        self._remove(doc_id)
+        self._documents[doc_id] = document.lower()
+        for gram in self._document_grams(document):
+            self._postings[gram].add(doc_id)
+
+    def _remove(self, doc_id: Any):
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return
+        for gram in self._document_grams(document):
+            postings = self._postings.get(gram)
+            if postings:
+                postings.discard(doc_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def mark_changed(self, doc_id: Any):
+        self._pending.add(doc_id)
+
+    @property
+    def pending_ids(self) -> set:
+        return set(self._pending)
+
+    def needs_rebuild(self) -> bool:
+        if self._built_at is None:
+            return True
+        return time.monotonic() - self._built_at > settings.SEARCH_FALLBACK_REBUILD_SECONDS
+
+    def rebuild(self, documents: dict[Any, str]):
+        self._postings.clear()
+        self._documents.clear()
+        self._pending.clear()
+        for doc_id, document in documents.items():
+            self._add(doc_id, document)
+        self._built_at = time.monotonic()
+
+    def refresh(self, documents: dict[Any, str]):
+        """用最新的数据刷新待处理的主键；documents 中缺失的主键视为已删除。"""
+        for doc_id in self._pending:
+            if doc_id in documents:
+                self._add(doc_id, documents[doc_id])
+            else:
+                self._remove(doc_id)
+        self._pending.clear()
+
+    def search(self, query: str) -> list[tuple[Any, int]]:
+        """返回 (主键, 命中次数) 列表，按命中次数降序、主键升序排列。"""
+        query = query.lower()
+        grams = self._grams(query)
+        if not grams:
+            return []
+        candidates = set.intersection(*(self._postings.get(gram, set()) for gram in grams))
+        hits = []
+        for doc_id in candidates:
+            occurrences = self._documents[doc_id].count(query)
+            if occurrences:
+                hits.append((doc_id, occurrences))
+        hits.sort(key=lambda hit: (-hit[1], hit[0]))
+        return hits
+
+
+class FullTextSearch:
+    """
+    为一个模型的若干文本列提供排序、分页的全文搜索。
+    - MySQL: 在这些列上建立 FULLTEXT 索引 (ngram 解析器，支持中文)，使用 MATCH ... AGAINST。
+    - SQLite: 建立 FTS5 外部内容影子表 (trigram 分词，支持子串)，由触发器与主表保持同步；
+      短于 SQLITE_TRIGRAM_MIN_LENGTH 的查询无法使用索引，直接拒绝。
+    - 其他数据库或索引不存在时: 回退到进程内的 InvertedIndex。
+    """
+
+    def __init__(self, model: Type, columns: list[str]):
+        self.model = model
+        self.table = model.__table__
+        self.columns = columns
+        self.pk_name = self.table.primary_key.columns[0].name
+        self.fts_table = f"{self.table.name}_fts"
+        self.mysql_index = f"ft_{self.table.name}_{'_'.join(columns)}"
+        self._native_available: dict[str, bool] = {}
+        self._fallback = InvertedIndex()
+
+        # 通过 create_all 新建表时同时建立全文索引
+        event.listen(self.table, "after_create", lambda target, connection, **kw: self.ensure_index(connection))
+        FULLTEXT_INDEXES.append(self)
+
+    # --- 索引的建立 ---
+    def _sqlite_ddl(self) -> list[str]:
+        table, fts, pk = self.table.name, self.fts_table, self.pk_name
+        cols = ", ".join(self.columns)
+        new_values = ", ".join(f"new.{c}" for c in self.columns)
+        old_values = ", ".join(f"old.{c}" for c in self.columns)
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{cols}, content='{table}', content_rowid='{pk}', tokenize='trigram')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.{pk}, {new_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{pk}, {old_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{pk}, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.{pk}, {new_values}); END",
+        ]
+
+    def _has_native_index(self, connection: Connection) -> bool:
+        dialect = connection.dialect.name
+        if dialect == "sqlite":
+            stmt = text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name")
+            return connection.execute(stmt, {"name": self.fts_table}).first() is not None
+        if dialect == "mysql":
+            stmt = text(
+                "SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() "
+                "AND table_name = :table AND index_type = 'FULLTEXT' AND index_name = :index LIMIT 1"
+            )
+            return connection.execute(stmt, {"table": self.table.name, "index": self.mysql_index}).first() is not None
+        return False
+
+    def ensure_index(self, connection: Connection):
+        """幂等地建立原生全文索引 (同步函数，可用于 run_sync 和 DDL 事件)。"""
+        dialect = connection.dialect.name
+        if dialect not in ("sqlite", "mysql"):
+            logger.info(f"SEARCH: {dialect} 不支持原生全文索引，{self.table.name} 将使用进程内索引。")
+            return
+        existed = self._has_native_index(connection)
+        try:
+            if dialect == "sqlite":
+                for stmt in self._sqlite_ddl():
+                    connection.execute(text(stmt))
+                if not existed:
+                    # 为已有数据建立索引
+                    connection.execute(text(f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('rebuild')"))
+            elif not existed:
+                connection.execute(text(
+                    f"ALTER TABLE {self.table.name} ADD FULLTEXT INDEX {self.mysql_index} "
+                    f"({', '.join(self.columns)}) WITH PARSER ngram"
+                ))
+        except Exception as e:
+            # 例如 SQLite 未编译 FTS5/trigram，或 MySQL 缺少 ngram 解析器: 不影响启动，搜索回退到进程内索引
+            logger.warning(f"SEARCH: 为 {self.table.name} 建立全文索引失败，将使用进程内索引。错误: {e}")
+            return
+        finally:
+            self._native_available.pop(str(connection.engine.url), None)
+        if not existed:
+            logger.info(f"SEARCH: 已为 {self.table.name} 建立全文索引。")
+
+    async def _native_engine(self, db: AsyncSession) -> str | None:
+        """返回可用的原生搜索引擎名称，结果按数据库 URL 缓存。"""
+        bind = db.get_bind()
+        key = str(bind.url)
+        if key not in self._native_available:
+            connection = await db.connection()
+            self._native_available[key] = await connection.run_sync(self._has_native_index)
+        if not self._native_available[key]:
+            return None
+        return {"sqlite": "fts5", "mysql": "mysql_fulltext"}.get(bind.dialect.name)
+
+    # --- 写操作通知 (仅影响进程内索引) ---
+    def mark_changed(self, pk_value: Any):
+        self._fallback.mark_changed(pk_value)
+
+    # --- 搜索 ---
+    def _select_columns(self) -> str:
+        return ", ".join(f"{self.table.name}.{col.name}" for col in self.table.columns)
+
+    async def _search_fts5(self, db: AsyncSession, query: str, offset: int, limit: int):
+        match = '"' + query.replace('"', '""') + '"'
+        fts, table, pk = self.fts_table, self.table.name, self.pk_name
+        rows = await db.execute(text(
+            f"SELECT {self._select_columns()} FROM {fts} JOIN {table} ON {table}.{pk} = {fts}.rowid "
+            f"WHERE {fts} MATCH :match ORDER BY bm25({fts}) LIMIT :limit OFFSET :offset"
+        ), {"match": match, "limit": limit, "offset": offset})
+        total = await db.scalar(text(f"SELECT count(*) FROM {fts} WHERE {fts} MATCH :match"), {"match": match})
+        return [dict(row) for row in rows.mappings()], total
+
+    async def _search_mysql(self, db: AsyncSession, query: str, offset: int, limit: int):
+        against = f"MATCH ({', '.join(self.columns)}) AGAINST (:query IN NATURAL LANGUAGE MODE)"
+        rows = await db.execute(text(
+            f"SELECT {self._select_columns()} FROM {self.table.name} WHERE {against} "
+            f"ORDER BY {against} DESC LIMIT :limit OFFSET :offset"
+        ), {"query": query, "limit": limit, "offset": offset})
+        total = await db.scalar(text(f"SELECT count(*) FROM {self.table.name} WHERE {against}"), {"query": query})
+        return [dict(row) for row in rows.mappings()], total
+
+    async def _load_documents(self, db: AsyncSession, ids: set | None = None) -> dict[Any, str]:
+        pk = getattr(self.model, self.pk_name)
+        stmt = select(pk, *(getattr(self.model, col) for col in self.columns))
+        if ids is not None:
+            stmt = stmt.where(pk.in_(ids))
+        result = await db.execute(stmt)
+        return {row[0]: "\n".join(value or "" for value in row[1:]) for row in result}
+
+    async def _search_fallback(self, db: AsyncSession, query: str, offset: int, limit: int):
+        if self._fallback.needs_rebuild():
+            self._fallback.rebuild(await self._load_documents(db))
+        elif pending_ids := self._fallback.pending_ids:
+            self._fallback.refresh(await self._load_documents(db, pending_ids))
+
+        hits = self._fallback.search(query)
+        page_ids = [doc_id for doc_id, _ in hits[offset:offset + limit]]
+        if not page_ids:
+            return [], len(hits)
+        pk = getattr(self.model, self.pk_name)
+        result = await db.execute(select(*self.table.columns).where(pk.in_(page_ids)))
+        rows_by_id = {row[self.pk_name]: dict(row) for row in result.mappings()}
+        return [rows_by_id[doc_id] for doc_id in page_ids if doc_id in rows_by_id], len(hits)
+
+    async def search(self, db: AsyncSession, query: str, offset: int = 0, limit: int = 100) -> dict:
+        """
+        执行搜索，返回 {"data": [行字典...], "total_count": int, "engine": str}，data 按相关度排序。
+        """
+        engine = await self._native_engine(db)
+        if engine == "fts5" and len(query) < SQLITE_TRIGRAM_MIN_LENGTH:
+            raise AppException(ErrorCode.VALIDATION_ERROR,
+                               detail=f"搜索关键词至少需要 {SQLITE_TRIGRAM_MIN_LENGTH} 个字符。")
+
+        if engine == "fts5":
+            data, total = await self._search_fts5(db, query, offset, limit)
+        elif engine == "mysql_fulltext":
+            data, total = await self._search_mysql(db, query, offset, limit)
+        else:
+            engine = "fallback"
+            data, total = await self._search_fallback(db, query, offset, limit)
+        return {"data": data, "total_count": total or 0, "engine": engine}
@@ -0,0 +1,123 @@
+# app/db/hot_keys.py
+
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SpaceSavingTopK:
+    """
+    Space-Saving 算法: 用固定的 capacity 个计数器近似统计出现次数最多的键。
+    新键在计数器满时替换计数最小的键，并继承其计数 (记入 error)，因此真正的热点键不会被挤出。
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._counts: dict[str, int] = {}
+        self._errors: dict[str, int] = {}
+
+    def offer(self, key: str, count: int = 1):
+        if key in self._counts:
+            self._counts[key] += count
+            return
+        if len(self._counts) < self.capacity:
+            self._counts[key] = count
+            self._errors[key] = 0
+            return
+        victim = min(self._counts, key=self._counts.__getitem__)
+        floor = self._counts.pop(victim)
+        self._errors.pop(victim, None)
+        self._counts[key] = floor + count
+        self._errors[key] = floor
+
+    def top(self, n: int) -> list[tuple[str, int]]:
+        return sorted(self._counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def decay(self):
+        """计数减半，让统计跟随访问模式的变化；减到 0 的键被移除。"""
+        for key in list(self._counts):
+            self._counts[key] //= 2
+            self._errors[key] //= 2
+            if self._counts[key] == 0:
+                del self._counts[key]
+                del self._errors[key]
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+class HotKeyTracker:
+    """
+    (新增) 按模型统计 get_by_id 访问最多的主键，定期持久化到文件，
+    重启 (或 Redis 故障切换) 后 lifespan 用它预热缓存。
+    """
+
+    def __init__(self, capacity: int, path: str | Path):
+        self.capacity = capacity
+        self.path = Path(path)
+        self._models: dict[str, SpaceSavingTopK] = {}
+
+    def record(self, model_name: str, entity_id: Any):
+        sketch = self._models.get(model_name)
+        if sketch is None:
+            sketch = self._models[model_name] = SpaceSavingTopK(self.capacity)
+        sketch.offer(str(entity_id))
+
+    def top(self, model_name: str, n: int) -> list[tuple[str, int]]:
+        sketch = self._models.get(model_name)
+        return sketch.top(n) if sketch else []
+
+    def snapshot(self, n: int | None = None) -> dict[str, list[tuple[str, int]]]:
+        return {name: sketch.top(n or self.capacity) for name, sketch in self._models.items()}
+
+    def save(self):
+        """原子地写入文件 (先写临时文件再替换)，然后让计数衰减。"""
+        data = self.snapshot()
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        for sketch in self._models.values():
+            sketch.decay()
+
+    def load(self):
+        """读取上次持久化的热点键，作为本进程统计的初始值。"""
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"HOT_KEYS: 读取 {self.path} 失败，忽略: {e}")
+            return
+        for model_name, entries in data.items():
+            sketch = self._models.setdefault(model_name, SpaceSavingTopK(self.capacity))
+            for key, count in entries:
+                sketch.offer(str(key), int(count))
+        logger.info(f"HOT_KEYS: 从 {self.path} 载入了 {sum(len(entries) for entries in data.values())} 个热点键。")
+
+
+hot_key_tracker = HotKeyTracker(capacity=settings.HOT_KEYS_CAPACITY, path=settings.HOT_KEYS_FILE)
+
+
+async def run_hot_key_persister(interval_seconds: float):
+    """一个后台任务，定期把热点键写入文件；停止时再写一次。"""
+    try:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(hot_key_tracker.save)
+            except OSError as e:
+                logger.warning(f"HOT_KEYS: 写入 {hot_key_tracker.path} 失败: {e}")
+    except asyncio.CancelledError:
+        try:
+            hot_key_tracker.save()
+        except OSError as e:
+            logger.warning(f"HOT_KEYS: 写入 {hot_key_tracker.path} 失败: {e}")
+        logger.info("热点键持久化任务正在正常停止。")
@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.logging_config import request_id_var, action_var
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("slow_query")
+
+# EXPLAIN 本身也会经过引擎事件，用它来跳过对自身的统计
+_explaining_var: ContextVar[bool] = ContextVar("explaining", default=False)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?|:\w+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint_statement(statement: str) -> tuple[str, str]:
+    """
+    将 SQL 归一化 (字面量和占位符统一为 ?，IN 列表折叠，空白合并)，
+    返回 (指纹, 归一化后的语句)。参数不同但结构相同的语句指纹相同。
+    """
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("(?...)", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12], normalized
+
+
+class SlowQueryTracker:
+    """
+    滚动保存最慢的 N 个语句指纹 (按累计耗时)。
+    满了之后新指纹会替换累计耗时最少的条目，因此内存占用有上限。
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: dict[str, dict[str, Any]] = {}
+
+    def record(self, fingerprint: str, statement: str, elapsed_ms: float) -> dict[str, Any]:
+        entry = self._entries.get(fingerprint)
+        if entry is None:
+            if len(self._entries) >= self.max_entries:
+                coldest = min(self._entries, key=lambda key: self._entries[key]["total_ms"])
+                del self._entries[coldest]
+            entry = self._entries[fingerprint] = {
+                "fingerprint": fingerprint, "statement": statement, "count": 0,
+                "total_ms": 0.0, "max_ms": 0.0, "explain": None,
+            }
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        entry["last_ms"] = elapsed_ms
+        entry["last_request_id"] = request_id_var.get()
+        entry["last_action"] = action_var.get()
+        entry["last_seen"] = time.time()
+        return entry
+
+    def set_explain(self, fingerprint: str, plan: list[str]):
+        if entry := self._entries.get(fingerprint):
+            entry["explain"] = plan
+
+    def top(self, limit: int | None = None) -> list[dict[str, Any]]:
+        entries = sorted(self._entries.values(), key=lambda entry: entry["total_ms"], reverse=True)
+        return [dict(entry, avg_ms=entry["total_ms"] / entry["count"]) for entry in entries[:limit]]
+
+    def clear(self):
+        self._entries.clear()
+
+
+slow_query_tracker = SlowQueryTracker(max_entries=settings.SLOW_QUERY_TOP_N)
+
+# 待执行 EXPLAIN 的慢语句，由后台任务消费，不阻塞请求
+_explain_queue: asyncio.Queue | None = None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # 计时保存在本次执行的 context 上，语句失败时不会残留
+    if context is not None:
+        context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_time = getattr(context, "_query_start_time", None)
+    if start_time is None:
+        return
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    if elapsed_ms < settings.SLOW_QUERY_THRESHOLD_MS or _explaining_var.get():
+        return
+
+    fingerprint, normalized = fingerprint_statement(statement)
+    entry = slow_query_tracker.record(fingerprint, normalized, elapsed_ms)
+    slow_query_logger.warning(
+        f"SLOW_QUERY: {elapsed_ms:.2f}ms [action={action_var.get()}] [fingerprint={fingerprint}] {normalized}"
+    )
+
+    is_select = statement.lstrip().upper().startswith("SELECT")
+    if _explain_queue is not None and is_select and entry["explain"] is None and not executemany:
+        try:
+            _explain_queue.put_nowait((fingerprint, statement, parameters))
+        except asyncio.QueueFull:
+            logger.debug(f"SLOW_QUERY: EXPLAIN 队列已满，跳过 {fingerprint}")
+
+
+def install_query_instrumentation(engine: AsyncEngine):
+    """在引擎上挂载 SQL 计时事件。重复调用是安全的。"""
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        logger.info(f"SQL 计时已启用，慢查询阈值: {settings.SLOW_QUERY_THRESHOLD_MS}ms")
+
+
+async def run_explain_worker(engine: AsyncEngine):
+    """一个后台任务，在独立连接上为慢语句执行 EXPLAIN，并把执行计划保存到 slow_query_tracker。"""
+    global _explain_queue
+    _explain_queue = asyncio.Queue(maxsize=100)
+    explain_prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    _explaining_var.set(True)
+    try:
+        while True:
+            fingerprint, statement, parameters = await _explain_queue.get()
+            try:
+                async with engine.connect() as conn:
+                    result = await conn.exec_driver_sql(explain_prefix + statement, parameters)
+                    plan = [" | ".join(str(value) for value in row) for row in result]
+                slow_query_tracker.set_explain(fingerprint, plan)
+            except Exception as e:
+                logger.warning(f"SLOW_QUERY: 为 {fingerprint} 执行 EXPLAIN 失败: {e}")
+    except asyncio.CancelledError:
+        logger.info("EXPLAIN 后台任务正在正常停止。")
+    finally:
+        _explain_queue = None
@@ -0,0 +1,100 @@
+# app/db/query_coalescer.py
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def make_query_key(parts: dict) -> str:
+    """把规范化后的查询参数 (offset/limit/过滤/排序/展开) 转成稳定的字符串键，与参数顺序无关。"""
+    return json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class QueryCoalescer:
+    """
+    (新增) 合并进程内完全相同且同时在途的列表查询。
+    同一个键的第一个请求 ("leader") 在自己的会话上执行查询并构造结果，其余并发请求等待并共享同一个结果对象
+    (同一次 get_multi + COUNT，同一份 Pydantic 模型)。
+    micro_ttl_ms > 0 时结果在这段时间内继续复用，用于吸收仪表盘轮询的突发；写操作调用 invalidate 后立即失效。
+    """
+
+    def __init__(self, micro_ttl_ms: float = 0, max_entries: int = 256):
+        self.micro_ttl_seconds = micro_ttl_ms / 1000
+        self.max_entries = max_entries
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._results: dict[str, tuple[float, Any]] = {}
+        # 每次写操作递增；失效之前开始的查询结果不会写入 micro-TTL 缓存
+        self._generation = 0
+        # 统计
+        self.executions = 0
+        self.coalesced = 0
+        self.micro_ttl_hits = 0
+
+    async def run(self, key: str, loader: Callable[[], Awaitable[T]]) -> T:
+        if self.micro_ttl_seconds > 0:
+            cached = self._results.get(key)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    self.micro_ttl_hits += 1
+                    return cached[1]
+                del self._results[key]
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # shield: 某个等待者被取消时，不能连带取消共享同一个 future 的其他请求
+            return await asyncio.shield(future)
+
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        generation = self._generation
+        self.executions += 1
+        try:
+            result = await loader()
+        except BaseException as e:
+            # leader 失败或被取消时，不能让等待中的请求永远挂起；失败的结果不缓存
+            error = e if isinstance(e, Exception) else RuntimeError(f"合并查询被中断: {e!r}")
+            future.set_exception(error)
+            future.exception()  # 没有等待者时也视为已取回，避免 "exception was never retrieved" 警告
+            raise
+        else:
+            future.set_result(result)
+            if self.micro_ttl_seconds > 0 and generation == self._generation:
+                if len(self._results) >= self.max_entries:
+                    self._evict()
+                self._results[key] = (time.monotonic() + self.micro_ttl_seconds, result)
+            return result
+        finally:
+            # invalidate 之后可能已有新的 leader 占用了这个键，只移除自己的 future
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _evict(self):
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._results.items() if expires_at <= now]:
+            del self._results[key]
+        if len(self._results) >= self.max_entries:
+            # 仍然满: 丢弃最早写入的条目
+            del self._results[next(iter(self._results))]
+
+    def invalidate(self):
+        """数据发生变化: 丢弃复用中的结果；之后到达的请求不再加入变化之前开始的查询。"""
+        self._generation += 1
+        self._results.clear()
+        self._inflight.clear()
+
+    def stats(self) -> dict:
+        requests = self.executions + self.coalesced + self.micro_ttl_hits
+        return {
+            "micro_ttl_ms": self.micro_ttl_seconds * 1000,
+            "requests": requests,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "micro_ttl_hits": self.micro_ttl_hits,
+            "saved_ratio": round(1 - self.executions / requests, 3) if requests else None,
+        }
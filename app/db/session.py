@@ -1,7 +1,8 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
-from typing import AsyncGenerator # (关键修复) 导入 AsyncGenerator
+from typing import Any, AsyncGenerator, Callable # (关键修复) 导入 AsyncGenerator
 
 # 调用 get_database_url() 方法来获取连接字符串
 engine = create_async_engine(settings.get_database_url(), pool_pre_ping=True)
@@ -14,9 +15,59 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+
+class LazySession:
+    """
+    (新增) AsyncSession 的惰性代理: 第一次访问属性 (execute、get、commit...) 时才创建真正的会话。
+    由缓存直接命中的请求从不创建会话，也就不会占用连接池。
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession]):
+        self._session_factory = session_factory
+        self._session: AsyncSession | None = None
+
+    @property
+    def is_started(self) -> bool:
+        """是否已经创建了真正的会话。"""
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._session_factory()
+        return getattr(self._session, name)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+async def lazy_session(session_factory: Callable[[], AsyncSession]) -> AsyncGenerator[AsyncSession, None]:
+    """提供一个 LazySession，并在请求结束后关闭它 (如果真的创建过会话)。"""
+    session = LazySession(session_factory)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     一个异步生成器，用于提供数据库会话的依赖注入。
+    会话是惰性创建的，见 LazySession。
+    """
+    async for session in lazy_session(SessionLocal):
+        yield session
+
+def has_spare_connections(bind: AsyncEngine | None, needed: int = 2) -> bool:
+    """
+    (新增) 连接池中是否还能再借出 needed 个连接 (不等待)。
+    只有 QueuePool 能可靠地回答；StaticPool (例如 SQLite 内存库) 等其他连接池一律返回 False，
+    调用方应退回到在同一个会话上顺序执行。
     """
-    async with SessionLocal() as session:
-        yield session
\ No newline at end of file
+    pool = getattr(bind, "sync_engine", bind).pool if bind is not None else None
+    if not isinstance(pool, QueuePool):
+        return False
+    # 已创建的连接数为 size() + overflow() (尚未建满时 overflow() 为负)，其中空闲的加上池内还能新建的，
+    # 即 size() + max(overflow(), 0) - checkedout()。不把溢出额度算在内: 并发 COUNT 不应让连接池开始溢出
+    return pool.size() + max(pool.overflow(), 0) - pool.checkedout() >= needed
@@ -147,6 +147,11 @@ class ErrorCode:
         "message": "不允许对处于当前状态的资源执行所请求的操作。",
         "status_code": 409
     }
+    SYNC_CURSOR_EXPIRED = {
+        "code": "SYNC_CURSOR_EXPIRED",
+        "message": "同步游标已过期，请重新进行全量同步。",
+        "status_code": 410
+    }
 
     # =================================================================
     # 5. 服务端错误 (Server Errors) - 5xx
@@ -1,6 +1,8 @@
 import logging
 from fastapi import Request
-from fastapi.responses import JSONResponse
+from fastapi.exceptions import RequestValidationError
+
+from app.core.responses import ErrorResponse
 
 from app.exceptions.exceptions import AppException
 from app.exceptions.error_codes import ErrorCode
@@ -23,7 +25,8 @@ async def app_exception_handler(request: Request, exc: AppException):
         f"Code={error_content['code']}, Message={error_content['message']}"
     )
 
-    return JSONResponse(
+    return ErrorResponse(
+        request,
         status_code=exc.status_code,
         content={
             "code": error_content.get("code"),
@@ -33,6 +36,30 @@ async def app_exception_handler(request: Request, exc: AppException):
     )
 
 
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    """
+    (新增) 处理请求体校验失败 (例如未知的 action 或不合法的 payload)。
+    返回与业务异常一致的扁平化结构，details 中逐条列出出错的位置和原因，而不是一整段字符串。
+    """
+    error_code_info = ErrorCode.VALIDATION_ERROR
+    details = [
+        {"loc": list(error["loc"]), "msg": error["msg"], "type": error["type"]}
+        for error in exc.errors()
+    ]
+    error_logger.warning(
+        f"Validation error on request {request.method} {request.url.path}: {details}"
+    )
+    return ErrorResponse(
+        request,
+        status_code=error_code_info.get("status_code", 400),
+        content={
+            "code": error_code_info.get("code"),
+            "message": error_code_info.get("message"),
+            "details": details
+        }
+    )
+
+
 async def generic_exception_handler(request: Request, exc: Exception):
     """处理所有未捕获的服务器内部错误。"""
     error_logger.error(
@@ -44,7 +71,8 @@ async def generic_exception_handler(request: Request, exc: Exception):
     error_code_info = ErrorCode.UNEXPECTED_ERROR
 
     # 返回与 app_exception_handler 完全一致的扁平化结构
-    return JSONResponse(
+    return ErrorResponse(
+        request,
         status_code=500,
         content={
             "code": error_code_info.get("code"),
@@ -9,7 +9,9 @@ from pathlib import Path
 from app.core.lifespan import lifespan  # 生命周期管理器
 from app.api import api_router              # 主路由器
 from app.middleware.logging import log_and_validate_requests  # 中间件函数
-from app.exceptions.handlers import app_exception_handler, generic_exception_handler  # 异常处理器
+from app.middleware.compression import CompressionMiddleware
+from app.exceptions.handlers import app_exception_handler, validation_exception_handler, generic_exception_handler  # 异常处理器
+from fastapi.exceptions import RequestValidationError
 from app.exceptions.exceptions import AppException # 导入自定义异常基类，使用完整路径
 
 
@@ -30,9 +32,19 @@ def create_app() -> FastAPI:
 
     # 3. 注册中间件
     _app.add_middleware(BaseHTTPMiddleware, dispatch=log_and_validate_requests)
+    # (新增) 响应压缩放在最外层，日志中间件看到的仍是未压缩的响应
+    if settings.RESPONSE_COMPRESSION:
+        _app.add_middleware(
+            CompressionMiddleware,
+            encodings=settings.RESPONSE_COMPRESSION_ENCODINGS,
+            minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE,
+            levels=settings.RESPONSE_COMPRESSION_LEVELS,
+            offload_size=settings.RESPONSE_COMPRESSION_OFFLOAD_SIZE,
+        )
 
     # 4. 注册全局异常处理器
     _app.add_exception_handler(AppException, app_exception_handler)
+    _app.add_exception_handler(RequestValidationError, validation_exception_handler)
     _app.add_exception_handler(Exception, generic_exception_handler)
 
     # 5. 包含我们的主 API 路由器
@@ -0,0 +1,239 @@
+# app/middleware/compression.py
+
+import gzip
+import importlib
+import logging
+import zlib
+from typing import Any, Callable
+
+import anyio
+
+logger = logging.getLogger(__name__)
+
+# 不值得再压缩的内容类型 (已压缩的格式)；text/event-stream 需要逐条立即送达，不能为凑够阈值而缓冲
+_EXCLUDED_CONTENT_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip",
+                           "application/x-gzip", "application/zstd", "text/event-stream")
+
+# 可选依赖: 编码名称 -> (导入路径, pip 包名)。未安装时不参与协商，gzip 始终可用。
+_OPTIONAL_MODULES = {
+    "br": ("brotli", "brotli"),
+    "zstd": ("zstandard", "zstandard"),
+}
+
+
+class _StreamCompressor:
+    """流式压缩: 每个分块压缩后立即 flush，客户端可以边收边解压。"""
+
+    def __init__(self, compress: Callable[[bytes], bytes], finish: Callable[[], bytes]):
+        self.compress = compress
+        self.finish = finish
+
+
+class _Encoder:
+    def __init__(self, name: str, level: int, module: Any = None):
+        self.name = name
+        self.level = level
+        self.module = module
+
+    def compress(self, data: bytes) -> bytes:
+        if self.name == "br":
+            return self.module.compress(data, quality=self.level)
+        if self.name == "zstd":
+            # ZstdCompressor 不能被多个线程同时使用，每次新建
+            return self.module.ZstdCompressor(level=self.level).compress(data)
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def stream(self) -> _StreamCompressor:
+        if self.name == "br":
+            compressor = self.module.Compressor(quality=self.level)
+            return _StreamCompressor(lambda chunk: compressor.process(chunk) + compressor.flush(),
+                                     compressor.finish)
+        if self.name == "zstd":
+            compressor = self.module.ZstdCompressor(level=self.level).compressobj()
+            flush_block = self.module.COMPRESSOBJ_FLUSH_BLOCK
+            return _StreamCompressor(lambda chunk: compressor.compress(chunk) + compressor.flush(flush_block),
+                                     compressor.flush)
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return _StreamCompressor(lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+                                 compressor.flush)
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """把 Accept-Encoding 解析为 编码 -> q 值，例如 "gzip, br;q=0.8" -> {"gzip": 1.0, "br": 0.8}。"""
+    result = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        result[name] = q
+    return result
+
+
+class CompressionMiddleware:
+    """
+    (新增) 按 Accept-Encoding 协商的响应压缩 (纯 ASGI 中间件，支持流式响应)。
+    - encodings 是服务端的偏好顺序，客户端 q 值相同时按它选择；br / zstd 需要可选依赖，未安装时跳过；
+    - 小于 minimum_size 字节的响应原样返回，不为压缩付出延迟；
+    - 超过 offload_size 字节的响应体在线程池中压缩，不阻塞事件循环；
+    - 流式响应先缓冲到 minimum_size，之后每个分块压缩并 flush 后立即发送；
+    - 已经编码过的响应、不适合压缩的内容类型以及 204/206/304 响应直接透传。
+    压缩后强 ETag 改为弱 ETag (同一实体的不同编码字节不同)，If-None-Match 比较时会忽略 W/ 前缀。
+    """
+
+    def __init__(self, app, encodings: list[str] | None = None, minimum_size: int = 1024,
+                 levels: dict[str, int] | None = None, offload_size: int = 256 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        levels = {"gzip": 6, "br": 4, "zstd": 3, **(levels or {})}
+        self.encoders: dict[str, _Encoder] = {}
+        for name in encodings or ["zstd", "br", "gzip"]:
+            if name == "gzip":
+                self.encoders[name] = _Encoder(name, levels[name])
+            elif name in _OPTIONAL_MODULES:
+                import_path, package = _OPTIONAL_MODULES[name]
+                try:
+                    self.encoders[name] = _Encoder(name, levels[name], importlib.import_module(import_path))
+                except ImportError:
+                    logger.info(f"COMPRESSION: 未安装 '{package}'，不提供 {name} 编码 (pip install {package})。")
+            else:
+                raise ValueError(f"未知的响应压缩编码: '{name}'，可选值: ['gzip', 'br', 'zstd']")
+
+    def select_encoding(self, accept_encoding: str) -> _Encoder | None:
+        """选择客户端接受 (q > 0) 且 q 值最高的编码；q 值相同时按服务端偏好顺序。"""
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        best, best_q = None, 0.0
+        for name, encoder in self.encoders.items():
+            q = accepted.get(name, wildcard)
+            if q > best_q:
+                best, best_q = encoder, q
+        return best
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoder = self.select_encoding(accept_encoding) if accept_encoding else None
+        if encoder is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, encoder, send).run(self.app, scope, receive)
+
+    async def _run_compress(self, func: Callable[[bytes], bytes], data: bytes) -> bytes:
+        if len(data) >= self.offload_size:
+            return await anyio.to_thread.run_sync(func, data)
+        return func(data)
+
+
+class _CompressedResponder:
+    """一次请求的压缩状态: 暂存 response.start，根据第一个 (或缓冲到阈值的) 响应体决定是否压缩。"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoder: _Encoder, send):
+        self.middleware = middleware
+        self.encoder = encoder
+        self.send = send
+        self.start_message: dict | None = None
+        self.passthrough = False
+        self.buffer = bytearray()
+        self.stream: _StreamCompressor | None = None
+
+    async def run(self, app, scope, receive):
+        await app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._eligible(message)
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.stream is not None:
+            await self._send_stream_chunk(body, more_body)
+            return
+
+        self.buffer += body
+        if not more_body:
+            await self._send_complete()
+        elif len(self.buffer) >= self.middleware.minimum_size:
+            await self._start_stream()
+
+    def _eligible(self, message: dict) -> bool:
+        if message["status"] in (204, 206, 304):
+            return False
+        for key, value in message.get("headers", []):
+            key = key.lower()
+            if key == b"content-encoding":
+                return False
+            if key == b"content-type":
+                content_type = value.decode("latin-1").lower()
+                if content_type.startswith(_EXCLUDED_CONTENT_TYPES):
+                    return False
+        return True
+
+    def _headers(self, content_length: int | None) -> list[tuple[bytes, bytes]]:
+        headers = []
+        vary = None
+        for key, value in self.start_message.get("headers", []):
+            lower = key.lower()
+            if lower == b"content-length":
+                continue
+            if lower == b"vary":
+                vary = value
+                continue
+            if lower == b"etag" and value.startswith(b'"'):
+                value = b"W/" + value
+            headers.append((key, value))
+        headers.append((b"content-encoding", self.encoder.name.encode("latin-1")))
+        headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("latin-1")))
+        return headers
+
+    async def _send_complete(self):
+        body = bytes(self.buffer)
+        if len(body) < self.middleware.minimum_size:
+            # 小响应原样发送，content-length 不变
+            await self.send(self.start_message)
+            await self.send({"type": "http.response.body", "body": body, "more_body": False})
+            return
+        compressed = await self.middleware._run_compress(self.encoder.compress, body)
+        await self.send({**self.start_message, "headers": self._headers(len(compressed))})
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+    async def _start_stream(self):
+        self.stream = self.encoder.stream()
+        # 流式响应的最终长度未知，去掉 content-length (使用分块传输)
+        await self.send({**self.start_message, "headers": self._headers(None)})
+        body = bytes(self.buffer)
+        self.buffer.clear()
+        await self._send_stream_chunk(body, True)
+
+    async def _send_stream_chunk(self, body: bytes, more_body: bool):
+        # 同一个流式压缩器按顺序使用，即使分块在线程池中压缩也不会并发访问
+        chunk = await self.middleware._run_compress(self.stream.compress, body) if body else b""
+        if not more_body:
+            chunk += self.stream.finish()
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
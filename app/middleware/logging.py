@@ -9,6 +9,7 @@ from app.exceptions.exceptions import AppException, MissingHeaderException
 from app.exceptions.error_codes import ErrorCode
 
 from app.core.logging_config import request_id_var, user_id_var
+from app.core.responses import negotiate_format, response_format_var
 
 logger = logging.getLogger(__name__)
 api_traffic_logger = logging.getLogger("api_traffic")
@@ -23,6 +24,8 @@ async def log_and_validate_requests(request: Request, call_next):
     request_id = str(uuid.uuid4())
     request_id_var.set(request_id)
     user_id_var.set("anonymous")
+    # (新增) 响应格式按 Accept 协商 (JSON / MessagePack)，路由和处理函数通过 response_format_var 读取
+    response_format_var.set(negotiate_format(request.headers.get("accept")))
 
     response = None
     try:
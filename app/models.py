@@ -1,5 +1,7 @@
+from datetime import datetime, timezone
 from typing import Optional, List
-from sqlalchemy import Integer, String, text, Index, ForeignKey
+from sqlalchemy import Integer, String, DateTime, text, Index, ForeignKey
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 # --- (修正 1) Base 类只应被定义一次 ---
@@ -8,7 +10,37 @@ class Base(DeclarativeBase):
     pass
 
 
-class Users(Base):
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# (新增) 增量同步使用的时间戳类型: MySQL 的 DATETIME 默认只精确到秒，同一秒内的多次修改无法用游标区分，这里保留微秒
+SyncTimestamp = DateTime(timezone=True).with_variant(mysql.DATETIME(fsp=6), "mysql", "mariadb")
+
+
+class UpdatedAtMixin:
+    """
+    (新增) 可选的修改时间跟踪: 插入和更新时自动写入 updated_at (带索引)。
+    使用该 mixin 的模型提供 changes_since action，删除时由 LoggingFastCRUD.delete 写入 Tombstone。
+    已存在的表在启动时补建该列 (见 app.db.delta_sync.ensure_sync_columns)。
+    """
+    updated_at: Mapped[datetime] = mapped_column(SyncTimestamp, default=utcnow, onupdate=utcnow, index=True)
+
+
+class Tombstone(Base):
+    """(新增) 被删除实体的记录，供增量同步的客户端删除本地副本；超过保留期后清理。"""
+    __tablename__ = 'tombstones'
+    __table_args__ = (
+        Index('ix_tombstones_entity_deleted_at', 'entity', 'deleted_at', 'id'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    entity: Mapped[str] = mapped_column(String(64), nullable=False)
+    entity_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(SyncTimestamp, default=utcnow, nullable=False)
+
+
+class Users(UpdatedAtMixin, Base):
     __tablename__ = 'users'
     __table_args__ = (
         Index('email', 'email', unique=True),
@@ -23,7 +55,7 @@ class Users(Base):
     user_items: Mapped[List["Useritems"]] = relationship(back_populates="user")
 
 
-class Items(Base):
+class Items(UpdatedAtMixin, Base):
     __tablename__ = 'items'
 
     iditems: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -36,16 +68,16 @@ class Items(Base):
 
 
 # --- (新增) User-Item 关联表的模型 ---
-class Useritems(Base):
+class Useritems(UpdatedAtMixin, Base):
     __tablename__ = 'user_items'
 
     # 路由文件中使用的 CRUD 方法依赖主键名为 'id'
     id: Mapped[int] = mapped_column(primary_key=True)
 
-    # 外键，关联到 users 表的 id 字段
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    # 外键，关联到 users 表的 id 字段 (建立索引，支持 get_all 按用户/物品过滤)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     # 外键，关联到 items 表的 iditems 字段
-    item_id: Mapped[int] = mapped_column(ForeignKey("items.iditems"))
+    item_id: Mapped[int] = mapped_column(ForeignKey("items.iditems"), index=True)
 
     # 附加信息，例如用户拥有该物品的数量
     quantity: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
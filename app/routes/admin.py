@@ -0,0 +1,77 @@
+import logging
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query
+
+from app.core.config import settings
+from app.core.responses import StandardResponse, Success
+from app.db import cache
+from app.db.adaptive_ttl import adaptive_ttl
+from app.db.cache_versioning import CACHED_ENTITIES
+from app.db.codec import cache_codec
+from app.db.hot_keys import hot_key_tracker
+from app.db.instrumentation import slow_query_tracker
+from app.exceptions.error_codes import ErrorCode
+from app.exceptions.exceptions import AppException, PermissionDeniedException
+
+logger = logging.getLogger(__name__)
+
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """
+    (新增) 运维接口的访问控制: 慢查询里带有 SQL 和 request_id，指标和热点键暴露了缓存与访问模式，不能匿名访问。
+    未配置 ADMIN_API_TOKEN 时整体关闭 (403)；已配置时要求 X-Admin-Token 头与之一致 (401)。
+    """
+    if not settings.ADMIN_API_TOKEN:
+        raise PermissionDeniedException(detail="运维接口未启用，请配置 ADMIN_API_TOKEN。")
+    if x_admin_token is None:
+        raise AppException(ErrorCode.AUTHENTICATION_REQUIRED, detail="访问运维接口需要提供 X-Admin-Token 头。")
+    if not secrets.compare_digest(x_admin_token.encode(), settings.ADMIN_API_TOKEN.encode()):
+        raise AppException(ErrorCode.INVALID_TOKEN)
+
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+
+
+@router.get("/slow-queries", response_model=StandardResponse, summary="查看最慢的 SQL 语句指纹")
+async def get_slow_queries(limit: int = Query(20, ge=1, le=200)):
+    """
+    按累计耗时返回最慢的 SQL 语句指纹。
+    每个条目包含执行次数、总/平均/最大耗时、最近一次的 request_id 和 action，以及 (如已启用) EXPLAIN 结果。
+    """
+    return Success(data=slow_query_tracker.top(limit))
+
+
+@router.delete("/slow-queries", response_model=StandardResponse, summary="清空慢查询统计")
+async def clear_slow_queries():
+    slow_query_tracker.clear()
+    return Success(message="慢查询统计已清空。")
+
+
+@router.get("/metrics", response_model=StandardResponse, summary="查看运行时指标")
+async def get_metrics():
+    """
+    返回运行时指标: 缓存熔断器的状态 (closed/open)、失败次数和被绕过的缓存调用数，
+    缓存载荷编码前后的平均字节数，每个模型的读写速率和自适应 TTL，以及批量加载器和 get_all 合并器的合并效果。
+    """
+    breaker = cache.cache_backend
+    return Success(data={
+        "cache": breaker.stats() if breaker else None,
+        "cache_codec": cache_codec.stats(),
+        "cache_ttl": adaptive_ttl.stats(),
+        "batch_loaders": {
+            entity.crud.model.__name__: entity.crud.batch_loader.stats()
+            for entity in CACHED_ENTITIES if entity.crud.batch_loader is not None
+        },
+        "get_all_coalescers": {
+            entity.crud.model.__name__: entity.crud.get_all_coalescer.stats()
+            for entity in CACHED_ENTITIES if entity.crud.get_all_coalescer is not None
+        },
+    })
+
+
+@router.get("/hot-keys", response_model=StandardResponse, summary="查看 get_by_id 的热点键")
+async def get_hot_keys(limit: int = Query(20, ge=1, le=1000)):
+    """按模型返回访问次数最多的主键 (近似计数)，它们会在下次启动时被预热到缓存中。"""
+    return Success(data=hot_key_tracker.snapshot(limit))
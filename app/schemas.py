@@ -62,6 +62,11 @@ class UseritemsRead(UseritemsBase):
     id: int
     model_config = ConfigDict(from_attributes=True)
 
+# (新增) 展开关联关系后的读取模型，用于 payload 中的 expand 选项
+class UseritemsExpandedRead(UseritemsRead):
+    user: Optional[UserRead] = None
+    item: Optional[ItemRead] = None
+
 class UseritemssResponse(BaseModel):
     data: List[UseritemsRead]
     total_count: int
\ No newline at end of file
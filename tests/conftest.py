@@ -1,14 +1,20 @@
+import pytest
 import pytest_asyncio
+from contextlib import contextmanager
 from typing import AsyncGenerator
+import os
 from httpx import AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-import os
+
+# (新增) 测试使用进程内缓存后端，不需要运行 Redis。必须在导入 app 之前设置。
+os.environ.setdefault("CACHE_BACKEND", "memory")
 
 # 导入您的 FastAPI 应用实例和数据库模型基类
 from app.main import app
 from app.models import Base
-from app.db.session import get_db
+from app.db.session import get_db, lazy_session
 
 # --- 设置测试环境变量 ---
 os.environ['TESTING'] = 'True'
@@ -24,9 +30,9 @@ TestingSessionLocal = sessionmaker(
 
 async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    一个用于测试的异步依赖重写函数。
+    一个用于测试的异步依赖重写函数。与 get_db 一样惰性创建会话。
     """
-    async with TestingSessionLocal() as session:
+    async for session in lazy_session(TestingSessionLocal):
         yield session
 
 
@@ -52,4 +58,43 @@ async def client() -> AsyncGenerator[AsyncClient, None]:
     # 禁用应用的生命周期，因为我们在这里手动管理数据库
     app.lifespan = None
     async with AsyncClient(app=app, base_url="http://test") as ac:
-        yield ac
\ No newline at end of file
+        yield ac
+
+
+class QueryCounter:
+    """记录一段代码中通过测试 engine 执行的 SQL 语句。"""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @contextmanager
+    def budget(self, max_queries: int, label: str = ""):
+        """
+        (新增) 断言代码块内执行的 SQL 语句不超过 max_queries 条，超出时列出所有语句。
+        用法: with query_budget.budget(1, "delete"): await client.post(...)
+        """
+        start = self.count
+        yield
+        issued = self.statements[start:]
+        assert len(issued) <= max_queries, (
+            f"{label or '代码块'} 执行了 {len(issued)} 条 SQL，超出预算 {max_queries}:\n"
+            + "\n".join(f"  {i + 1}. {stmt}" for i, stmt in enumerate(issued))
+        )
+
+
+@pytest.fixture
+def query_budget():
+    """
+    (新增) 统计每个 /actions 调用发出的 SQL 语句数，防止 N+1 或多余查询悄悄混入。
+    """
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter._on_execute)
+    yield counter
+    event.remove(engine.sync_engine, "before_cursor_execute", counter._on_execute)
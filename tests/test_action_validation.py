@@ -0,0 +1,39 @@
+import pytest
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.asyncio
+
+HEADERS = {"X-User-ID": "test-runner", "Content-Type": "application/json"}
+
+
+async def _validation_details(client: AsyncClient, body: dict) -> list[dict]:
+    response = await client.post("/items/actions", headers=HEADERS, json=body)
+    assert response.status_code == 400, response.text
+    content = response.json()
+    assert content["code"] == "VALIDATION_ERROR"
+    assert all(set(error) == {"loc", "msg", "type"} for error in content["details"])
+    return content["details"]
+
+
+async def test_invalid_action_discriminator_returns_structured_details(client: AsyncClient):
+    """
+    测试未知或缺失的 action 返回 400 VALIDATION_ERROR，details 是逐条的 {loc, msg, type} 列表。
+    """
+    details = await _validation_details(client, {"action": "explode", "payload": {}})
+    assert [(error["loc"], error["type"]) for error in details] == [(["body"], "union_tag_invalid")]
+    assert "'explode'" in details[0]["msg"] and "'get_by_id'" in details[0]["msg"]
+
+    details = await _validation_details(client, {"payload": {}})
+    assert [(error["loc"], error["type"]) for error in details] == [(["body"], "union_tag_not_found")]
+
+
+async def test_invalid_payload_is_located_under_its_action(client: AsyncClient):
+    """
+    测试 payload 校验失败时，loc 指向对应 action 的 payload 字段。
+    """
+    details = await _validation_details(client, {"action": "get_by_id", "payload": {}})
+    assert [(error["loc"], error["type"]) for error in details] == [(["body", "get_by_id", "payload", "id"], "missing")]
+
+    details = await _validation_details(client, {"action": "get_all", "payload": {"limit": "many"}})
+    assert [(error["loc"], error["type"]) for error in details] == [
+        (["body", "get_all", "payload", "limit"], "int_parsing")]
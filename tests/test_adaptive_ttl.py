@@ -0,0 +1,86 @@
+import types
+
+import pytest
+
+from app.db import adaptive_ttl as adaptive_ttl_module
+from app.db.adaptive_ttl import AdaptiveTTLPolicy, _DecayingCounter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可手动推进的 time.monotonic，用于验证衰减计算。"""
+    now = [1000.0]
+    monkeypatch.setattr(adaptive_ttl_module, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def _policy(**kwargs) -> AdaptiveTTLPolicy:
+    options = dict(min_ttl=30, max_ttl=3600, no_cache_write_ratio=0.5, half_life_seconds=300, min_samples=20)
+    options.update(kwargs)
+    return AdaptiveTTLPolicy(**options)
+
+
+def _record(policy: AdaptiveTTLPolicy, reads: int, writes: int, model_name: str = "Items"):
+    for _ in range(reads):
+        policy.record_read(model_name)
+    for _ in range(writes):
+        policy.record_write(model_name)
+
+
+def test_counter_halves_every_half_life(clock):
+    """
+    测试计数器每经过一个半衰期减半，新的计数叠加在衰减后的值上。
+    """
+    counter = _DecayingCounter(half_life_seconds=300)
+    counter.add(8)
+    clock[0] += 300
+    assert counter.current() == pytest.approx(4)
+    clock[0] += 600
+    assert counter.current() == pytest.approx(1)
+    counter.add()
+    clock[0] += 150
+    assert counter.current() == pytest.approx(2 * 0.5 ** 0.5)
+
+
+def test_ttl_follows_write_ratio_and_is_clamped(clock):
+    """
+    测试 TTL = max_ttl * (1 - w)^2 并限制在 [min_ttl, max_ttl] 之内 (包括每个模型单独的上下限)；
+    样本不足时把默认 TTL 限制在同一范围内；写占比达到阈值时返回 0。
+    """
+    policy = _policy(bounds={"Useritems": [60, 100]})
+    assert policy.ttl_for("Items", default_ttl=10) == 30
+    assert policy.ttl_for("Items", default_ttl=10_000) == 3600
+    assert policy.ttl_for("Items", default_ttl=300) == 300
+
+    _record(policy, reads=90, writes=10)
+    assert policy.ttl_for("Items", default_ttl=300) == int(3600 * 0.9 ** 2)
+
+    # 100 * (1 - 0.45)^2 = 30 低于该模型的下限 60
+    _record(policy, reads=55, writes=45, model_name="Useritems")
+    assert policy.ttl_for("Useritems", default_ttl=300) == 60
+
+    _record(policy, reads=0, writes=80)
+    assert policy.ttl_for("Items", default_ttl=300) == 0
+
+
+def test_old_writes_decay_away(clock):
+    """
+    测试一段密集写入之后，随着时间推移旧的写入衰减，以读为主的模型重新得到长 TTL。
+    """
+    policy = _policy()
+    _record(policy, reads=50, writes=50)
+    assert policy.ttl_for("Items", default_ttl=300) == 0
+
+    clock[0] += 300 * 10
+    _record(policy, reads=30, writes=0)
+    write_ratio = (50 / 1024) / (50 / 1024 + 50 / 1024 + 30)
+    assert policy.ttl_for("Items", default_ttl=300) == int(3600 * (1 - write_ratio) ** 2)
+
+
+def test_disabled_policy_uses_default_ttl(clock):
+    """
+    测试关闭时 (默认) 始终使用路由的默认 TTL，不受读写比例影响。
+    """
+    policy = _policy(enabled=False)
+    _record(policy, reads=0, writes=100)
+    assert policy.ttl_for("Items", default_ttl=300) == 300
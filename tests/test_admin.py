@@ -0,0 +1,41 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+
+pytestmark = pytest.mark.asyncio
+
+HEADERS = {"X-User-ID": "test-runner"}
+
+ADMIN_ENDPOINTS = [("GET", "/admin/slow-queries"), ("DELETE", "/admin/slow-queries"),
+                   ("GET", "/admin/metrics"), ("GET", "/admin/hot-keys")]
+
+
+async def test_admin_endpoints_disabled_by_default(client: AsyncClient):
+    """
+    测试未配置 ADMIN_API_TOKEN 时运维接口整体关闭，即使携带了令牌头也返回 PERMISSION_DENIED。
+    """
+    assert settings.ADMIN_API_TOKEN is None
+    for method, path in ADMIN_ENDPOINTS:
+        for headers in (HEADERS, {**HEADERS, "X-Admin-Token": "anything"}):
+            response = await client.request(method, path, headers=headers)
+            assert response.status_code == 403, (method, path, response.text)
+            assert response.json()["code"] == "PERMISSION_DENIED"
+
+
+async def test_admin_endpoints_require_token(client: AsyncClient, monkeypatch):
+    """
+    测试配置 ADMIN_API_TOKEN 后，匿名请求和错误的令牌都被拒绝 (401)，正确的令牌可以访问。
+    """
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", "s3cret")
+    for method, path in ADMIN_ENDPOINTS:
+        response = await client.request(method, path, headers=HEADERS)
+        assert response.status_code == 401, (method, path, response.text)
+        assert response.json()["code"] == "AUTHENTICATION_REQUIRED"
+
+        response = await client.request(method, path, headers={**HEADERS, "X-Admin-Token": "wrong"})
+        assert response.status_code == 401, (method, path, response.text)
+        assert response.json()["code"] == "INVALID_TOKEN"
+
+        response = await client.request(method, path, headers={**HEADERS, "X-Admin-Token": "s3cret"})
+        assert response.status_code == 200, (method, path, response.text)
@@ -0,0 +1,179 @@
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.db import cache
+from app.db.cache import CacheBackend, CircuitBreakerCacheBackend, MemoryCacheBackend
+
+HEADERS = {"X-User-ID": "test-runner", "Content-Type": "application/json"}
+
+
+class _FlakyBackend(CacheBackend):
+    """包裹一个内存后端，failing=True 时每个操作都抛出连接错误，模拟缓存服务宕机。"""
+
+    name = "flaky"
+
+    def __init__(self):
+        self.inner = MemoryCacheBackend()
+        self.failing = False
+        self.deleted: list[str] = []
+
+    async def _run(self, operation: str, *args, **kwargs):
+        if self.failing:
+            raise ConnectionError("cache is down")
+        return await getattr(self.inner, operation)(*args, **kwargs)
+
+    async def get(self, key):
+        return await self._run("get", key)
+
+    async def mget(self, keys):
+        return await self._run("mget", keys)
+
+    async def set(self, key, value, ttl=None):
+        return await self._run("set", key, value, ttl=ttl)
+
+    async def delete(self, *keys):
+        result = await self._run("delete", *keys)
+        self.deleted.extend(keys)
+        return result
+
+    async def sadd(self, key, *members):
+        return await self._run("sadd", key, *members)
+
+    async def smembers(self, key):
+        return await self._run("smembers", key)
+
+    async def expire(self, key, ttl):
+        return await self._run("expire", key, ttl)
+
+    async def scan_keys(self, pattern, limit):
+        return await self._run("scan_keys", pattern, limit)
+
+    async def ping(self):
+        return await self._run("ping")
+
+
+async def _post(client: AsyncClient, action: str, payload: dict):
+    return await client.post("/items/actions", headers=HEADERS, json={"action": action, "payload": payload})
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_bypasses_and_recovers():
+    """
+    测试熔断器的状态转换: 连续失败达到阈值才打开 (成功会重置计数)；打开后绕过后端并记录删除；
+    恢复探测在后端仍不可用时保持打开，后端恢复后重放积压的失效 (包括标签成员) 并关闭。
+    """
+    backend = _FlakyBackend()
+    breaker = CircuitBreakerCacheBackend(backend, failure_threshold=3)
+    await backend.inner.set("Items:1", "cached")
+    await backend.inner.set("Useritems:9:expand", "cached")
+    await backend.inner.sadd("tag:Items:1", "Useritems:9:expand")
+
+    backend.failing = True
+    assert await breaker.get("Items:1") is None
+    assert await breaker.get("Items:1") is None
+    backend.failing = False
+    assert await breaker.get("Items:1") == "cached"
+    assert breaker.consecutive_failures == 0
+
+    backend.failing = True
+    for _ in range(3):
+        assert breaker.state == CircuitBreakerCacheBackend.CLOSED
+        assert await breaker.mget(["Items:1", "Items:2"]) == [None, None]
+    assert breaker.state == CircuitBreakerCacheBackend.OPEN
+    assert breaker.times_opened == 1
+
+    # 打开期间不再调用后端: 读返回未命中，删除 (包括 pipeline 中的删除) 被记录下来
+    bypassed = breaker.bypassed_calls
+    assert await breaker.get("Items:1") is None
+    assert await breaker.delete("Items:1") == 0
+    assert await breaker.pipeline().get("Items:2").delete("tag:Items:1").execute() == [None, 0]
+    assert breaker.bypassed_calls == bypassed + 3
+    assert breaker.stats()["pending_invalidations"] == 2
+
+    assert await breaker.try_recover() is False
+    assert breaker.is_open
+
+    backend.failing = False
+    assert await breaker.try_recover() is True
+    assert breaker.state == CircuitBreakerCacheBackend.CLOSED
+    assert set(backend.deleted) == {"Items:1", "tag:Items:1", "Useritems:9:expand"}
+    assert await breaker.get("Useritems:9:expand") is None
+    assert breaker.stats()["pending_invalidations"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reads_fail_open_while_cache_is_down(client: AsyncClient, monkeypatch):
+    """
+    测试缓存后端宕机时请求照常从数据库返回，达到 CACHE_BREAKER_FAILURE_THRESHOLD 后熔断器打开；
+    打开期间的更新在 run_cache_recovery_probe 恢复后端时被重放，不会读到旧的缓存条目。
+    """
+    backend = _FlakyBackend()
+    breaker = CircuitBreakerCacheBackend(backend, failure_threshold=settings.CACHE_BREAKER_FAILURE_THRESHOLD)
+    monkeypatch.setattr(cache, "cache_backend", breaker)
+    monkeypatch.setattr(settings, "CACHE_BREAKER_PROBE_INTERVAL_SECONDS", 0.01)
+
+    response = await _post(client, "create", {"name": "Breaker Lamp"})
+    assert response.status_code == 200, response.text
+    item_id = response.json()["data"]["iditems"]
+    await _post(client, "get_by_id", {"id": item_id})
+
+    backend.failing = True
+    for _ in range(settings.CACHE_BREAKER_FAILURE_THRESHOLD):
+        response = await _post(client, "get_by_id", {"id": item_id})
+        assert response.status_code == 200, response.text
+        assert response.json()["data"]["name"] == "Breaker Lamp"
+        if breaker.is_open:
+            break
+    assert breaker.is_open
+
+    response = await _post(client, "update", {"id": item_id, "update_data": {"name": "Renamed Lamp"}})
+    assert response.status_code == 200, response.text
+    assert breaker.stats()["pending_invalidations"] > 0
+
+    backend.failing = False
+    probe = asyncio.create_task(cache.run_cache_recovery_probe())
+    try:
+        deadline = time.monotonic() + 2
+        while breaker.is_open and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+    finally:
+        probe.cancel()
+        await probe
+    assert breaker.state == CircuitBreakerCacheBackend.CLOSED
+
+    response = await _post(client, "get_by_id", {"id": item_id})
+    assert response.json()["data"]["name"] == "Renamed Lamp"
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_bounds_tag_sets():
+    """
+    测试内存后端的集合数量达到 max_entries 时，先清理成员已全部过期或被淘汰的标签；
+    仍然满时淘汰最早创建的标签，并一起删除它登记的缓存键。
+    """
+    backend = MemoryCacheBackend(max_entries=2)
+    await backend.set("a", "1")
+    await backend.set("b", "2")
+    await backend.sadd("tag:A", "a")
+    await backend.sadd("tag:B", "b")
+
+    # 集合已满且两个标签都有有效成员: 淘汰最早的 tag:A 以及它登记的键 a
+    await backend.sadd("tag:C", "b")
+    assert await backend.smembers("tag:A") == set()
+    assert await backend.get("a") is None
+    assert await backend.smembers("tag:B") == {"b"}
+    assert await backend.smembers("tag:C") == {"b"}
+
+    # b 被删除后 tag:B 和 tag:C 只剩失效的成员，腾位置时先清理它们，而不是淘汰仍有有效成员的标签
+    await backend.set("c", "3")
+    await backend.sadd("tag:C", "c")
+    await backend.delete("b")
+    await backend.sadd("tag:D", "c")
+    assert await backend.smembers("tag:B") == set()
+    assert await backend.smembers("tag:C") == {"c"}
+    assert await backend.smembers("tag:D") == {"c"}
+    assert await backend.get("c") == "3"
@@ -0,0 +1,69 @@
+import pytest
+from httpx import AsyncClient
+
+from app.db import cache
+from app.db.cache_versioning import schema_version
+from app.routes.items import item_crud
+from app.schemas import ItemRead
+
+pytestmark = pytest.mark.asyncio
+
+HEADERS = {"X-User-ID": "test-runner", "Content-Type": "application/json"}
+
+
+class _OldItemRead(ItemRead):
+    """模拟上一个部署版本的 Read 模型 (多一个字段，形状不同)。"""
+    legacy_flag: bool = False
+
+
+async def _post(client: AsyncClient, action: str, payload: dict):
+    return await client.post("/items/actions", headers=HEADERS, json={"action": action, "payload": payload})
+
+
+async def _create_item(client: AsyncClient) -> int:
+    response = await _post(client, "create", {"name": "Versioned Lamp", "level": 1})
+    assert response.status_code == 200, response.text
+    return response.json()["data"]["iditems"]
+
+
+async def _register_old_version() -> str:
+    """在版本集合中登记旧版本 (滚动发布期间旧进程启动时会这样做)，并让本进程重新读取版本集合。"""
+    old_version = schema_version(_OldItemRead)
+    await cache.cache_backend.sadd(item_crud.known_cache_versions.key, old_version)
+    item_crud.known_cache_versions._loaded_at = None
+    return old_version
+
+
+async def test_schema_change_reads_as_cache_miss(client: AsyncClient):
+    """
+    测试 Read 模型的哈希变化后，旧版本和不带版本的旧格式键中的条目不会被读到，请求回源数据库。
+    """
+    assert schema_version(_OldItemRead) != item_crud.cache_version
+    assert schema_version(ItemRead) == item_crud.cache_version
+
+    item_id = await _create_item(client)
+    old_version = await _register_old_version()
+    stale = _OldItemRead(iditems=item_id, name="Stale Lamp", level=99).model_dump_json()
+    await cache.cache_backend.set(item_crud._get_cache_key(item_id, old_version), stale)
+    await cache.cache_backend.set(f"Items:{item_id}", stale)
+    await cache.cache_backend.delete(item_crud._get_cache_key(item_id))
+
+    response = await _post(client, "get_by_id", {"id": item_id})
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["name"] == "Versioned Lamp"
+    assert response.json()["data"]["level"] == 1
+
+
+async def test_invalidation_deletes_every_versioned_key(client: AsyncClient):
+    """
+    测试更新时删除所有已登记版本的键以及不带版本的旧格式键，旧版本的进程也不会读到过期数据。
+    """
+    item_id = await _create_item(client)
+    old_version = await _register_old_version()
+    keys = [item_crud._get_cache_key(item_id), item_crud._get_cache_key(item_id, old_version), f"Items:{item_id}"]
+    for key in keys:
+        await cache.cache_backend.set(key, "stale")
+
+    response = await _post(client, "update", {"id": item_id, "update_data": {"level": 2}})
+    assert response.status_code == 200, response.text
+    assert await cache.cache_backend.mget(keys) == [None, None, None]
@@ -0,0 +1,55 @@
+import pytest
+
+from app.db.codec import CacheCodec
+from app.schemas import ItemRead
+
+ITEM = ItemRead(iditems=42, name="Codec Lamp", description="glows " * 50, level=3)
+
+# (序列化格式, 压缩算法) -> 头字节
+HEADER_BYTES = {
+    ("json", "none"): 0x90, ("json", "zstd"): 0x91, ("json", "lz4"): 0x92,
+    ("msgpack", "none"): 0xA0, ("msgpack", "zstd"): 0xA1, ("msgpack", "lz4"): 0xA2,
+}
+# 可选依赖，未安装时跳过对应的组合
+OPTIONAL_MODULES = {"msgpack": "msgpack", "zstd": "zstandard", "lz4": "lz4.frame"}
+
+
+@pytest.mark.parametrize("serializer, compression", list(HEADER_BYTES))
+def test_round_trip_for_each_header_byte(serializer, compression):
+    """
+    测试每种格式/压缩组合写入预期的头字节 (均不在可打印 ASCII 范围内)，并且可以解码和转换为 JSON。
+    """
+    for name in (serializer, compression):
+        if name in OPTIONAL_MODULES:
+            pytest.importorskip(OPTIONAL_MODULES[name])
+    codec = CacheCodec(serializer=serializer, compression=compression, compression_threshold=0)
+
+    raw = codec.encode_model(ITEM)
+    assert raw[0] == HEADER_BYTES[(serializer, compression)]
+    assert codec.decode_model(ItemRead, raw) == ITEM
+    assert ItemRead.model_validate_json(codec.to_json(ItemRead, raw)) == ITEM
+
+    # 切换配置后仍能读取旧条目: 解码只依赖头字节
+    assert CacheCodec().decode_model(ItemRead, raw) == ITEM
+
+
+def test_small_payloads_are_not_compressed():
+    """
+    测试小于 compression_threshold 的载荷不压缩，头字节记录为 none。
+    """
+    pytest.importorskip("zstandard")
+    codec = CacheCodec(serializer="json", compression="zstd", compression_threshold=10_000)
+    raw = codec.encode_model(ITEM)
+    assert raw[0] == HEADER_BYTES[("json", "none")]
+    assert raw[1:] == ITEM.model_dump_json().encode("utf-8")
+
+
+def test_legacy_untagged_json_is_decoded():
+    """
+    测试没有头字节的旧格式 JSON (str 或 bytes) 仍可解码，to_json 原样返回而不重新序列化。
+    """
+    codec = CacheCodec()
+    legacy = ITEM.model_dump_json()
+    assert codec.decode_model(ItemRead, legacy) == ITEM
+    assert codec.decode_model(ItemRead, legacy.encode("utf-8")) == ITEM
+    assert codec.to_json(ItemRead, legacy) == legacy.encode("utf-8")
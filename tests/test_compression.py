@@ -0,0 +1,116 @@
+import gzip
+import zlib
+
+import pytest
+
+from app.middleware.compression import CompressionMiddleware, parse_accept_encoding
+
+pytestmark = pytest.mark.asyncio
+
+BODY = b'{"code":"OK","data":"' + b"compressible " * 300 + b'"}'
+
+
+def _app(chunks: list[bytes], headers: list[tuple[bytes, bytes]] | None = None, status: int = 200):
+    """一个按给定分块发送响应体的 ASGI 应用。"""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": status, "headers": headers or [
+            (b"content-type", b"application/json"), (b"content-length", str(sum(map(len, chunks))).encode()),
+            (b"etag", b'"abc"'), (b"vary", b"Accept")]})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+    return app
+
+
+async def _request(middleware: CompressionMiddleware, accept_encoding: str = "gzip") -> tuple[dict, list[bytes]]:
+    """经过中间件执行一次请求，返回 (response.start 的头, 每个响应体分块)。"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    await middleware(scope, receive, send)
+    assert messages[0]["type"] == "http.response.start"
+    return dict(messages[0]["headers"]), [message["body"] for message in messages[1:]]
+
+
+async def test_parse_accept_encoding_q_values():
+    """
+    测试 q 值解析: 默认 1.0，q=0 表示明确拒绝，无法解析的 q 值按 0 处理，名称不区分大小写。
+    """
+    assert parse_accept_encoding("gzip, BR;q=0.8, zstd;q=0, ,deflate;q=oops") == {
+        "gzip": 1.0, "br": 0.8, "zstd": 0.0, "deflate": 0.0}
+
+    middleware = CompressionMiddleware(_app([BODY]), encodings=["gzip"])
+    assert middleware.select_encoding("gzip;q=0, *") is None
+    assert middleware.select_encoding("identity, *;q=0.1").name == "gzip"
+    assert middleware.select_encoding("br") is None
+
+
+async def test_equal_q_values_follow_server_preference():
+    """
+    测试客户端 q 值相同时按服务端的偏好顺序选择，q 值更高的编码优先。
+    """
+    pytest.importorskip("zstandard")
+    middleware = CompressionMiddleware(_app([BODY]), encodings=["zstd", "gzip"])
+    assert middleware.select_encoding("gzip, zstd").name == "zstd"
+    assert middleware.select_encoding("gzip, zstd;q=0.5").name == "gzip"
+
+
+async def test_compresses_only_above_minimum_size():
+    """
+    测试超过 minimum_size 的响应被压缩 (更新 content-length，ETag 改为弱 ETag，Vary 追加 Accept-Encoding)，
+    小响应原样返回；客户端不接受任何可用编码时不压缩。
+    """
+    headers, bodies = await _request(CompressionMiddleware(_app([BODY]), encodings=["gzip"], minimum_size=1024))
+    assert headers[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(b"".join(bodies)) == BODY
+    assert headers[b"content-length"] == str(len(bodies[0])).encode()
+    assert headers[b"etag"] == b'W/"abc"'
+    assert headers[b"vary"] == b"Accept, Accept-Encoding"
+
+    small = b'{"code":"OK"}'
+    headers, bodies = await _request(CompressionMiddleware(_app([small]), encodings=["gzip"], minimum_size=1024))
+    assert b"content-encoding" not in headers
+    assert bodies == [small]
+
+    headers, bodies = await _request(CompressionMiddleware(_app([BODY]), encodings=["gzip"]), "gzip;q=0")
+    assert b"content-encoding" not in headers
+    assert bodies == [BODY]
+
+
+@pytest.mark.parametrize("headers, status", [
+    ([(b"content-type", b"application/json"), (b"content-encoding", b"br")], 200),
+    ([(b"content-type", b"image/png")], 200),
+    ([(b"etag", b'"abc"')], 304),
+])
+async def test_skips_encoded_and_ineligible_responses(headers, status):
+    """
+    测试已经带 Content-Encoding 的响应、不适合压缩的内容类型以及 304 响应原样透传。
+    """
+    middleware = CompressionMiddleware(_app([BODY], headers=headers, status=status), encodings=["gzip"])
+    response_headers, bodies = await _request(middleware)
+    assert response_headers == dict(headers)
+    assert bodies == [BODY]
+
+
+async def test_streaming_response_is_compressed_chunk_by_chunk():
+    """
+    测试流式响应缓冲到 minimum_size 后开始压缩: 去掉 content-length，之后每个分块压缩并 flush 后立即发送。
+    """
+    chunks = [BODY[:600], BODY[600:1200], BODY[1200:2400], BODY[2400:]]
+    middleware = CompressionMiddleware(_app(chunks), encodings=["gzip"], minimum_size=1024)
+    headers, bodies = await _request(middleware)
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    # 前两个分块凑够阈值后一起发送，之后每个分块各自发送
+    assert len(bodies) == 3
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # 每个分块都已 flush，客户端收到即可解压
+    assert decompressor.decompress(bodies[0]) == BODY[:1200]
+    assert decompressor.decompress(bodies[1]) == BODY[1200:2400]
+    assert decompressor.decompress(bodies[2]) + decompressor.flush() == BODY[2400:]
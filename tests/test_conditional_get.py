@@ -0,0 +1,62 @@
+import pytest
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.asyncio
+
+HEADERS = {"X-User-ID": "test-runner", "Content-Type": "application/json"}
+
+
+async def _create_item(client: AsyncClient) -> int:
+    response = await client.post("/items/actions", headers=HEADERS,
+                                 json={"action": "create", "payload": {"name": "ETag Lamp", "level": 1}})
+    assert response.status_code == 200, response.text
+    return response.json()["data"]["iditems"]
+
+
+async def test_if_none_match_returns_304(client: AsyncClient):
+    """
+    测试 GET /{entity_id} 返回 ETag；If-None-Match 命中 (包括带 W/ 前缀和多个值) 时返回空的 304，实体更新后 ETag 变化。
+    """
+    item_id = await _create_item(client)
+    response = await client.get(f"/items/{item_id}", headers=HEADERS)
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["name"] == "ETag Lamp"
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"')
+    assert response.headers["vary"] == "Accept"
+    assert response.headers["cache-control"].startswith("private")
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = await client.get(f"/items/{item_id}", headers={**HEADERS, "If-None-Match": if_none_match})
+        assert response.status_code == 304, if_none_match
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    response = await client.post("/items/actions", headers=HEADERS,
+                                 json={"action": "update", "payload": {"id": item_id, "update_data": {"level": 2}}})
+    assert response.status_code == 200, response.text
+    response = await client.get(f"/items/{item_id}", headers={**HEADERS, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["data"]["level"] == 2
+    assert response.headers["etag"] != etag
+
+
+async def test_msgpack_uses_its_own_etag(client: AsyncClient):
+    """
+    测试 MessagePack 表示使用带 -msgpack 后缀的 ETag (并带 Vary: Accept)，JSON 的 ETag 不会让它返回 304。
+    """
+    msgpack = pytest.importorskip("msgpack")
+    item_id = await _create_item(client)
+    json_etag = (await client.get(f"/items/{item_id}", headers=HEADERS)).headers["etag"]
+    msgpack_headers = {**HEADERS, "Accept": "application/msgpack"}
+
+    response = await client.get(f"/items/{item_id}", headers={**msgpack_headers, "If-None-Match": json_etag})
+    assert response.status_code == 200, response.text
+    msgpack_etag = response.headers["etag"]
+    assert msgpack_etag == json_etag[:-1] + '-msgpack"'
+    assert response.headers["vary"] == "Accept"
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content)["data"]["iditems"] == item_id
+
+    response = await client.get(f"/items/{item_id}", headers={**msgpack_headers, "If-None-Match": msgpack_etag})
+    assert response.status_code == 304
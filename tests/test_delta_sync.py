@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.db.delta_sync import SyncCursor, encode_sync_cursor
+
+pytestmark = pytest.mark.asyncio
+
+HEADERS = {"X-User-ID": "test-runner", "Content-Type": "application/json"}
+
+
+async def _changes_since(client: AsyncClient, cursor: str):
+    return await client.post("/items/actions", headers=HEADERS,
+                             json={"action": "changes_since", "payload": {"cursor": cursor}})
+
+
+async def test_cursor_without_deletes_outlives_tombstone_retention(client: AsyncClient, monkeypatch):
+    """
+    测试没有任何删除时墓碑位置也随同步推进: 定期同步的客户端不会因为超过墓碑保留期而被要求全量同步。
+    """
+    # 接近保留期末尾时签发的游标 (例如很久以前的首次同步，之后一直没有删除)
+    issued_at = datetime.now(timezone.utc) - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS - 1)
+    old_cursor = encode_sync_cursor(SyncCursor(changed=None, deleted=(issued_at, 0)))
+
+    response = await _changes_since(client, old_cursor)
+    assert response.status_code == 200, response.text
+    data = response.json()["data"]
+    while data["has_more"]:
+        response = await _changes_since(client, data["next_cursor"])
+        assert response.status_code == 200, response.text
+        data = response.json()["data"]
+
+    # 保留期缩短相当于时间流逝: 旧游标过期，刚签发的游标仍然有效
+    monkeypatch.setattr(settings, "SYNC_TOMBSTONE_RETENTION_DAYS", 1)
+    response = await _changes_since(client, old_cursor)
+    assert response.status_code == 410, response.text
+    response = await _changes_since(client, data["next_cursor"])
+    assert response.status_code == 200, response.text
@@ -0,0 +1,107 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.logging_crud import LoggingFastCRUD
+from app.db import cache
+
+pytestmark = pytest.mark.asyncio
+
+HEADERS = {"X-User-ID": "test-runner", "Content-Type": "application/json"}
+
+
+async def _post(client: AsyncClient, path: str, action: str, payload: dict):
+    return await client.post(f"{path}/actions", headers=HEADERS, json={"action": action, "payload": payload})
+
+
+async def _create_useritem(client: AsyncClient) -> tuple[int, int, int]:
+    """创建一个用户、一个物品以及它们之间的关联，返回 (user_id, item_id, useritem_id)。"""
+    response = await _post(client, "/users", "create",
+                           {"name": "Expand User", "email": f"{uuid.uuid4().hex}@example.com", "password": "pw"})
+    assert response.status_code == 200, response.text
+    user_id = response.json()["data"]["id"]
+
+    response = await _post(client, "/items", "create", {"name": "Expand Item", "level": 2})
+    assert response.status_code == 200, response.text
+    item_id = response.json()["data"]["iditems"]
+
+    response = await _post(client, "/useritems", "create", {"user_id": user_id, "item_id": item_id, "quantity": 3})
+    assert response.status_code == 200, response.text
+    return user_id, item_id, response.json()["data"]["id"]
+
+
+async def test_expand_returns_nested_user_and_item(client: AsyncClient):
+    """
+    测试 expand=["user", "item"] 在 get_by_id 和 get_all 中都返回嵌套的 user/item 对象。
+    """
+    user_id, item_id, useritem_id = await _create_useritem(client)
+
+    response = await _post(client, "/useritems", "get_by_id", {"id": useritem_id, "expand": ["user", "item"]})
+    assert response.status_code == 200, response.text
+    data = response.json()["data"]
+    assert data["user"] == {"id": user_id, "name": "Expand User", "email": data["user"]["email"]}
+    assert data["item"]["iditems"] == item_id
+    assert data["item"]["level"] == 2
+
+    # 不展开时不返回嵌套对象
+    response = await _post(client, "/useritems", "get_by_id", {"id": useritem_id})
+    assert response.status_code == 200, response.text
+    assert "user" not in response.json()["data"]
+
+    response = await _post(client, "/useritems", "get_all", {
+        "limit": 10, "expand": ["user", "item"],
+        "filters": [{"field": "user_id", "op": "eq", "value": user_id}],
+    })
+    assert response.status_code == 200, response.text
+    rows = response.json()["data"]["data"]
+    assert [row["id"] for row in rows] == [useritem_id]
+    assert rows[0]["user"]["id"] == user_id
+    assert rows[0]["item"]["iditems"] == item_id
+
+
+async def test_expand_rejects_unknown_relation(client: AsyncClient):
+    """
+    测试 expand 中不在白名单里的关联关系被拒绝 (VALIDATION_ERROR)，不会触发任何加载。
+    """
+    response = await _post(client, "/useritems", "get_by_id", {"id": 1, "expand": ["owner"]})
+    assert response.status_code == 400, response.text
+    body = response.json()
+    assert body["code"] == "VALIDATION_ERROR"
+    assert any("expand" in error["loc"] for error in body["details"])
+
+    response = await _post(client, "/useritems", "get_all", {"expand": ["user", "owner"]})
+    assert response.status_code == 400, response.text
+    assert response.json()["code"] == "VALIDATION_ERROR"
+
+
+async def test_expanded_entry_invalidated_when_related_rows_change(client: AsyncClient, query_budget):
+    """
+    测试展开后的缓存条目登记在 user/item 的标签集合中，user 或 item 被更新时随之失效。
+    """
+    user_id, item_id, useritem_id = await _create_useritem(client)
+    expand_payload = {"id": useritem_id, "expand": ["user", "item"]}
+
+    response = await _post(client, "/useritems", "get_by_id", expand_payload)
+    assert response.status_code == 200, response.text
+    with query_budget.budget(0, "expanded get_by_id (hit)"):
+        response = await _post(client, "/useritems", "get_by_id", expand_payload)
+    assert response.status_code == 200, response.text
+
+    user_tag = LoggingFastCRUD.cache_tag("Users", user_id)
+    item_tag = LoggingFastCRUD.cache_tag("Items", item_id)
+    expanded_keys = await cache.cache_backend.smembers(user_tag)
+    assert expanded_keys, "展开的条目应登记在用户的标签集合中"
+    assert expanded_keys <= await cache.cache_backend.smembers(item_tag)
+
+    response = await _post(client, "/users", "update", {"id": user_id, "update_data": {"name": "Renamed User"}})
+    assert response.status_code == 200, response.text
+    for key in expanded_keys:
+        assert await cache.cache_backend.get(key) is None
+    response = await _post(client, "/useritems", "get_by_id", expand_payload)
+    assert response.json()["data"]["user"]["name"] == "Renamed User"
+
+    response = await _post(client, "/items", "update", {"id": item_id, "update_data": {"level": 9}})
+    assert response.status_code == 200, response.text
+    response = await _post(client, "/useritems", "get_by_id", expand_payload)
+    assert response.json()["data"]["item"]["level"] == 9
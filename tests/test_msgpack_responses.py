@@ -0,0 +1,61 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core import responses
+from app.core.responses import negotiate_format
+
+HEADERS = {"X-User-ID": "test-runner", "Content-Type": "application/json"}
+MSGPACK_HEADERS = {**HEADERS, "Accept": "application/msgpack"}
+
+
+def test_negotiate_format():
+    """
+    测试只有 msgpack 的 q 值大于 0 且不低于明确列出的 JSON 时才选择 MessagePack。
+    """
+    pytest.importorskip("msgpack")
+    assert negotiate_format("application/msgpack") == "msgpack"
+    assert negotiate_format("application/x-msgpack, application/json;q=0.9") == "msgpack"
+    assert negotiate_format("application/json, application/msgpack;q=0.5") == "json"
+    assert negotiate_format("application/msgpack;q=0") == "json"
+    assert negotiate_format("*/*") == "json"
+    assert negotiate_format(None) == "json"
+
+
+@pytest.mark.asyncio
+async def test_msgpack_bodies_decode_to_the_json_structure(client: AsyncClient):
+    """
+    测试 Accept: application/msgpack 时 create/get_by_id/get_all 以及错误响应都返回可解码的 MessagePack，结构与 JSON 相同。
+    """
+    msgpack = pytest.importorskip("msgpack")
+    response = await client.post("/items/actions", headers=MSGPACK_HEADERS,
+                                 json={"action": "create", "payload": {"name": "Packed Lamp", "level": 5}})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    item_id = msgpack.unpackb(response.content)["data"]["iditems"]
+
+    for action, payload in (("get_by_id", {"id": item_id}), ("get_all", {"limit": 2})):
+        body = {"action": action, "payload": payload}
+        packed = await client.post("/items/actions", headers=MSGPACK_HEADERS, json=body)
+        plain = await client.post("/items/actions", headers=HEADERS, json=body)
+        assert packed.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(packed.content) == plain.json()
+
+    response = await client.post("/items/actions", headers=MSGPACK_HEADERS,
+                                 json={"action": "get_by_id", "payload": {"id": item_id + 100000}})
+    assert response.status_code == 404
+    assert msgpack.unpackb(response.content)["code"] == "RESOURCE_NOT_FOUND"
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_json_without_msgpack(client: AsyncClient, monkeypatch):
+    """
+    测试未安装 msgpack 时，即使请求 MessagePack 也返回 JSON。
+    """
+    monkeypatch.setattr(responses, "msgpack", None)
+    assert negotiate_format("application/msgpack") == "json"
+
+    response = await client.post("/items/actions", headers=MSGPACK_HEADERS,
+                                 json={"action": "get_all", "payload": {"limit": 1}})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["code"] == "OK"
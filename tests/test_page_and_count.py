@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.logging_crud import LoggingFastCRUD
+from app.db.session import has_spare_connections
+from app.models import Base, Items
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture
+async def pooled_engine(tmp_path):
+    """
+    一个使用 QueuePool 的文件 SQLite 引擎 (共享的测试引擎是内存库，连接池不支持并发 COUNT)。
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=AsyncAdaptedQueuePool,
+                                 pool_size=3, max_overflow=5)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(bind=engine) as session:
+        session.add_all([Items(name=f"Pooled {i}", level=i) for i in range(5)])
+        await session.commit()
+    yield engine
+    await engine.dispose()
+
+
+async def test_spare_connections_use_public_pool_counters(pooled_engine):
+    """
+    测试只有池内空闲或尚未创建的连接被计为可用，溢出额度不算在内；非 QueuePool 一律返回 False。
+    """
+    pool = pooled_engine.sync_engine.pool
+    assert has_spare_connections(pooled_engine, needed=3)
+    assert not has_spare_connections(pooled_engine, needed=4)
+
+    async with pooled_engine.connect() as first, pooled_engine.connect() as second:
+        await first.exec_driver_sql("SELECT 1")
+        await second.exec_driver_sql("SELECT 1")
+        assert pool.checkedout() == 2
+        assert has_spare_connections(pooled_engine, needed=1)
+        assert not has_spare_connections(pooled_engine, needed=2)
+
+    assert not has_spare_connections(None)
+    assert not has_spare_connections(create_async_engine("sqlite+aiosqlite:///:memory:"))
+
+
+async def test_page_and_count_run_concurrently(pooled_engine, monkeypatch):
+    """
+    测试分页查询和 COUNT 同时执行: 分页查询等到 COUNT 开始后才继续，顺序执行时会超时。
+    """
+    crud = LoggingFastCRUD(Items)
+    count_started = asyncio.Event()
+    original_count = crud.count
+
+    async def _count(db, **kwargs):
+        count_started.set()
+        return await original_count(db=db, **kwargs)
+
+    class _PageSession(AsyncSession):
+        async def execute(self, *args, **kwargs):
+            await asyncio.wait_for(count_started.wait(), timeout=1)
+            return await super().execute(*args, **kwargs)
+
+    monkeypatch.setattr(crud, "count", _count)
+    async with _PageSession(bind=pooled_engine) as db:
+        result = await crud.get_multi(db, offset=1, limit=2, sort_columns=["iditems"])
+    assert [row["level"] for row in result["data"]] == [1, 2]
+    assert result["total_count"] == 5
+    assert pooled_engine.sync_engine.pool.checkedout() == 0
+
+
+async def test_count_session_closed_when_request_is_cancelled(pooled_engine, monkeypatch):
+    """
+    测试请求在 COUNT 执行期间被取消时，COUNT 的会话被关闭，连接归还连接池。
+    """
+    crud = LoggingFastCRUD(Items)
+    count_checked_out = asyncio.Event()
+
+    async def _hanging_count(db, **kwargs):
+        await db.execute(Items.__table__.select().limit(1))
+        count_checked_out.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(crud, "count", _hanging_count)
+    pool = pooled_engine.sync_engine.pool
+    async with AsyncSession(bind=pooled_engine) as db:
+        task = asyncio.create_task(crud.get_multi(db, limit=2))
+        await asyncio.wait_for(count_checked_out.wait(), timeout=1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # 只剩分页查询所在的请求会话
+        assert pool.checkedout() == 1
+    assert pool.checkedout() == 0
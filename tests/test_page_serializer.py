@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from httpx import AsyncClient
+
+from app.core.responses import ColumnarPage, PageSerializer, PaginationMeta, Success
+from app.schemas import ItemRead, ItemsResponse
+
+HEADERS = {"X-User-ID": "test-runner", "Content-Type": "application/json"}
+
+ROWS = [
+    {"iditems": 1, "name": "长剑", "description": None, "level": 3},
+    {"iditems": 2, "name": "Shield", "description": "round \"wooden\"", "level": 0},
+]
+META = {"pagination": PaginationMeta(total_items=7, total_pages=4, current_page=1, page_size=2).model_dump()}
+
+
+def _legacy_envelope_bytes(data, meta) -> bytes:
+    """原来的路径: 返回 Success(...)，由 FastAPI 按 response_model 编码后交给 JSONResponse 序列化。"""
+    content = jsonable_encoder(Success(data=data, meta=meta))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def test_dump_matches_success_envelope():
+    """
+    测试 PageSerializer.dump 输出的字节与原来逐行校验后经 Success 包装的响应完全一致。
+    """
+    serializer = PageSerializer(ItemsResponse)
+    legacy_page = ItemsResponse(data=[ItemRead.model_validate(row) for row in ROWS], total_count=7)
+    assert serializer.dump(ROWS, 7, META) == _legacy_envelope_bytes(legacy_page, META)
+    assert serializer.dump([], 0, None) == _legacy_envelope_bytes(ItemsResponse(data=[], total_count=0), None)
+
+
+def test_dump_columnar_matches_success_envelope():
+    """
+    测试 dump_columnar 输出的字节与 Success(data=ColumnarPage) 一致，每一行按 columns 的顺序排列。
+    """
+    serializer = PageSerializer(ItemsResponse)
+    assert serializer.columns == ["name", "description", "level", "iditems"]
+    columnar = ColumnarPage(columns=serializer.columns, total_count=7, rows=[
+        ["长剑", None, 3, 1],
+        ["Shield", "round \"wooden\"", 0, 2],
+    ])
+    assert serializer.columnar(ROWS, 7) == columnar
+    assert serializer.dump_columnar(ROWS, 7, META) == _legacy_envelope_bytes(columnar, META)
+
+
+@pytest.mark.asyncio
+async def test_get_all_response_shape(client: AsyncClient):
+    """
+    测试 get_all (默认 page_json_bytes=True) 的响应结构与标准成功响应一致。
+    """
+    response = await client.post("/items/actions", headers=HEADERS,
+                                 json={"action": "create", "payload": {"name": "Shape Lamp"}})
+    assert response.status_code == 200, response.text
+    response = await client.post("/items/actions", headers=HEADERS,
+                                 json={"action": "get_all", "payload": {"offset": 0, "limit": 2}})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert list(body) == ["code", "message", "data", "meta"]
+    assert (body["code"], body["message"]) == ("OK", "操作成功。")
+    assert list(body["data"]) == ["data", "total_count"]
+    assert body["data"]["data"]
+    assert all(list(row) == ["name", "description", "level", "iditems"] for row in body["data"]["data"])
+    assert set(body["meta"]["pagination"]) == {"total_items", "total_pages", "current_page", "page_size"}
+
+
+@pytest.mark.asyncio
+async def test_get_all_columnar_matches_row_format(client: AsyncClient):
+    """
+    测试 format="columnar" 返回的列和行可以还原出与默认格式相同的数据。
+    """
+    payload = {"offset": 0, "limit": 5, "sort": [{"field": "iditems"}]}
+    response = await client.post("/items/actions", headers=HEADERS, json={"action": "get_all", "payload": payload})
+    assert response.status_code == 200, response.text
+    rows_body = response.json()
+
+    response = await client.post("/items/actions", headers=HEADERS,
+                                 json={"action": "get_all", "payload": {**payload, "format": "columnar"}})
+    assert response.status_code == 200, response.text
+    columnar_body = response.json()
+    assert list(columnar_body["data"]) == ["columns", "rows", "total_count"]
+    columns = columnar_body["data"]["columns"]
+    assert [dict(zip(columns, row)) for row in columnar_body["data"]["rows"]] == rows_body["data"]["data"]
+    assert columnar_body["data"]["total_count"] == rows_body["data"]["total_count"]
+    assert columnar_body["meta"] == rows_body["meta"]
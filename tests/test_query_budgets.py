@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from app.db import cache
+from app.db.batch_loader import BatchLoader
+from app.models import Items
+from app.routes.items import item_crud
+
+pytestmark = pytest.mark.asyncio
+
+HEADERS = {"X-User-ID": "test-runner", "Content-Type": "application/json"}
+
+# 每个 action 允许执行的最大 SQL 语句数。改动使某个 action 超出预算时测试失败。
+ITEM_ACTION_BUDGETS = {
+    "create": 2,           # INSERT + 读回新行
+    "get_by_id_miss": 1,   # 缓存未命中: 一条 SELECT
+    "get_by_id_hit": 0,    # 缓存命中: 不访问数据库
+    "get_all": 2,          # 分页 SELECT + COUNT
+    "update": 2,           # UPDATE + 读回新行
+    "delete": 2,           # 一条 DELETE (按受影响行数判断是否存在) + 同一事务中写入墓碑
+}
+
+
+async def _post(client: AsyncClient, action: str, payload: dict):
+    return await client.post("/items/actions", headers=HEADERS, json={"action": action, "payload": payload})
+
+
+async def test_item_action_query_budgets(client: AsyncClient, query_budget):
+    """
+    测试物品各个 action 的 SQL 语句数不超过预算。
+    """
+    with query_budget.budget(ITEM_ACTION_BUDGETS["create"], "create"):
+        response = await _post(client, "create", {"name": "Budget Sword", "level": 3})
+    assert response.status_code == 200, response.text
+    item_id = response.json()["data"]["iditems"]
+
+    with query_budget.budget(ITEM_ACTION_BUDGETS["get_by_id_miss"], "get_by_id (miss)"):
+        response = await _post(client, "get_by_id", {"id": item_id})
+    assert response.status_code == 200, response.text
+
+    with query_budget.budget(ITEM_ACTION_BUDGETS["get_by_id_hit"], "get_by_id (hit)"):
+        response = await _post(client, "get_by_id", {"id": item_id})
+    assert response.status_code == 200, response.text
+
+    with query_budget.budget(ITEM_ACTION_BUDGETS["get_all"], "get_all"):
+        response = await _post(client, "get_all", {"offset": 0, "limit": 10})
+    assert response.status_code == 200, response.text
+
+    with query_budget.budget(ITEM_ACTION_BUDGETS["update"], "update"):
+        response = await _post(client, "update", {"id": item_id, "update_data": {"level": 4}})
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["level"] == 4
+
+    with query_budget.budget(ITEM_ACTION_BUDGETS["delete"], "delete"):
+        response = await _post(client, "delete", {"id": item_id})
+    assert response.status_code == 200, response.text
+
+    with query_budget.budget(ITEM_ACTION_BUDGETS["delete"], "delete (missing)"):
+        response = await _post(client, "delete", {"id": item_id})
+    assert response.status_code == 404
+
+
+async def test_concurrent_identical_get_all_share_one_query(client: AsyncClient, query_budget):
+    """
+    测试完全相同的并发 get_all 请求被合并: 只执行一次分页 SELECT + COUNT，且结果一致。
+    """
+    with query_budget.budget(ITEM_ACTION_BUDGETS["get_all"], "5 x concurrent get_all"):
+        responses = await asyncio.gather(*(
+            _post(client, "get_all", {"limit": 10, "offset": 0}) for _ in range(5)
+        ))
+    assert all(response.status_code == 200 for response in responses)
+    assert len({response.text for response in responses}) == 1
+
+
+async def test_concurrent_get_by_id_misses_share_one_in_query(client: AsyncClient, query_budget, monkeypatch):
+    """
+    测试开启批量加载后，并发的 get_by_id 缓存未命中 (包括不存在的 ID) 合并为一条 IN 查询。
+    """
+    item_ids = []
+    for level in range(4):
+        response = await _post(client, "create", {"name": "Batch Shield", "level": level})
+        assert response.status_code == 200, response.text
+        item_ids.append(response.json()["data"]["iditems"])
+    await cache.cache_backend.delete(*(item_crud._get_cache_key(item_id) for item_id in item_ids))
+    missing_id = max(item_ids) + 1000
+
+    loader = BatchLoader(Items, window_ms=20)
+    monkeypatch.setattr(item_crud, "batch_loader", loader)
+    with query_budget.budget(1, "4 x concurrent get_by_id (miss)"):
+        responses = await asyncio.gather(*(_post(client, "get_by_id", {"id": item_id})
+                                           for item_id in item_ids + [missing_id]))
+    assert [response.status_code for response in responses] == [200] * 4 + [404]
+    assert [response.json()["data"]["level"] for response in responses[:4]] == [0, 1, 2, 3]
+    assert " IN " in query_budget.statements[-1]
+    assert loader.stats() == {"loads": 5, "queries": 1, "avg_batch_size": 5.0}
@@ -0,0 +1,100 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.query_filters import QueryOptions, build_query_kwargs
+from app.exceptions.error_codes import ErrorCode
+from app.exceptions.exceptions import AppException
+from app.models import Items, Useritems
+
+HEADERS = {"X-User-ID": "test-runner", "Content-Type": "application/json"}
+
+
+async def _post(client: AsyncClient, path: str, action: str, payload: dict):
+    return await client.post(f"{path}/actions", headers=HEADERS, json={"action": action, "payload": payload})
+
+
+def test_build_query_kwargs_maps_each_operator():
+    """
+    测试 eq/in/range/prefix 和排序被转换为 get_multi 的关键字参数。
+    """
+    options = QueryOptions.model_validate({
+        "filters": [
+            {"field": "user_id", "op": "eq", "value": 7},
+            {"field": "item_id", "op": "in", "value": [1, 2]},
+            {"field": "id", "op": "range", "value": {"gte": 10, "lt": 20}},
+        ],
+        "sort": [{"field": "id", "order": "desc"}],
+    })
+    assert build_query_kwargs(options, Useritems) == {
+        "user_id": 7,
+        "item_id__in": [1, 2],
+        "id__gte": 10,
+        "id__lt": 20,
+        "sort_columns": ["id"],
+        "sort_orders": ["desc"],
+    }
+
+
+def test_build_query_kwargs_refuses_unindexed_columns():
+    """
+    测试默认拒绝在无索引的列上过滤或排序 (VALIDATION_ERROR)，allow_unindexed=True 时放行。
+    """
+    for options in (
+        QueryOptions.model_validate({"filters": [{"field": "level", "value": 1}]}),
+        QueryOptions.model_validate({"sort": [{"field": "name"}]}),
+    ):
+        with pytest.raises(AppException) as exc_info:
+            build_query_kwargs(options, Items)
+        assert exc_info.value.error_code == ErrorCode.VALIDATION_ERROR
+        assert "没有索引" in exc_info.value.detail
+
+    options = QueryOptions.model_validate({"filters": [{"field": "level", "op": "range", "value": {"gt": 1}}]})
+    assert build_query_kwargs(options, Items, allow_unindexed=True) == {"level__gt": 1}
+
+    # 不存在的列始终被拒绝
+    with pytest.raises(AppException):
+        build_query_kwargs(QueryOptions.model_validate({"filters": [{"field": "nope", "value": 1}]}), Items,
+                           allow_unindexed=True)
+
+
+@pytest.mark.asyncio
+async def test_get_all_filters_on_indexed_columns(client: AsyncClient):
+    """
+    测试 get_all 按 eq/in/range/prefix 过滤，prefix 中的 % 和 _ 按字面匹配。
+    """
+    token = uuid.uuid4().hex[:8]
+    emails = [f"{token}%a@example.com", f"{token}xa@example.com", f"{token}_b@example.com", f"{token}yb@example.com"]
+    ids = {}
+    for email in emails:
+        response = await _post(client, "/users", "create", {"name": "Filter User", "email": email, "password": "pw"})
+        assert response.status_code == 200, response.text
+        ids[email] = response.json()["data"]["id"]
+
+    async def _emails(filters: list[dict]) -> list[str]:
+        response = await _post(client, "/users", "get_all",
+                               {"limit": 100, "filters": filters, "sort": [{"field": "id"}]})
+        assert response.status_code == 200, response.text
+        return [row["email"] for row in response.json()["data"]["data"]]
+
+    assert await _emails([{"field": "email", "op": "prefix", "value": f"{token}%"}]) == [emails[0]]
+    assert await _emails([{"field": "email", "op": "prefix", "value": f"{token}_"}]) == [emails[2]]
+    assert await _emails([{"field": "email", "op": "prefix", "value": token}]) == emails
+    assert await _emails([{"field": "email", "value": emails[1]}]) == [emails[1]]
+    assert await _emails([{"field": "id", "op": "in", "value": [ids[emails[0]], ids[emails[3]]]}]) == [
+        emails[0], emails[3]]
+    assert await _emails([
+        {"field": "email", "op": "prefix", "value": token},
+        {"field": "id", "op": "range", "value": {"gt": ids[emails[0]], "lte": ids[emails[2]]}},
+    ]) == emails[1:3]
+
+
+@pytest.mark.asyncio
+async def test_get_all_rejects_unindexed_filter(client: AsyncClient):
+    """
+    测试路由器未开启 allow_unindexed_filters 时，在无索引的列上过滤返回 VALIDATION_ERROR。
+    """
+    response = await _post(client, "/items", "get_all", {"filters": [{"field": "level", "value": 1}]})
+    assert response.status_code == 400, response.text
+    assert response.json()["code"] == "VALIDATION_ERROR"
@@ -0,0 +1,89 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from app.routes.items import item_search
+
+pytestmark = pytest.mark.asyncio
+
+HEADERS = {"X-User-ID": "test-runner", "Content-Type": "application/json"}
+
+
+async def _post(client: AsyncClient, action: str, payload: dict):
+    return await client.post("/items/actions", headers=HEADERS, json={"action": action, "payload": payload})
+
+
+async def _create_item(client: AsyncClient, name: str, description: str) -> int:
+    response = await _post(client, "create", {"name": name, "description": description})
+    assert response.status_code == 200, response.text
+    return response.json()["data"]["iditems"]
+
+
+async def _search_ids(client: AsyncClient, query: str) -> tuple[list[int], str]:
+    response = await _post(client, "search", {"q": query})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return [row["iditems"] for row in body["data"]["data"]], body["meta"]["search"]["engine"]
+
+
+async def test_search_uses_fts5_on_sqlite(client: AsyncClient):
+    """
+    测试 SQLite 上通过 FTS5 影子表搜索刚插入的物品，更新和删除由触发器同步。
+    """
+    token = uuid.uuid4().hex[:10]
+    first = await _create_item(client, "Search Lamp", f"{token} {token} glows")
+    second = await _create_item(client, f"{token} Shade", "plain")
+
+    ids, engine = await _search_ids(client, token)
+    assert engine == "fts5"
+    assert sorted(ids) == sorted([first, second])
+
+    response = await _post(client, "update", {"id": second, "update_data": {"name": "Renamed Shade"}})
+    assert response.status_code == 200, response.text
+    response = await _post(client, "delete", {"id": first})
+    assert response.status_code == 200, response.text
+    ids, _ = await _search_ids(client, token)
+    assert ids == []
+
+
+async def test_search_rejects_sub_trigram_query_on_sqlite(client: AsyncClient):
+    """
+    测试 SQLite 上 1-2 个字符的关键词返回 VALIDATION_ERROR，而不是扫描整张表。
+    """
+    for query in ("a", "ab"):
+        response = await _post(client, "search", {"q": query})
+        assert response.status_code == 400, response.text
+        assert response.json()["code"] == "VALIDATION_ERROR"
+
+
+async def test_fallback_index_follows_writes(client: AsyncClient, monkeypatch):
+    """
+    测试没有原生全文索引时，进程内倒排索引通过 add_write_listener 得知 create/update/delete 并刷新对应条目。
+    """
+    async def _no_native_engine(db):
+        return None
+
+    monkeypatch.setattr(item_search, "_native_engine", _no_native_engine)
+    token = uuid.uuid4().hex[:10]
+
+    # 先建好进程内索引，之后的写操作只能通过写监听器被发现
+    ids, engine = await _search_ids(client, token)
+    assert (ids, engine) == ([], "fallback")
+
+    item_id = await _create_item(client, "Fallback Lamp", token)
+    assert item_id in item_search._fallback.pending_ids
+    ids, _ = await _search_ids(client, token)
+    assert ids == [item_id]
+
+    response = await _post(client, "update", {"id": item_id, "update_data": {"description": "nothing here"}})
+    assert response.status_code == 200, response.text
+    ids, _ = await _search_ids(client, token)
+    assert ids == []
+
+    response = await _post(client, "update", {"id": item_id, "update_data": {"description": token}})
+    assert response.status_code == 200, response.text
+    response = await _post(client, "delete", {"id": item_id})
+    assert response.status_code == 200, response.text
+    ids, _ = await _search_ids(client, token)
+    assert ids == []